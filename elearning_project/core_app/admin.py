@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'started_at', 'finished_at', 'owner')
+    list_filter = ('status', 'periodic', 'name')
+    search_fields = ('name', 'error')
+    date_hierarchy = 'created_at'
+    list_select_related = ('owner',)
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Run the selected failed jobs again (periodic ones reschedule themselves)")
+    def retry_jobs(self, request, queryset):
+        count = queryset.filter(status=Job.FAILED, periodic=False).update(
+            status=Job.PENDING, attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f"{count} job(s) queued again.")
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CoreAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core_app'
+
+    def ready(self):
+        import core_app.signals  # Import signals
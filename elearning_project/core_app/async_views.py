@@ -0,0 +1,76 @@
+"""
+Async-native DRF views for ASGI deployments.
+
+DRF's APIView is sync, so under ASGI Django runs each request through it in a
+thread (sync_to_async). AsyncAPIView keeps the request on the event loop: its
+handlers are coroutines reading through the async ORM (aget, aexists,
+``async for``) and awaiting independent lookups together with
+asyncio.gather. What DRF only has in sync form still goes to a thread, once
+per request each: the authentication, permission and throttle checks before
+the handler, and serializers whose fields run queries (``serialize``).
+
+Django runs the async ORM's queries in the request's database thread, one
+after another: gathering saves the round trips through the event loop
+between them rather than running SQL in parallel.
+
+URLs choose between the sync and the async view with read_view(): the async
+one when ASYNC_VIEWS['ENABLED'] (set by asgi.py), the sync one otherwise, as
+an async view under WSGI gets an event loop of its own on every request.
+
+    path('courses/<int:pk>/detail/', read_view(CourseDetailView, AsyncCourseDetailView)),
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.views import APIView
+
+DEFAULT_ASYNC_VIEWS = {
+    'ENABLED': False,
+}
+
+
+def async_views_settings():
+    return {**DEFAULT_ASYNC_VIEWS, **getattr(settings, 'ASYNC_VIEWS', {})}
+
+
+def read_view(sync_view, async_view, **initkwargs):
+    """The view function of a URL that has a sync and an async implementation"""
+    view = async_view if async_views_settings()['ENABLED'] else sync_view
+    return view.as_view(**initkwargs)
+
+
+async def serialize(serializer):
+    """``serializer.data``, in a thread: fields may query lazily"""
+    return await sync_to_async(lambda: serializer.data)()
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines (sync handlers, such as the
+    inherited ``options``, are called as they are).
+    """
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, '__await__'):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,149 @@
+"""
+Batch endpoint: several API reads in one round trip.
+
+    POST /api/batch/
+    {"requests": [
+        {"id": "access", "path": "/api/courses/1/check-access/"},
+        {"id": "content", "path": "/api/courses/1/content/", "headers": {"If-None-Match": "\\"c1-5\\""}},
+        {"id": "progress", "path": "/api/courses/1/progress/"}
+    ]}
+
+    {"responses": [
+        {"id": "access", "status": 200, "headers": {}, "body": {...}},
+        {"id": "content", "status": 304, "headers": {"ETag": "\\"c1-5\\""}, "body": null},
+        ...
+    ]}
+
+Sub-requests are GETs of API paths, run one after another in this process
+with the user the batch request authenticated (no token lookup per
+sub-request) and under one identity map of BATCH['IDENTITY_MAP_MODELS']
+(core_app.identity): the course and enrollment every lesson-page call looks
+up are read once. A failing sub-request gets its own error status; the
+batch itself answers 200.
+"""
+import io
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+
+from .identity import identity_map
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH = {
+    'MAX_REQUESTS': 20,
+    'PATH_PREFIX': '/api/',
+    'METHODS': ['GET', 'HEAD'],
+    'IDENTITY_MAP_MODELS': [],
+    # response headers passed on per sub-request
+    'RESPONSE_HEADERS': ['ETag', 'Last-Modified', 'Cache-Control', 'Location'],
+}
+
+# request headers of the batch that are not inherited by its sub-requests
+_BATCH_ONLY_META = {'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE'}
+
+
+def batch_settings():
+    return {**DEFAULT_BATCH, **getattr(settings, 'BATCH', {})}
+
+
+class BatchError(ValueError):
+    """A malformed batch; the message is returned to the client"""
+
+
+def parse_batch(data, config):
+    """The list of sub-requests of the batch body, validated"""
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BatchError("'requests' must be a non-empty list.")
+    if len(items) > config['MAX_REQUESTS']:
+        raise BatchError(f"At most {config['MAX_REQUESTS']} requests per batch.")
+
+    batch_path = config['PATH_PREFIX'] + 'batch/'
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f"Request {index}: 'path' is required.")
+        method = str(item.get('method', 'GET')).upper()
+        if method not in config['METHODS']:
+            raise BatchError(f"Request {index}: method must be one of {', '.join(config['METHODS'])}.")
+        if not item['path'].startswith(config['PATH_PREFIX']) or item['path'].startswith(batch_path):
+            raise BatchError(f"Request {index}: path must be an API path under {config['PATH_PREFIX']}.")
+        if not isinstance(item.get('headers', {}), dict):
+            raise BatchError(f"Request {index}: 'headers' must be an object.")
+    return items
+
+
+def sub_request(request, method, path, headers):
+    """A request for ``path`` carrying the batch's headers and user (``request`` is the DRF Request)"""
+    path, _, query_string = path.partition('?')
+    environ = {key: value for key, value in request.META.items() if key not in _BATCH_ONLY_META}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': query_string,
+        'CONTENT_LENGTH': '0',
+        'wsgi.input': io.BytesIO(),
+    })
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = str(value)
+    sub = WSGIRequest(environ)
+    # DRF authenticates the sub-request as the batch's user without another lookup
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def run_sub_request(sub):
+    try:
+        match = resolve(sub.path_info)
+    except Resolver404:
+        return Response({"error": "Not found"}, status=404)
+    response = match.func(sub, *match.args, **match.kwargs)
+    if hasattr(response, '__await__'):
+        # an async view (ASYNC_VIEWS): the batch view runs in a thread
+        response = async_to_sync(_await)(response)
+    return response
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def response_entry(item, response, config):
+    entry = {'status': response.status_code}
+    if 'id' in item:
+        entry = {'id': item['id'], **entry}
+    entry['headers'] = {name: response[name] for name in config['RESPONSE_HEADERS'] if response.has_header(name)}
+    if response.status_code == 304 or item.get('method', 'GET').upper() == 'HEAD':
+        entry['body'] = None
+    elif hasattr(response, 'data'):
+        entry['body'] = response.data
+    elif response.streaming and response.get('Content-Type', '').startswith('application/json'):
+        # a streamed list (core_app.renderers.StreamingListMixin)
+        entry['body'] = json.loads(b''.join(response.streaming_content))
+    else:
+        entry['body'] = None  # not a DRF response (file or stream): fetch it directly
+    return entry
+
+
+def run_batch(request, items, config=None):
+    """Run the sub-requests and return their response entries, in order"""
+    config = config or batch_settings()
+    entries = []
+    with identity_map(config['IDENTITY_MAP_MODELS']):
+        for item in items:
+            method = str(item.get('method', 'GET')).upper()
+            sub = sub_request(request, method, item['path'], item.get('headers', {}))
+            try:
+                response = run_sub_request(sub)
+            except Exception:
+                logger.exception("Batch sub-request %s %s failed", method, item['path'])
+                response = Response({"error": "Internal server error"}, status=500)
+            entries.append(response_entry(item, response, config))
+    return entries
@@ -0,0 +1,401 @@
+"""
+Two-tier cache.
+
+L1 is a small in-process LRU, L2 a shared Django cache backend (CACHE_LAYER
+['L2_ALIAS']). Lookups go L1 -> L2 -> compute, and every key belongs to a
+namespace with its own TTLs (CACHE_LAYER['NAMESPACES']).
+
+Stampede protection:
+- single flight: only one thread per process, and only one process (a lock
+  key in L2) recomputes a missing key; the others wait for its result.
+- early probabilistic refresh ("XFetch"): shortly before an L2 entry
+  expires, a caller is picked with rising probability to recompute it while
+  everyone else keeps getting the cached value, so hot keys never expire
+  for all workers at once.
+
+Namespaces are invalidated as a whole by bumping a generation number kept in
+L2 that is part of every key. Invalidations are also published on the
+invalidation bus (core_app.invalidation) so the other workers drop their L1
+copies right away instead of after their L1 TTL. Inside a transaction the
+bump waits for the commit (core_app.transactions): before that, a concurrent
+request would cache the old data under the new generation.
+
+    @cached('course', key=lambda course_id: course_id)
+    def course_outline(course_id): ...
+
+    class CourseListView(generics.ListAPIView):
+        @cache_response('catalog')
+        def get(self, request, *args, **kwargs): ...
+"""
+import functools
+import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.response import Response
+
+from monitoring_app import metrics
+from . import invalidation
+from .transactions import commit_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_LAYER = {
+    'L2_ALIAS': 'default',
+    'L1_MAX_ENTRIES': 2000,
+    'DEFAULT_TTL': 300,         # L2 seconds
+    'DEFAULT_L1_TTL': 10,       # L1 seconds, short: other workers may invalidate L2
+    'GENERATION_CHECK': 1.0,    # seconds a namespace generation is trusted locally
+    'EARLY_REFRESH_BETA': 1.0,  # > 1 refreshes earlier, 0 disables early refresh
+    'LOCK_TIMEOUT': 30,         # seconds a recompute lock is held at most
+    'LOCK_WAIT': 5,             # seconds to wait for another worker's recompute
+    'NAMESPACES': {},           # name -> {'ttl': ..., 'l1_ttl': ...}
+}
+
+_MISSING = object()
+
+
+def cache_layer_settings():
+    return {**DEFAULT_CACHE_LAYER, **getattr(settings, 'CACHE_LAYER', {})}
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+        self.error = None
+
+
+class TwoTierCache:
+    def __init__(self):
+        config = cache_layer_settings()
+        self.l1 = LRUCache(config['L1_MAX_ENTRIES'])
+        self._generations = {}
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    @property
+    def l2(self):
+        return caches[cache_layer_settings()['L2_ALIAS']]
+
+    def namespace_config(self, namespace):
+        config = cache_layer_settings()
+        options = config['NAMESPACES'].get(namespace, {})
+        ttl = options.get('ttl', config['DEFAULT_TTL'])
+        return ttl, min(ttl, options.get('l1_ttl', config['DEFAULT_L1_TTL']))
+
+    # Namespace generations
+
+    def generation(self, namespace):
+        cached = self._generations.get(namespace)
+        if cached is not None and time.monotonic() - cached[1] < cache_layer_settings()['GENERATION_CHECK']:
+            return cached[0]
+        try:
+            generation = self.l2.get(f"cache-gen:{namespace}", 0)
+        except Exception:
+            logger.exception("Cache L2 unavailable")
+            generation = cached[0] if cached else 0
+        self._generations[namespace] = (generation, time.monotonic())
+        return generation
+
+    def invalidate_namespace(self, namespace, using=DEFAULT_DB_ALIAS):
+        """
+        Drop every key of the namespace, in every worker; inside a transaction
+        of ``using``, once it commits (and once per namespace).
+        """
+        batch = commit_batch(f'cache-invalidate:{id(self)}', self._invalidate_namespaces, using)
+        if batch is None:
+            self._invalidate_namespaces([namespace])
+        else:
+            batch.append(namespace)
+
+    def _invalidate_namespaces(self, namespaces):
+        for namespace in sorted(set(namespaces)):
+            key = f"cache-gen:{namespace}"
+            try:
+                self.l2.add(key, 0, None)
+                generation = self.l2.incr(key)
+            except Exception:
+                logger.exception("Cache L2 unavailable")
+                generation = self.generation(namespace) + 1
+            invalidation.publish(namespace)
+            self._generations[namespace] = (generation, time.monotonic())
+
+    def evict_local(self, namespace, key=''):
+        """Invalidation bus handler: forget this worker's copies, L2 was already updated by the publisher"""
+        if key:
+            self.l1.delete(self.make_key(namespace, key))
+        else:
+            self._generations.pop(namespace, None)
+            self.l1.delete_prefix(f"{namespace}:")
+
+    def make_key(self, namespace, key):
+        return f"{namespace}:{self.generation(namespace)}:{key}"
+
+    # Reads and writes
+
+    def get_or_set(self, namespace, key, compute, ttl=None):
+        """Cached value of ``compute()`` for (namespace, key), computed at most once at a time"""
+        full_key = self.make_key(namespace, key)
+        value = self.l1.get(full_key)
+        if value is not _MISSING:
+            metrics.record_cache(namespace, True)
+            return value
+
+        namespace_ttl, l1_ttl = self.namespace_config(namespace)
+        ttl = ttl or namespace_ttl
+        entry = self._l2_get(full_key)
+        if entry is not None:
+            value, expires, delta = entry
+            if not self._refresh_early(expires, delta):
+                self.l1.set(full_key, value, min(l1_ttl, max(0, expires - time.time())))
+                metrics.record_cache(namespace, True)
+                return value
+            stale = value
+        else:
+            stale = _MISSING
+
+        metrics.record_cache(namespace, False)
+        return self._single_flight(full_key, compute, ttl, l1_ttl, stale)
+
+    def peek(self, namespace, key):
+        """
+        The L1 copy of (namespace, key), or _MISSING, without any L2 access: for
+        the event loop of async views, which go through get_or_set() in a
+        thread when this misses.
+        """
+        cached = self._generations.get(namespace)
+        if cached is None or time.monotonic() - cached[1] >= cache_layer_settings()['GENERATION_CHECK']:
+            return _MISSING
+        value = self.l1.get(f"{namespace}:{cached[0]}:{key}")
+        if value is not _MISSING:
+            metrics.record_cache(namespace, True)
+        return value
+
+    def set(self, namespace, key, value, ttl=None):
+        namespace_ttl, l1_ttl = self.namespace_config(namespace)
+        self._store(self.make_key(namespace, key), value, ttl or namespace_ttl, l1_ttl, 0)
+
+    def delete(self, namespace, key):
+        try:
+            self.l2.delete(self.make_key(namespace, key))
+        except Exception:
+            logger.exception("Cache L2 unavailable")
+        invalidation.publish(namespace, key)
+
+    def _l2_get(self, full_key):
+        try:
+            return self.l2.get(full_key)
+        except Exception:
+            logger.exception("Cache L2 unavailable")
+            return None
+
+    def _refresh_early(self, expires, delta):
+        """XFetch: true with a probability rising as expiry approaches, scaled by recompute time"""
+        beta = cache_layer_settings()['EARLY_REFRESH_BETA']
+        if not beta or not delta:
+            return False
+        return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires
+
+    def _store(self, full_key, value, ttl, l1_ttl, delta):
+        self.l1.set(full_key, value, l1_ttl)
+        try:
+            self.l2.set(full_key, (value, time.time() + ttl, delta), ttl)
+        except Exception:
+            logger.exception("Cache L2 unavailable")
+
+    def _single_flight(self, full_key, compute, ttl, l1_ttl, stale):
+        with self._flights_lock:
+            flight = self._flights.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[full_key] = _Flight()
+
+        if not leader:
+            if stale is not _MISSING:
+                return stale
+            flight.done.wait(cache_layer_settings()['LOCK_TIMEOUT'])
+            if flight.value is not _MISSING:
+                return flight.value
+            # the leader failed or timed out: nothing to share
+            return compute()
+
+        try:
+            flight.value = self._compute_across_workers(full_key, compute, ttl, l1_ttl, stale)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self._flights_lock:
+                self._flights.pop(full_key, None)
+
+    def _compute_across_workers(self, full_key, compute, ttl, l1_ttl, stale):
+        config = cache_layer_settings()
+        lock_key = f"cache-lock:{full_key}"
+        try:
+            locked = self.l2.add(lock_key, 1, config['LOCK_TIMEOUT'])
+        except Exception:
+            locked = True  # no L2, no coordination
+
+        if not locked:
+            # another worker is recomputing: serve the stale value or wait for its result
+            if stale is not _MISSING:
+                return stale
+            deadline = time.monotonic() + config['LOCK_WAIT']
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = self._l2_get(full_key)
+                if entry is not None:
+                    self.l1.set(full_key, entry[0], l1_ttl)
+                    return entry[0]
+
+        try:
+            start = time.perf_counter()
+            value = compute()
+            self._store(full_key, value, ttl, l1_ttl, time.perf_counter() - start)
+            return value
+        finally:
+            if locked:
+                try:
+                    self.l2.delete(lock_key)
+                except Exception:
+                    pass
+
+
+cache_layer = TwoTierCache()
+invalidation.subscribe(invalidation.ALL, cache_layer.evict_local)
+
+
+def cached(namespace, key=None, ttl=None):
+    """
+    Cache a function's return value. ``key`` gets the same arguments as the
+    function and returns the cache key; by default all arguments are joined.
+    For methods, pass a ``key`` that ignores ``self``:
+
+        @cached('course-stats', key=lambda self, obj: obj.pk)
+        def get_enrollment_count(self, obj): ...
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                cache_key = key(*args, **kwargs)
+            else:
+                cache_key = ':'.join([func.__qualname__, *map(str, args), *(f"{k}={v}" for k, v in sorted(kwargs.items()))])
+            return cache_layer.get_or_set(namespace, cache_key, lambda: func(*args, **kwargs), ttl)
+        wrapper.invalidate = lambda: cache_layer.invalidate_namespace(namespace)
+        return wrapper
+    return decorator
+
+
+def cache_response(namespace, key=None, ttl=None, per_user=False):
+    """
+    Cache the data of successful GET responses of an APIView handler. The key
+    is the full path (with query string) unless ``key(request, *args, **kwargs)``
+    is given; ``per_user`` adds the user id for responses that depend on it.
+    """
+    def decorator(method):
+        def cache_key_of(request, *args, **kwargs):
+            cache_key = key(request, *args, **kwargs) if key else request.get_full_path()
+            if per_user:
+                cache_key = f"{cache_key}:u{request.user.pk or 0}"
+            return cache_key
+
+        if iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                if request.method != 'GET':
+                    return await method(self, request, *args, **kwargs)
+                cache_key = cache_key_of(request, *args, **kwargs)
+                data = cache_layer.peek(namespace, cache_key)
+                if data is not _MISSING:
+                    return Response(data)
+
+                async def compute():
+                    response = await method(self, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        raise _Uncacheable(response)
+                    return response.data
+
+                # L2, single flight and locks are sync: the handler runs back on the event loop
+                try:
+                    data = await sync_to_async(cache_layer.get_or_set)(namespace, cache_key, async_to_sync(compute), ttl)
+                except _Uncacheable as e:
+                    return e.response
+                return Response(data)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return method(self, request, *args, **kwargs)
+            cache_key = cache_key_of(request, *args, **kwargs)
+
+            def compute():
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise _Uncacheable(response)
+                return response.data
+
+            try:
+                data = cache_layer.get_or_set(namespace, cache_key, compute, ttl)
+            except _Uncacheable as e:
+                return e.response
+            return Response(data)
+        return wrapper
+    return decorator
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
@@ -0,0 +1,59 @@
+"""
+Which model columns a serializer reads, for ``.only()`` (see
+core_app.fieldsets.ColumnPruningMixin).
+
+Model fields and dotted sources name their columns directly. Everything else
+(SerializerMethodFields, model properties, ``source='*'``) must state the
+columns it reads in the serializer's Meta:
+
+    field_columns = {'current_price': ['price', 'has_discount', ...], 'rating': []}
+
+A field that is neither makes the serializer unprunable: serializer_columns()
+returns None and the queryset keeps all its columns, since a deferred column
+that is read anyway costs one extra query per row. Related managers and
+annotations read no column of the instance, so they are declared as [].
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def source_columns(model, name):
+    """Columns loaded for the model field ``name``, or None if it is not a field"""
+    if name == 'pk':
+        return set()
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if field.many_to_many or not field.concrete:
+        return set()  # reverse relations and many-to-many are queried by primary key
+    return {field.attname}
+
+
+def serializer_columns(serializer):
+    """
+    Column names (attnames) ``serializer`` reads from its model instances, or
+    None when that cannot be told reliably.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    meta = getattr(serializer, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return None
+    declared = getattr(meta, 'field_columns', {})
+
+    columns = {model._meta.pk.attname}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in declared:
+            read = set(declared[name])
+        elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            read = None
+        else:
+            read = source_columns(model, field.source.split('.')[0])
+        if read is None:
+            return None
+        columns.update(read)
+    return columns
@@ -0,0 +1,120 @@
+"""
+Conditional GET for DRF views.
+
+    @conditional_get(lambda view, request, pk: course_validators(pk, request.user))
+    def get(self, request, pk): ...
+
+The validators function returns ``(etag_parts, last_modified)`` for the
+resource (or None to skip). ``last_modified`` may be None, and must be when
+some of the parts can change without moving it (per-user state): a client
+sending only If-Modified-Since would get a 304 for a changed response. It runs after authentication and permission checks
+but before the handler, so a matching If-None-Match / If-Modified-Since answers
+304 without any serialization. The strong ETag is a hash of the parts plus the
+host and full path (responses contain absolute URLs and honour query params).
+
+Views that decide access per object pass ``access``: it runs before the
+validators are compared, so a client that lost access gets its 403 / 404 even
+with a matching ETag. It returns None to go on or the response to send (or
+raises, as DRF handlers may); what it loads can be kept on the view for the
+handler. ``object_access`` does this for generic retrieve views.
+"""
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, parts):
+    digest = hashlib.sha1(repr((request.get_host(), request.get_full_path(), *parts)).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def conditional_get(validators, private=True, access=None):
+    """
+    ``private`` marks per-user responses: they get ``Cache-Control: private``
+    and vary on the credentials, so shared caches never hand them to others.
+    On a coroutine handler (core_app.async_views) ``validators`` and
+    ``access`` are coroutine functions too.
+    """
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await method(self, request, *args, **kwargs)
+                if access is not None:
+                    denied = await access(self, request, *args, **kwargs)
+                    if denied is not None:
+                        return denied
+                result = await validators(self, request, *args, **kwargs)
+                if result is None:
+                    return await method(self, request, *args, **kwargs)
+
+                etag, timestamp, response = _conditional_response(request, result)
+                if response is None:
+                    response = await method(self, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                return _add_validators(response, etag, timestamp, private)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return method(self, request, *args, **kwargs)
+            if access is not None:
+                denied = access(self, request, *args, **kwargs)
+                if denied is not None:
+                    return denied
+            result = validators(self, request, *args, **kwargs)
+            if result is None:
+                return method(self, request, *args, **kwargs)
+
+            etag, timestamp, response = _conditional_response(request, result)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return _add_validators(response, etag, timestamp, private)
+        return wrapper
+    return decorator
+
+
+def object_access(view, request, *args, **kwargs):
+    """``access`` of generic views: get_object() raises their 404 / 403 and keeps the object (see ObjectAccessMixin)"""
+    view.get_object()
+
+
+async def aobject_access(view, request, *args, **kwargs):
+    await sync_to_async(view.get_object)()
+
+
+class ObjectAccessMixin:
+    """Generic views using object_access: the object it loaded is the one retrieve() serializes"""
+
+    def get_object(self):
+        if getattr(self, '_access_object', None) is None:
+            self._access_object = super().get_object()
+        return self._access_object
+
+
+def _conditional_response(request, result):
+    """The ETag and timestamp of ``result``, and the 304/412 response if they match the request"""
+    parts, last_modified = result
+    etag = make_etag(request, parts)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, timestamp, get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def _add_validators(response, etag, timestamp, private):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    if private:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
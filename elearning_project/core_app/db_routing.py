@@ -0,0 +1,199 @@
+"""
+Primary/replica database routing.
+
+ReplicaRoutingMiddleware marks every request: safe methods (GET, HEAD,
+OPTIONS) may read from one of DATABASE_ROUTING['REPLICAS'], everything else
+uses ``default``. The router reads that mark from a context variable, so code
+running outside a request (management commands, background jobs) always uses
+the primary.
+
+A client that wrote recently is pinned to the primary for STICKY_SECONDS so
+it reads its own writes: through a cookie, and for authenticated users also
+through a cache entry, since API clients do not always keep cookies.
+"""
+import contextvars
+import itertools
+import random
+import time
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+
+from .middleware import HybridMiddleware
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+DEFAULT_DATABASE_ROUTING = {
+    'REPLICAS': [],
+    'SELECTOR': 'core_app.db_routing.random_replica',
+    'STICKY_SECONDS': 10,
+    'COOKIE_NAME': 'db_primary_until',
+}
+
+_route = contextvars.ContextVar('db_route', default=None)
+
+
+def routing_settings():
+    return {**DEFAULT_DATABASE_ROUTING, **getattr(settings, 'DATABASE_ROUTING', {})}
+
+
+# Replica selectors: called once per request with the replica aliases and the
+# request, return the alias to read from. Point DATABASE_ROUTING['SELECTOR'] at
+# any callable with the same signature to plug in another strategy.
+
+def random_replica(replicas, request):
+    return random.choice(replicas)
+
+
+_next_replica = itertools.count()
+
+
+def round_robin_replica(replicas, request):
+    return replicas[next(_next_replica) % len(replicas)]
+
+
+def client_hash_replica(replicas, request):
+    """Same client, same replica: a user never sees data go back in time between replicas"""
+    user = _resolved_user(request)
+    key = str(user.pk) if user is not None else request.META.get('REMOTE_ADDR', '')
+    return replicas[zlib.crc32(key.encode()) % len(replicas)]
+
+
+def _resolved_user(request):
+    """
+    The authenticated user if authentication already happened. The lazy
+    request.user is never evaluated here: doing so would run a query from
+    inside the router.
+    """
+    user = request.__dict__.get('user')
+    if user is None or (isinstance(user, LazyObject) and user._wrapped is empty):
+        return None
+    return user if user.is_authenticated else None
+
+
+def _pin_key(user_id):
+    return f"db-primary-pin:{user_id}"
+
+
+class RequestRoute:
+    """Routing state of one request; the replica is chosen on the first read"""
+
+    def __init__(self, request, replicas, use_replica, selector):
+        self.request = request
+        self.replicas = replicas
+        self.use_replica = use_replica and bool(replicas)
+        self.selector = selector
+        self.wrote = False
+        self._alias = None
+        self._user_checked = False
+
+    def read_alias(self):
+        if self.use_replica and not self._user_checked:
+            user = _resolved_user(self.request)
+            if user is not None:
+                # set first: a database cache backend routes through here as well
+                self._user_checked = True
+                if (cache.get(_pin_key(user.pk)) or 0) > time.time():
+                    self.use_replica = False
+        if not self.use_replica:
+            return None
+        if self._alias is None:
+            self._alias = self.selector(self.replicas, self.request)
+        return self._alias
+
+    def record_write(self):
+        self.wrote = True
+        self.use_replica = False
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        if route is None:
+            return None
+        # inside a transaction, reads must see its uncommitted writes
+        if connections['default'].in_atomic_block:
+            return 'default'
+        return route.read_alias()
+
+    def db_for_write(self, model, **hints):
+        route = _route.get()
+        if route is not None:
+            route.record_write()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in routing_settings()['REPLICAS']
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Sends reads of safe-method requests to a replica unless the client wrote
+    within the last STICKY_SECONDS, and pins the client to the primary after
+    every write.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = routing_settings()
+        if not config['REPLICAS']:
+            return self.get_response(request)
+
+        safe, route = self._route(request, config)
+        token = _route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+
+        if route.wrote or (not safe and response.status_code < 400):
+            self._pin(request, response, config)
+        return response
+
+    async def __acall__(self, request):
+        config = routing_settings()
+        if not config['REPLICAS']:
+            return await self.get_response(request)
+
+        # the context variable is copied into the threads running the async ORM
+        safe, route = self._route(request, config)
+        token = _route.set(route)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _route.reset(token)
+
+        if route.wrote or (not safe and response.status_code < 400):
+            await sync_to_async(self._pin)(request, response, config)
+        return response
+
+    def _route(self, request, config):
+        safe = request.method in SAFE_METHODS
+        use_replica = safe and not self._pinned_by_cookie(request, config)
+        return safe, RequestRoute(request, list(config['REPLICAS']), use_replica, import_string(config['SELECTOR']))
+
+    def _pinned_by_cookie(self, request, config):
+        try:
+            return float(request.COOKIES.get(config['COOKIE_NAME'], 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _pin(self, request, response, config):
+        seconds = config['STICKY_SECONDS']
+        until = time.time() + seconds
+        response.set_cookie(
+            config['COOKIE_NAME'], f"{until:.0f}", max_age=seconds, httponly=True, samesite='Lax',
+        )
+        user = _resolved_user(request)
+        if user is not None:
+            cache.set(_pin_key(user.pk), until, seconds)
@@ -0,0 +1,270 @@
+"""
+Sparse fieldsets and opt-in expansion for serializers.
+
+    GET /api/courses/1/detail/?fields=id,title,modules.title,modules.lessons.title
+    GET /api/courses/list/?omit=subtitle,created_at
+    GET /api/enrollments/?expand=course
+
+``fields`` keeps only the listed fields, ``omit`` drops fields and ``expand``
+replaces a field by the serializer declared for it in Meta.expandable_fields
+(e.g. a course id by the course). Dotted names reach into nested serializers.
+Dropped fields are never evaluated, so their SerializerMethodFields never run.
+
+DynamicFieldsMixin goes on serializers. SparseFieldsMixin goes on generic
+views: it hands the query parameters of GET requests to the serializer and
+adds to the queryset the select_related / prefetch_related lookups the
+remaining fields read: dotted sources (``instructor.username``), nested and
+expanded serializers, related fields and, for method fields, the lookups
+listed in Meta.related_fields. Method fields that count or look up rows can
+list in Meta.field_annotations a function of the request returning queryset
+annotations, e.g. a subquery counting the students of every course of the
+page; the method reads the annotation when it is there.
+"""
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .columns import serializer_columns
+
+
+def parse_field_tree(value):
+    """'id,modules.title,modules.lessons' -> {'id': {}, 'modules': {'title': {}, 'lessons': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class FieldSpec(namedtuple('FieldSpec', 'fields omit expand')):
+    """Requested fields (None = all), omitted and expanded fields of one serializer, as trees"""
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        return cls(
+            parse_field_tree(params['fields']) if params.get('fields') else None,
+            parse_field_tree(params.get('omit', '')),
+            parse_field_tree(params.get('expand', '')),
+        )
+
+    def child(self, name):
+        """The spec of the nested serializer ``name``"""
+        fields = (self.fields.get(name) or None) if self.fields is not None else None
+        return FieldSpec(fields, self.omit.get(name, {}), self.expand.get(name, {}))
+
+
+ALL_FIELDS = FieldSpec(None, {}, {})
+
+
+def sparse_context(request):
+    """Serializer context of a plain APIView honouring ?fields / ?omit / ?expand"""
+    context = {'request': request}
+    if request.method in SAFE_METHODS:
+        context['field_spec'] = FieldSpec.from_request(request)
+    return context
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin applying the request's FieldSpec. Meta may declare:
+
+        expandable_fields = {'course': ('courses_app.serializers.CourseListSerializer', {})}
+        related_fields = {'instructor_full_name': ['instructor']}
+        field_annotations = {'student_count': student_count_annotations}  # request -> {name: expression}
+    """
+
+    @property
+    def field_spec(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        spec = self.context.get('field_spec', ALL_FIELDS)
+        for name in reversed(names):
+            spec = spec.child(name)
+        return spec
+
+    def nested_context(self, field_name):
+        """Context for a serializer built by hand inside the field ``field_name``"""
+        return {**self.context, 'field_spec': self.field_spec.child(field_name)}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.field_spec
+        for name, (serializer_class, options) in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in spec.expand:
+                if isinstance(serializer_class, str):
+                    serializer_class = import_string(serializer_class)
+                fields[name] = serializer_class(read_only=True, **options)
+        if spec.fields is not None:
+            fields = {name: field for name, field in fields.items() if name in spec.fields}
+        for name, nested in spec.omit.items():
+            if not nested:
+                fields.pop(name, None)
+        return fields
+
+
+def _relation_kind(model, path):
+    """'select' for a chain of forward foreign keys, 'prefetch' for other relations, None otherwise"""
+    kind = 'select'
+    for name in path.split('__'):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation:
+            return None
+        if field.many_to_many or field.one_to_many:
+            kind = 'prefetch'
+        model = field.related_model
+    return kind
+
+
+def related_lookups(serializer, prefix=''):
+    """
+    The select_related lookups read by the serializer's fields, and its
+    prefetch_related lookups mapped to the serializer of the prefetched
+    objects (None when the objects are not serialized, e.g. for counts).
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    meta = getattr(serializer, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return set(), {}
+    related_fields = getattr(meta, 'related_fields', {})
+
+    select, prefetch = set(), {}
+
+    def add(path, nested=None):
+        kind = _relation_kind(model, path)
+        if kind == 'select':
+            select.add(prefix + path)
+        elif kind == 'prefetch' and (nested is not None or prefix + path not in prefetch):
+            prefetch[prefix + path] = nested
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        for lookup in related_fields.get(name, ()):
+            add(lookup)
+        if field.source == '*':
+            continue
+        path = field.source.replace('.', '__')
+        if isinstance(field, serializers.BaseSerializer):
+            kind = _relation_kind(model, path)
+            if kind == 'prefetch':
+                add(path, field)  # its own lookups go on the prefetch queryset
+            elif kind == 'select':
+                add(path)
+                child_select, child_prefetch = related_lookups(field, prefix + path + '__')
+                select |= child_select
+                prefetch.update(child_prefetch)
+        elif isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)):
+            if '__' in path:
+                add(path.rsplit('__', 1)[0])
+            elif _relation_kind(model, path) == 'prefetch':
+                add(path)
+        elif '__' in path:
+            add(path.rsplit('__', 1)[0])
+    return select, prefetch
+
+
+def field_annotations(serializer):
+    """The queryset annotations Meta.field_annotations declares for the remaining fields"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    declared = getattr(getattr(serializer, 'Meta', None), 'field_annotations', {})
+    request = serializer.context.get('request')
+    annotations = {}
+    for name, field in serializer.fields.items():
+        if name in declared and not field.write_only:
+            annotations.update(declared[name](request))
+    return annotations
+
+
+def _prefetch_target(model, path):
+    """The model at the end of ``path`` and the column linking it back, if it has one"""
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    return model, field.field.attname if field.one_to_many else None
+
+
+def optimize_queryset(queryset, serializer, prune=False, keep=()):
+    """
+    Add the select_related / prefetch_related lookups and the annotations of
+    ``serializer`` (after sparse fields) to the queryset. With ``prune``, also restrict it, and the
+    prefetched querysets, to the columns the serializer reads (see
+    core_app.columns); ``keep`` are columns to load regardless.
+    """
+    select, prefetch = related_lookups(serializer)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    annotations = field_annotations(serializer)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    lookups = []
+    for path, nested in sorted(prefetch.items()):
+        if nested is None:
+            lookups.append(path)
+            continue
+        model, link = _prefetch_target(queryset.model, path)
+        nested_queryset = optimize_queryset(model._default_manager.all(), nested, prune, keep=[link] if link else ())
+        lookups.append(Prefetch(path, queryset=nested_queryset))
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    if prune:
+        columns = serializer_columns(serializer)
+        if columns is not None:
+            # select_related cannot traverse a deferred foreign key, including
+            # the ones the view's own queryset follows
+            columns |= {path.split('__')[0] for path in select}
+            if isinstance(queryset.query.select_related, dict):
+                columns |= set(queryset.query.select_related)
+            queryset = queryset.only(*sorted(columns | set(keep)))
+    return queryset
+
+
+class SparseFieldsMixin:
+    """Generic view mixin for serializers using DynamicFieldsMixin"""
+    prune_columns = False
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in SAFE_METHODS:
+            context['field_spec'] = FieldSpec.from_request(self.request)
+        return context
+
+    def filter_queryset(self, queryset):
+        # filter_queryset rather than get_queryset, which views override wholesale
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS:
+            prune = self.prune_columns and self.is_list()
+            keep = ()
+            if prune and self.paginator is not None and hasattr(self.paginator, 'ordering_columns'):
+                keep = self.paginator.ordering_columns(self.request, queryset, self)
+            queryset = optimize_queryset(queryset, self.get_serializer(), prune=prune, keep=keep)
+        return queryset
+
+    def is_list(self):
+        return (self.lookup_url_kwarg or self.lookup_field) not in self.kwargs
+
+
+class ColumnPruningMixin(SparseFieldsMixin):
+    """
+    SparseFieldsMixin that also loads only the columns the serializer reads
+    when listing, e.g. no Course.description for CourseListSerializer. It
+    leaves the queryset alone when a method field or property does not
+    declare its columns in Meta.field_columns (core_app.columns).
+    """
+    prune_columns = True
@@ -0,0 +1,80 @@
+"""
+Request-scoped identity map.
+
+Inside ``with identity_map(['courses_app.Course', 'courses_app.Enrollment'])``
+querysets of those models (using CachingQuerySet) that load model instances
+are run once per distinct SQL: the same lookup repeated by several views
+(``get_object_or_404(Course, id=...)``, the enrollment of the user in that
+course, ...) is answered from the map. A full row loaded twice, by different
+queries, comes back as the same instance.
+
+Any INSERT, UPDATE or DELETE while the map is active empties it (see
+core_app.querycache.track_writes), so a lookup never returns a row older than
+the last write. The batch endpoint (core_app.batch) runs its sub-requests
+under one map.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.query import ModelIterable
+
+_identity_map = ContextVar('identity_map', default=None)
+
+
+class IdentityMap:
+    def __init__(self, models):
+        self.models = frozenset(models)
+        self._results = {}
+        self._instances = {}
+        self.hits = 0
+
+    def handles(self, queryset):
+        return (
+            queryset.model._meta.label in self.models
+            and queryset._iterable_class is ModelIterable
+            and not queryset.query.select_for_update
+        )
+
+    def fetch(self, queryset, load):
+        """The instances of ``queryset``, loaded with ``load()`` the first time its SQL is seen"""
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except Exception:
+            return load()  # EmptyResultSet and friends
+        key = (queryset.db, sql, params)
+        if key in self._results:
+            self.hits += 1
+            return list(self._results[key])
+        instances = load()
+        if self._full_rows(queryset):
+            instances = [self._instances.setdefault((type(obj), obj.pk), obj) for obj in instances]
+        self._results[key] = instances
+        return list(instances)
+
+    def clear(self):
+        self._results.clear()
+        self._instances.clear()
+
+    def _full_rows(self, queryset):
+        """Plain rows: every column, nothing annotated, joined or prefetched onto the instances"""
+        query = queryset.query
+        return (
+            query.deferred_loading == (frozenset(), True)
+            and not query.annotation_select
+            and not query.extra_select
+            and not query.select_related
+            and not queryset._prefetch_related_lookups
+        )
+
+
+def current_identity_map():
+    return _identity_map.get()
+
+
+@contextmanager
+def identity_map(models):
+    token = _identity_map.set(IdentityMap(models))
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
@@ -0,0 +1,188 @@
+"""
+Cross-worker invalidation bus.
+
+In-process caches (the L1 of core_app.cache and anything else that
+subscribes) are only correct in the worker that made a change. publish()
+applies an invalidation to the local subscribers at once and, after the
+transaction commits, stores it as an InvalidationEvent row. Every worker polls
+that table (at most every POLL_INTERVAL seconds, from InvalidationMiddleware)
+and hands new events to its subscribers, so other workers evict their copies
+within about POLL_INTERVAL seconds of the commit.
+
+Ids are allocated at insert but become visible at commit, so an event can
+show up below an id a worker already read. Polls therefore read the rows
+above the highest id seen plus every row created in the last OVERLAP
+seconds, and skip the ids already applied.
+
+    subscribe('entitlements', lambda namespace, key: local_entitlements.pop(key, None))
+    publish('entitlements', f"{user_id}:{course_id}")
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .middleware import HybridMiddleware
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVALIDATION_BUS = {
+    'ENABLED': True,
+    'DATABASE': 'default',   # always the primary, a replica may lag behind
+    'POLL_INTERVAL': 1.0,
+    'BATCH_SIZE': 1000,
+    'OVERLAP': 10,           # seconds re-read for late commits (and clock skew)
+    'RETENTION': 3600,       # seconds events are kept
+    'PRUNE_PROBABILITY': 0.01,
+}
+
+ALL = '*'
+
+
+def bus_settings():
+    return {**DEFAULT_INVALIDATION_BUS, **getattr(settings, 'INVALIDATION_BUS', {})}
+
+
+class InvalidationBus:
+    def __init__(self):
+        self._handlers = defaultdict(list)
+        self._lock = threading.Lock()
+        self._high_water = None
+        self._applied = {}   # id -> created_at of the events inside the overlap window
+        self._last_poll = 0.0
+        self._origin = None
+        self._origin_pid = None
+
+    @property
+    def origin(self):
+        # per process, and recomputed after a fork so preloaded workers differ
+        if self._origin_pid != os.getpid():
+            self._origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+            self._origin_pid = os.getpid()
+        return self._origin
+
+    def subscribe(self, namespace, handler):
+        """``handler(namespace, key)`` runs for every event of the namespace ('*' for all); key '' = everything"""
+        self._handlers[namespace].append(handler)
+
+    def publish(self, namespace, key=''):
+        key = str(key)
+        self._dispatch(namespace, key)
+        config = bus_settings()
+        if not config['ENABLED']:
+            return
+        transaction.on_commit(lambda: self._store(namespace, key, config), using=config['DATABASE'])
+
+    def poll_due(self):
+        config = bus_settings()
+        return config['ENABLED'] and time.monotonic() - self._last_poll >= config['POLL_INTERVAL']
+
+    def poll(self, force=False):
+        """Apply events published by other workers since the last poll; returns how many were applied"""
+        config = bus_settings()
+        if not config['ENABLED']:
+            return 0
+        if not force and not self.poll_due():
+            return 0
+        if not self._lock.acquire(blocking=False):
+            return 0  # another thread of this worker is polling
+        try:
+            self._last_poll = time.monotonic()
+            return self._poll(config)
+        except Exception:
+            logger.exception("Polling invalidation events failed")
+            return 0
+        finally:
+            self._lock.release()
+
+    def _poll(self, config):
+        from .models import InvalidationEvent
+
+        events = InvalidationEvent.objects.using(config['DATABASE'])
+        window = timezone.now() - timedelta(seconds=config['OVERLAP'])
+        if self._high_water is None:
+            # a fresh worker has nothing cached yet: start from the current end
+            self._high_water = events.aggregate(top=Max('id'))['top'] or 0
+            self._applied = dict(events.filter(created_at__gte=window).values_list('id', 'created_at'))
+            return 0
+
+        applied, after = 0, 0
+        pending = events.filter(Q(id__gt=self._high_water) | Q(created_at__gte=window)).order_by('id')
+        while True:
+            batch = list(
+                pending.filter(id__gt=after)
+                .values_list('id', 'namespace', 'key', 'origin', 'created_at')[:config['BATCH_SIZE']]
+            )
+            seen = set()
+            for event_id, namespace, key, origin, created_at in batch:
+                if event_id in self._applied:
+                    continue
+                self._applied[event_id] = created_at
+                self._high_water = max(self._high_water, event_id)
+                if origin != self.origin and (namespace, key) not in seen:
+                    seen.add((namespace, key))
+                    self._dispatch(namespace, key)
+                    applied += 1
+            if len(batch) < config['BATCH_SIZE']:
+                break
+            after = batch[-1][0]
+        # older ids are at most the high-water mark and out of the window: never read again
+        self._applied = {event_id: created_at for event_id, created_at in self._applied.items() if created_at >= window}
+        return applied
+
+    def _dispatch(self, namespace, key):
+        for handler in self._handlers.get(namespace, []) + self._handlers.get(ALL, []):
+            try:
+                handler(namespace, key)
+            except Exception:
+                logger.exception("Invalidation handler failed for %s:%s", namespace, key)
+
+    def _store(self, namespace, key, config):
+        from .models import InvalidationEvent
+
+        try:
+            InvalidationEvent.objects.using(config['DATABASE']).create(
+                namespace=namespace, key=key[:255], origin=self.origin,
+            )
+            if random.random() < config['PRUNE_PROBABILITY']:
+                self.prune(config)
+        except Exception:
+            logger.exception("Could not publish invalidation %s:%s", namespace, key)
+
+    def prune(self, config=None):
+        from .models import InvalidationEvent
+
+        config = config or bus_settings()
+        cutoff = timezone.now() - timedelta(seconds=config['RETENTION'])
+        return InvalidationEvent.objects.using(config['DATABASE']).filter(created_at__lt=cutoff).delete()[0]
+
+
+bus = InvalidationBus()
+subscribe = bus.subscribe
+publish = bus.publish
+
+
+class InvalidationMiddleware(HybridMiddleware):
+    """Applies other workers' invalidations before the request reads any cache"""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        bus.poll()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if bus.poll_due():
+            await sync_to_async(bus.poll)()
+        return await self.get_response(request)
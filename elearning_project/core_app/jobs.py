@@ -0,0 +1,317 @@
+"""
+Durable background jobs backed by the database (no broker).
+
+Tasks are functions registered with the ``task`` decorator; ``enqueue``
+stores a Job row (core_app.models.Job) and returns it at once, a worker runs
+it later:
+
+    @task(bind=True)
+    def clone_course_job(job, course_id, instructor_id):
+        ...
+        job.set_progress(stage='lessons', done=10, total=50)
+        return {'new_course_id': new_course.id}
+
+    job = clone_course_job.enqueue(course.id, request.user.id, owner=request.user)
+
+Arguments and return values go through JSON. A task that raises is retried
+with exponential backoff (RETRY_DELAY, 2 x RETRY_DELAY, ... up to
+MAX_RETRY_DELAY) until it has run ``max_attempts`` times. ``periodic_task``
+registers a task that the workers schedule themselves every ``every``
+seconds.
+
+Workers are ``manage.py run_jobs`` processes (a thread pool each,
+``--processes`` for several) that look for due jobs every POLL_INTERVAL
+seconds. With JOB_QUEUE['IN_PROCESS'], every web process also runs a worker
+thread, so nothing else has to be started in development. A job is claimed
+by an UPDATE ... WHERE status = 'pending', which only one worker wins; a job
+left running for LEASE seconds (its worker died) goes back to the queue.
+Tasks are found in the ``jobs`` module of every installed app.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .invalidation import bus
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_QUEUE = {
+    'IN_PROCESS': False,        # run a worker thread in every web process
+    'THREADS': 2,               # jobs a worker runs at the same time
+    'POLL_INTERVAL': 1.0,       # seconds between looks for due jobs
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 10,          # seconds before the first retry, doubled for every further one
+    'MAX_RETRY_DELAY': 3600,
+    'LEASE': 3600,              # seconds after which a running job counts as abandoned
+    'RETENTION': 7 * 24 * 3600, # seconds finished jobs are kept
+    'MAINTENANCE_INTERVAL': 10, # seconds between scheduling periodic jobs and cleaning up
+}
+
+registry = {}
+
+
+def job_queue_settings():
+    return {**DEFAULT_JOB_QUEUE, **getattr(settings, 'JOB_QUEUE', {})}
+
+
+class Task:
+    def __init__(self, func, name=None, bind=False, max_attempts=None, every=None):
+        self.func = func
+        self.name = name or f"{func.__module__}.{func.__qualname__}"
+        self.bind = bind
+        self.max_attempts = max_attempts
+        self.every = every
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        """Run the task inline"""
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<Task {self.name}>"
+
+    def enqueue(self, *args, owner=None, **kwargs):
+        """Queue a run with these arguments, due now; returns the Job"""
+        return self.schedule(args, kwargs, owner=owner)
+
+    def schedule(self, args=(), kwargs=None, run_at=None, delay=None, owner=None):
+        """Queue a run due at ``run_at`` (or in ``delay`` seconds); returns the Job"""
+        if run_at is None:
+            run_at = timezone.now() + timedelta(seconds=delay or 0)
+        job = Job.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs or {},
+            owner=owner,
+            run_at=run_at,
+            max_attempts=self.max_attempts or job_queue_settings()['MAX_ATTEMPTS'],
+        )
+        transaction.on_commit(wake_in_process_worker)
+        return job
+
+    def run(self, job):
+        if self.bind:
+            return self.func(job, *job.args, **job.kwargs)
+        return self.func(*job.args, **job.kwargs)
+
+
+def task(func=None, *, name=None, bind=False, max_attempts=None):
+    """
+    Register ``func`` as a background task. With ``bind``, it gets its Job
+    as first argument (for ``job.set_progress``).
+    """
+    def register(func):
+        registered = Task(func, name=name, bind=bind, max_attempts=max_attempts)
+        registry[registered.name] = registered
+        return registered
+    return register(func) if func is not None else register
+
+
+def periodic_task(every, *, name=None, bind=False, max_attempts=None):
+    """Register a task without arguments that workers run every ``every`` seconds"""
+    def register(func):
+        registered = Task(func, name=name, bind=bind, max_attempts=max_attempts, every=every)
+        registry[registered.name] = registered
+        return registered
+    return register
+
+
+def retry_delay(attempts, config=None):
+    """Seconds to wait before the attempt after ``attempts`` failed ones"""
+    config = config or job_queue_settings()
+    return min(config['RETRY_DELAY'] * 2 ** (attempts - 1), config['MAX_RETRY_DELAY'])
+
+
+class Worker:
+    def __init__(self, threads=None, name=None):
+        config = job_queue_settings()
+        self.threads = threads or config['THREADS']
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._next_maintenance = 0.0
+
+    def stop(self):
+        """Stop claiming jobs; run() returns once the running ones are done"""
+        self._stopping.set()
+        self._wake.set()
+
+    def wake(self):
+        """Look for due jobs now instead of at the next poll"""
+        self._wake.set()
+
+    def install_signal_handlers(self):
+        def handle(signum, frame):
+            logger.info("Worker %s stopping after its running jobs", self.name)
+            self.stop()
+
+        signal.signal(signal.SIGINT, handle)
+        signal.signal(signal.SIGTERM, handle)
+
+    def run(self, burst=False):
+        """Run jobs until stop() is called or, with ``burst``, until no job is due"""
+        autodiscover_modules('jobs')
+        running = set()
+        with ThreadPoolExecutor(self.threads, thread_name_prefix='job') as pool:
+            while not self._stopping.is_set():
+                config = job_queue_settings()
+                running = {future for future in running if not future.done()}
+                if len(running) >= self.threads:
+                    wait(running, timeout=config['POLL_INTERVAL'], return_when=FIRST_COMPLETED)
+                    continue
+
+                try:
+                    close_old_connections()
+                    bus.poll()
+                    if time.monotonic() >= self._next_maintenance:
+                        self.maintain(config)
+                        self._next_maintenance = time.monotonic() + config['MAINTENANCE_INTERVAL']
+                    jobs = self.claim(self.threads - len(running))
+                except DatabaseError:
+                    logger.exception("Worker %s could not claim jobs", self.name)
+                    jobs = []
+
+                for job in jobs:
+                    running.add(pool.submit(self.execute, job))
+                if jobs:
+                    continue
+                if burst:
+                    if not running:
+                        break
+                    wait(running, return_when=FIRST_COMPLETED)
+                    continue
+                self._wake.wait(config['POLL_INTERVAL'])
+                self._wake.clear()
+        connections.close_all()
+
+    def claim(self, limit):
+        """Switch up to ``limit`` due jobs to running for this worker and return them"""
+        now = timezone.now()
+        due = list(
+            Job.objects.filter(status=Job.PENDING, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:limit * 2]
+        )
+        claimed = []
+        for job_id in due:
+            if len(claimed) == limit:
+                break
+            won = Job.objects.filter(pk=job_id, status=Job.PENDING).update(
+                status=Job.RUNNING, worker=self.name, started_at=now, attempts=F('attempts') + 1,
+            )
+            if won:
+                claimed.append(job_id)
+        return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'id'))
+
+    def execute(self, job):
+        close_old_connections()
+        try:
+            registered = registry.get(job.name)
+            if registered is None:
+                self.finish(job, Job.FAILED, error=f"Unknown task {job.name!r}")
+                return
+            try:
+                result = registered.run(job)
+            except Exception as e:
+                logger.exception("Job %s (%s) failed, attempt %s of %s", job.pk, job.name, job.attempts, job.max_attempts)
+                self.fail(job, f"{type(e).__name__}: {e}")
+            else:
+                self.finish(job, Job.COMPLETED, result=result)
+        finally:
+            close_old_connections()
+
+    def fail(self, job, error):
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.PENDING, error=error, progress=job.progress,
+                run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+        else:
+            self.finish(job, Job.FAILED, error=error)
+
+    def finish(self, job, status, result=None, error=''):
+        Job.objects.filter(pk=job.pk).update(
+            status=status, result=result, error=error, progress=job.progress, finished_at=timezone.now(),
+        )
+
+    def maintain(self, config):
+        self.schedule_periodic()
+        self.requeue_abandoned(config)
+        cutoff = timezone.now() - timedelta(seconds=config['RETENTION'])
+        Job.objects.filter(status__in=[Job.COMPLETED, Job.FAILED], finished_at__lt=cutoff).delete()
+
+    def schedule_periodic(self):
+        """Queue the next run of every periodic task that has none pending or running"""
+        for registered in registry.values():
+            if registered.every is None:
+                continue
+            runs = Job.objects.filter(name=registered.name, periodic=True)
+            if runs.filter(status__in=[Job.PENDING, Job.RUNNING]).exists():
+                continue
+            last = runs.order_by('-run_at').values_list('run_at', flat=True).first()
+            run_at = timezone.now()
+            if last is not None:
+                run_at = max(run_at, last + timedelta(seconds=registered.every))
+            try:
+                with transaction.atomic():
+                    Job.objects.create(
+                        name=registered.name, periodic=True, run_at=run_at,
+                        max_attempts=registered.max_attempts or job_queue_settings()['MAX_ATTEMPTS'],
+                    )
+            except IntegrityError:
+                pass  # another worker scheduled it
+
+    def requeue_abandoned(self, config):
+        """Jobs whose worker died while running them: retry them, or fail them if out of attempts"""
+        abandoned = Job.objects.filter(
+            status=Job.RUNNING, started_at__lt=timezone.now() - timedelta(seconds=config['LEASE']),
+        )
+        error = "Worker lost while running the job"
+        abandoned.filter(attempts__lt=F('max_attempts')).update(status=Job.PENDING, error=error, run_at=timezone.now())
+        abandoned.update(status=Job.FAILED, error=error, finished_at=timezone.now())
+
+
+def run_worker(threads=None, burst=False):
+    """Run a worker in this process (target of ``run_jobs --processes``)"""
+    global _worker
+    worker = Worker(threads)
+    _worker = worker
+    if threading.current_thread() is threading.main_thread():
+        worker.install_signal_handlers()
+    logger.info("Worker %s started with %s threads", worker.name, worker.threads)
+    worker.run(burst=burst)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def ensure_in_process_worker():
+    """Start this process's worker thread, if JOB_QUEUE['IN_PROCESS'] and not running yet"""
+    global _worker
+    if _worker is not None or not job_queue_settings()['IN_PROCESS']:
+        return _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = Worker()
+            threading.Thread(target=_worker.run, name='job-worker', daemon=True).start()
+    return _worker
+
+
+def wake_in_process_worker():
+    worker = ensure_in_process_worker()
+    if worker is not None:
+        worker.wake()
@@ -0,0 +1,54 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core_app.jobs import job_queue_settings, run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (core_app.jobs) until interrupted. SIGINT / SIGTERM let the running jobs "
+        "finish before exiting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, help="Jobs run at the same time per process (JOB_QUEUE['THREADS'])")
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes, for CPU-bound tasks")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due")
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or job_queue_settings()['THREADS']
+        processes = options['processes']
+        if threads < 1 or processes < 1:
+            raise CommandError("--threads and --processes must be at least 1.")
+
+        self.stdout.write(f"Running jobs with {processes} process(es) x {threads} thread(s)")
+        if processes == 1:
+            run_worker(threads, burst=options['burst'])
+            return
+
+        # children must not share the parent's database connections
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker, args=(threads, options['burst']), name=f"run_jobs-{i}",
+            )
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        def stop(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()  # SIGTERM: each child finishes its running jobs
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        for worker in workers:
+            worker.join()
+        failed = [worker.name for worker in workers if worker.exitcode]
+        if failed:
+            raise CommandError(f"Worker processes exited with an error: {', '.join(failed)}")
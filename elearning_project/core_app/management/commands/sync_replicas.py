@@ -0,0 +1,35 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core_app.db_routing import routing_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into every SQLite replica in DATABASE_ROUTING['REPLICAS']. "
+        "Stands in for replication when testing replica routing locally with two SQLite files."
+    )
+
+    def handle(self, *args, **options):
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError("sync_replicas only works with SQLite; real replicas are kept in sync by the database.")
+        replicas = routing_settings()['REPLICAS']
+        if not replicas:
+            raise CommandError("No replicas configured (DATABASE_ROUTING['REPLICAS']).")
+
+        primary.ensure_connection()
+        for alias in replicas:
+            replica = connections[alias]
+            if replica.vendor != 'sqlite':
+                self.stdout.write(self.style.WARNING(f"Skipping {alias}: not an SQLite database"))
+                continue
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"Copied default -> {alias} ({replica.settings_dict['NAME']})"))
@@ -0,0 +1,21 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+class HybridMiddleware:
+    """
+    Base of middleware that runs natively under WSGI and ASGI. Django only
+    keeps a request async when every middleware is async capable: one sync
+    middleware puts the rest of the chain, the view included, in a thread.
+
+    Subclasses implement ``__call__`` for sync requests, starting with
+    ``if self.async_mode: return self.__acall__(request)``, and the
+    coroutine ``__acall__`` for async ones.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvalidationEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('namespace', models.CharField(max_length=100)),
+                ('key', models.CharField(blank=True, help_text='Empty for the whole namespace', max_length=255)),
+                ('origin', models.CharField(blank=True, help_text='Worker that published the event', max_length=100)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class InvalidationEvent(models.Model):
+    """
+    One cache invalidation, published by the worker that changed the data and
+    applied by every other worker. Workers poll for ids above the highest one
+    they applied and for the rows created in the last INVALIDATION_BUS['OVERLAP']
+    seconds, which catches ids that committed out of order.
+    """
+    id = models.BigAutoField(primary_key=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    namespace = models.CharField(max_length=100)
+    key = models.CharField(max_length=255, blank=True, help_text="Empty for the whole namespace")
+    origin = models.CharField(max_length=100, blank=True, help_text="Worker that published the event")
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.namespace}:{self.key or '*'}"
+
+
+class Job(models.Model):
+    """
+    One run of a background task (core_app.jobs). Workers claim pending jobs
+    whose run_at has come by switching them to running; failed attempts go
+    back to pending with a later run_at until max_attempts is reached.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=200, db_index=True, help_text="Registered task name")
+    args = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    periodic = models.BooleanField(default=False, help_text="Scheduled by the worker, not by a caller")
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+',
+    )
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    worker = models.CharField(max_length=100, blank=True, help_text="Worker running the last attempt")
+    progress = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+        constraints = [
+            # one pending or running job per periodic task, whichever worker schedules it
+            models.UniqueConstraint(
+                fields=['name'],
+                condition=models.Q(periodic=True, status__in=['pending', 'running']),
+                name='core_app_job_one_active_periodic',
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.name} ({self.status})"
+
+    def set_progress(self, **progress):
+        """
+        Record the progress of the running attempt, e.g. ``set_progress(stage='lessons', done=10, total=50)``.
+        It goes to the cache, where others see it even while the task is inside
+        a transaction; the worker saves the last one with the outcome.
+        """
+        self.progress = {**self.progress, **progress}
+        cache.set(self._progress_key(), self.progress, 24 * 3600)
+
+    @property
+    def live_progress(self):
+        if self.status == self.RUNNING:
+            return cache.get(self._progress_key(), self.progress)
+        return self.progress
+
+    def _progress_key(self):
+        return f"job-progress:{self.pk}"
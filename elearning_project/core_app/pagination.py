@@ -0,0 +1,169 @@
+"""
+Cursor pagination for every list endpoint (REST_FRAMEWORK's
+DEFAULT_PAGINATION_CLASS).
+
+    GET /api/enrollments/?page_size=100
+    GET /api/enrollments/?cursor=cD0xMjM%3D
+    GET /api/courses/list/?count=true
+
+Pages are read with ``WHERE (<ordering fields>) < (<position>) ... LIMIT n`` on
+an indexed ordering, so deep pages cost the same as the first one and rows
+inserted while paging never show up twice. A view picks its ordering with
+``cursor_ordering`` (``-pk`` by default); it must end in a unique field. The
+cursor carries the position of every ordering field, not only the first one
+as DRF's does, so rows tied on ``created_at`` split across pages without the
+offset cursors that skip or repeat rows when paging backwards.
+``page_size`` is capped at PAGINATION['MAX_PAGE_SIZE'].
+
+The total count is opt-in (``?count=true``) and comes from the cached counters
+of core_app.querycache.cached_count, not from a COUNT(*) per request.
+"""
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, _reverse_ordering
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .querycache import cached_count
+
+DEFAULT_PAGINATION = {
+    'MAX_PAGE_SIZE': 200,
+    'PAGE_SIZE_QUERY_PARAM': 'page_size',
+    'COUNT_QUERY_PARAM': 'count',
+    'COUNT_TTL': 30,    # counts of tables the query cache does not track
+}
+
+_TRUE = {'1', 'true', 'yes', 'on'}
+
+
+def pagination_settings():
+    return {**DEFAULT_PAGINATION, **getattr(settings, 'PAGINATION', {})}
+
+
+class CursorPagination(pagination.CursorPagination):
+    ordering = '-pk'
+
+    @property
+    def page_size_query_param(self):
+        return pagination_settings()['PAGE_SIZE_QUERY_PARAM']
+
+    @property
+    def max_page_size(self):
+        return pagination_settings()['MAX_PAGE_SIZE']
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is not None:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def ordering_columns(self, request, queryset, view):
+        """Fields the page query orders and filters on (they must stay loaded)"""
+        return [field.lstrip('-') for field in self.get_ordering(request, queryset, view)]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(pagination_settings()['COUNT_QUERY_PARAM'], '').lower() in _TRUE:
+            self.count = cached_count(queryset, pagination_settings()['COUNT_TTL'])
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (self.cursor.reverse, self.cursor.position) if self.cursor else (False, None)
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if position is not None:
+            queryset = self._filter_past(queryset, position, reverse)
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _filter_past(self, queryset, position, reverse):
+        """Rows strictly after ``position`` in the (possibly reversed) ordering"""
+        after, equal = Q(), {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') != reverse else '__gt'
+            after |= Q(**equal, **{name + lookup: value})
+            equal[name] = value
+        # the leading range alone lets the index on the first field bound the scan
+        first = self.ordering[0]
+        lookup = '__lte' if first.startswith('-') != reverse else '__gte'
+        return queryset.filter(**{first.lstrip('-') + lookup: position[0]}).filter(after)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # a backwards page came back empty: start over from the top
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Cursor(offset=0, reverse=False,
+                                         position=self._get_position_from_instance(self.page[-1], self.ordering)))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        # an empty forward page (its rows were deleted) goes back to the last page
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        position = tokens.get('p')
+        if position is not None and len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {}
+        if cursor.reverse:
+            tokens['r'] = '1'
+        if cursor.position is not None:
+            tokens['p'] = cursor.position
+        encoded = b64encode(parse.urlencode(tokens, doseq=True).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            return [str(instance[field]) for field in fields]
+        return [str(getattr(instance, field)) for field in fields]
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {'count': self.count, **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties'] = {
+            'count': {'type': 'integer', 'example': 123},
+            **response_schema['properties'],
+        }
+        return response_schema
+
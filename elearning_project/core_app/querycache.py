@@ -0,0 +1,208 @@
+"""
+Generational ORM query-result cache.
+
+Every table listed (through its model) in QUERY_CACHE['MODELS'] has a
+generation number in L2 that is bumped by any INSERT, UPDATE or DELETE on it:
+an execute wrapper installed on every connection sees all SQL the ORM runs,
+including update(), delete() and bulk operations that send no signals. A
+write in autocommit mode bumps right away; inside a transaction, every table
+written is bumped once, when the transaction commits (other connections
+cannot see the new rows before, and this one does not use the cache).
+Tables written on every request (progress, enrollments) are better left out
+of MODELS: each write makes all their cached entries unreachable.
+
+Opt in per queryset with ``.cached()`` on a model using CachingQuerySet:
+
+    Category.objects.cached()
+    CourseModule.objects.filter(course_id=course_id).cached()
+
+The results are stored in the two-tier cache under a key made of the SQL,
+its parameters and the current generation of every table in the query, so a
+write to any of those tables makes the old entry unreachable: a cached read is
+never staler than the database. Queries touching a table that is not tracked,
+and queries run inside a transaction (which may see uncommitted rows), go to
+the database as usual.
+
+cached_count() serves queryset counts from the same generations, for the
+optional totals of core_app.pagination. CachingQuerySet is also where the
+request-scoped identity map (core_app.identity) plugs in.
+"""
+import hashlib
+import logging
+import pickle
+import re
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+from .cache import cache_layer
+from .identity import current_identity_map
+from .transactions import commit_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_CACHE = {
+    'ENABLED': True,
+    'MODELS': [],   # 'app_label.Model'; their auto-created M2M tables are tracked too
+    'TTL': 600,
+}
+
+NAMESPACE = 'orm'
+_WRITE_SQL = re.compile(r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+[`"\[]?(\w+)', re.IGNORECASE)
+# every table a SELECT reads, subqueries included
+_READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+[`"\[]?(\w+)', re.IGNORECASE)
+
+_tracked_tables = None
+
+
+def query_cache_settings():
+    return {**DEFAULT_QUERY_CACHE, **getattr(settings, 'QUERY_CACHE', {})}
+
+
+def tracked_tables():
+    global _tracked_tables
+    if _tracked_tables is None:
+        tables = set()
+        for label in query_cache_settings()['MODELS']:
+            model = apps.get_model(label)
+            tables.add(model._meta.db_table)
+            for field in model._meta.local_many_to_many:
+                if field.remote_field.through._meta.auto_created:
+                    tables.add(field.remote_field.through._meta.db_table)
+        _tracked_tables = frozenset(tables)
+    return _tracked_tables
+
+
+def _generation_key(table):
+    return f"orm-gen:{table}"
+
+
+def table_generations(tables):
+    """Current generation of each table, read from L2 on every call"""
+    l2 = cache_layer.l2
+    keys = {table: _generation_key(table) for table in tables}
+    found = l2.get_many(keys.values())
+    generations = {}
+    for table, key in keys.items():
+        if key not in found:
+            # never 0 again after an eviction: old entries must stay unreachable
+            l2.add(key, time.time_ns(), None)
+            found[key] = l2.get(key)
+        generations[table] = found[key]
+    return generations
+
+
+def bump(tables):
+    l2 = cache_layer.l2
+    for table in tables:
+        key = _generation_key(table)
+        try:
+            l2.incr(key)
+        except ValueError:
+            l2.add(key, time.time_ns(), None)
+        except Exception:
+            logger.exception("Could not bump generation of %s", table)
+
+
+def track_writes(connection):
+    """Execute wrapper bumping the generation of tracked tables written by a statement"""
+    def wrapper(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        match = _WRITE_SQL.match(sql)
+        if match and current_identity_map() is not None:
+            current_identity_map().clear()
+        if match and query_cache_settings()['ENABLED'] and match.group(1) in tracked_tables():
+            batch = commit_batch('query-cache-bump', lambda tables: bump(sorted(set(tables))), connection.alias)
+            if batch is None:
+                bump([match.group(1)])
+            else:
+                batch.append(match.group(1))
+        return result
+    return wrapper
+
+
+class CachingQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_results = False
+
+    def cached(self):
+        """
+        Serve this queryset from the query cache. Results are always read from
+        the primary: a lagging replica could otherwise be cached as current.
+        """
+        clone = self._chain()
+        clone._cache_results = True
+        if clone._db is None:
+            clone._db = DEFAULT_DB_ALIAS
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_results = self._cache_results
+        return clone
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            identity_map = current_identity_map()
+            if identity_map is not None and identity_map.handles(self):
+                self._result_cache = identity_map.fetch(self, self._load)
+            elif self._cache_results:
+                self._result_cache = self._cached_results()
+        super()._fetch_all()
+
+    def _load(self):
+        if self._cache_results:
+            results = self._cached_results()
+            if results is not None:
+                return results
+        return list(self._iterable_class(self))
+
+    def _cached_results(self):
+        if not query_cache_settings()['ENABLED'] or connections[self.db].in_atomic_block:
+            return None
+        try:
+            sql, params = self.query.sql_with_params()
+        except Exception:
+            return None  # EmptyResultSet and friends
+        tables = set(_READ_TABLES.findall(sql))
+        if not tables or not tables <= tracked_tables():
+            return None
+
+        generations = table_generations(sorted(tables))
+        digest = hashlib.sha1(
+            repr((self.db, sql, params, self._iterable_class.__name__, sorted(generations.items()))).encode()
+        ).hexdigest()
+        fetch = self._chain()
+        fetch._cache_results = False
+        fetch._prefetch_related_lookups = ()  # prefetching runs on the cached rows, per request
+        # stored pickled: every request gets its own instances to modify
+        data = cache_layer.get_or_set(
+            NAMESPACE, digest, lambda: pickle.dumps(list(fetch), pickle.HIGHEST_PROTOCOL), query_cache_settings()['TTL'],
+        )
+        return pickle.loads(data)
+
+
+def cached_count(queryset, ttl):
+    """
+    ``queryset.count()`` from the cache. Counts of tracked tables are exact:
+    the key holds their generations, as for .cached() results. Counts reading
+    an untracked table are kept ``ttl`` seconds and may lag behind by as much.
+    """
+    queryset = queryset.order_by()
+    if not query_cache_settings()['ENABLED'] or connections[queryset.db].in_atomic_block:
+        return queryset.count()
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except Exception:
+        return queryset.count()
+    tables = set(_READ_TABLES.findall(sql))
+    if tables and tables <= tracked_tables():
+        key = (queryset.db, sql, params, sorted(table_generations(sorted(tables)).items()))
+        ttl = query_cache_settings()['TTL']
+    else:
+        key = (queryset.db, sql, params)
+    digest = hashlib.sha1(repr(('count', *key)).encode()).hexdigest()
+    return cache_layer.get_or_set(NAMESPACE, digest, queryset.count, ttl)
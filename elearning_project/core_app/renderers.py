@@ -0,0 +1,114 @@
+"""
+Fast JSON rendering and parsing for DRF, backed by orjson when it is installed.
+
+FastJSONRenderer produces the same bytes as DRF's JSONRenderer for compact,
+unindented output (the API default): values orjson has no native support for
+(Decimal, lazy translation strings, querysets...) and datetimes go through
+DRF's own JSONEncoder.default, so prices, 'Z' suffixed timestamps and
+translated strings look exactly as before. Indented output (the browsable API,
+``Accept: application/json; indent=4``), UNICODE_JSON = False,
+COMPACT_JSON = False and anything orjson refuses (integers above 64 bits) fall
+back to the stdlib renderer, as does everything when orjson is missing.
+
+StreamingListMixin streams list responses: rows are serialized and encoded a
+chunk at a time while the body is being sent, instead of building the whole
+list and its JSON in memory first. A paginated page (at most
+PAGINATION['MAX_PAGE_SIZE'] rows) is read as usual and its envelope sent
+around the streamed results; an unpaginated list is read from the database
+in chunks as it is sent.
+"""
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the stdlib json is used instead
+    orjson = None
+
+_default = JSONEncoder().default
+# orjson writes U+2028/U+2029 raw, DRF escapes them to stay a JavaScript subset
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data):
+    """Compact UTF-8 JSON of ``data``, like DRF's JSONRenderer with the default settings"""
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(data, default=_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            if b'\xe2\x80' in ret:
+                for raw, escaped in _LINE_SEPARATORS:
+                    ret = ret.replace(raw, escaped)
+            return ret
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def is_compact_utf8(self, accepted_media_type, renderer_context=None):
+        """Whether the output is what dumps() produces"""
+        return (
+            not self.ensure_ascii
+            and self.compact
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.is_compact_utf8(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+def iter_json_list(items, chunk_size=100):
+    """Encode an iterable as a JSON array, yielding about ``chunk_size`` items per chunk"""
+    yield b'['
+    separator = b''
+    chunk = []
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield separator + b','.join(chunk)
+            separator = b','
+            chunk = []
+    if chunk:
+        yield separator + b','.join(chunk)
+    yield b']'
+
+
+def iter_json_page(envelope, items, chunk_size=100):
+    """Encode a paginated response: ``envelope`` (next, previous, ...) with ``items`` streamed as its results"""
+    head = dumps({key: value for key, value in envelope.items() if key != 'results'})
+    yield head[:-1] + (b',"results":' if len(head) > 2 else b'"results":')
+    yield from iter_json_list(items, chunk_size)
+    yield b'}'
+
+
+class StreamingListMixin:
+    """
+    For ListAPIView: stream the JSON body when the client negotiated plain
+    JSON (the browsable API renders as usual). Per-object serializer queries
+    run while the body is sent.
+    """
+    stream_chunk_size = 100
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, FastJSONRenderer) or not renderer.is_compact_utf8(request.accepted_media_type):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer([], many=True).child
+        page = self.paginate_queryset(queryset) if self.paginator is not None else None
+        if page is None:
+            rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+            body = iter_json_list((serializer.to_representation(row) for row in rows), self.stream_chunk_size)
+        else:
+            envelope = self.get_paginated_response([]).data
+            body = iter_json_page(envelope, (serializer.to_representation(row) for row in page), self.stream_chunk_size)
+        return StreamingHttpResponse(body, content_type=renderer.media_type)
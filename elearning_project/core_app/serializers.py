@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.JSONField(source='live_progress', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'attempts', 'max_attempts', 'progress', 'result', 'error',
+            'run_at', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
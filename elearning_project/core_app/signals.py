@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Apply SQLITE_PRAGMAS to every new SQLite connection. journal_mode=WAL is
+    stored in the database file; the others (busy_timeout, synchronous,
+    cache_size, mmap_size, ...) only last as long as the connection, which is
+    why they are set here and paired with persistent connections.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def install_write_tracking(sender, connection, **kwargs):
+    """Bump query cache generations on writes (core_app.querycache)"""
+    if getattr(connection, '_query_cache_tracking', False):
+        return
+    from .querycache import track_writes
+    # first in the list: execute_wrapper() blocks that were entered before the
+    # connection opened remove their own wrapper from the end
+    connection.execute_wrappers.insert(0, track_writes(connection))
+    connection._query_cache_tracking = True
+
+
+@receiver(request_started)
+def start_in_process_worker(sender, **kwargs):
+    """With JOB_QUEUE['IN_PROCESS'], web processes run jobs (periodic ones included) in a thread"""
+    from .jobs import ensure_in_process_worker
+    ensure_in_process_worker()
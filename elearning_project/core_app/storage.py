@@ -0,0 +1,32 @@
+"""
+Storage for files that must not be public (admin exports, profiler dumps).
+
+It lives under PRIVATE_ROOT, outside MEDIA_ROOT, and has no URL: the files
+are only handed out by staff-only admin views (FileResponse of
+``private_storage.open(name)``).
+"""
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class PrivateStorage(FileSystemStorage):
+    """FileSystemStorage rooted at settings.PRIVATE_ROOT, read when used"""
+
+    @property
+    def base_location(self):
+        return settings.PRIVATE_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return None  # url() raises ValueError: never served from MEDIA_URL
+
+
+private_storage = PrivateStorage()
@@ -0,0 +1,714 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import generics, serializers
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIClient, APIRequestFactory
+
+from courses_app.models import Category, Course, Enrollment
+from registration_app.models import CustomUser
+from courses_app.serializers import CourseListSerializer, EnrollmentSerializer, LessonSerializer
+from . import jobs, querycache
+from .cache import TwoTierCache, cache_layer
+from .columns import serializer_columns
+from .db_routing import ReplicaRoutingMiddleware
+from .fieldsets import FieldSpec, optimize_queryset, parse_field_tree
+from .identity import identity_map
+from .invalidation import InvalidationBus
+from .models import InvalidationEvent, Job
+from .write_queue import WriteQueue
+
+@jobs.task(name='core_app.tests.fail')
+def fail():
+    raise ValueError("boom")
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'core-tests'}}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CACHE_LAYER={'GENERATION_CHECK': 0, 'EARLY_REFRESH_BETA': 0, 'NAMESPACES': {'short': {'ttl': 1, 'l1_ttl': 1}}},
+)
+class TwoTierCacheTests(TransactionTestCase):
+
+    def setUp(self):
+        self.cache = TwoTierCache()
+        self.cache.l2.clear()
+
+    def counter(self, values, delay=0):
+        calls = []
+        lock = threading.Lock()
+
+        def compute():
+            with lock:
+                calls.append(None)
+                value = values[len(calls) - 1]
+            time.sleep(delay)
+            return value
+        return compute, calls
+
+    def test_concurrent_misses_compute_once(self):
+        compute, calls = self.counter(['value'], delay=0.2)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def read():
+            barrier.wait()
+            results.append(self.cache.get_or_set('ns', 'key', compute))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_other_worker_waits_for_the_lock_holder(self):
+        leader, follower = TwoTierCache(), TwoTierCache()
+        full_key = leader.make_key('ns', 'key')
+        leader.l2.add(f"cache-lock:{full_key}", 1, 30)
+        timer = threading.Timer(0.2, leader._store, (full_key, 'from leader', 60, 10, 0))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        compute, calls = self.counter(['from follower'])
+        self.assertEqual(follower.get_or_set('ns', 'key', compute), 'from leader')
+        self.assertEqual(calls, [])
+
+    def test_namespace_invalidation_reaches_every_worker(self):
+        other = TwoTierCache()
+        compute, calls = self.counter(['old', 'new'])
+        self.assertEqual(self.cache.get_or_set('ns', 'key', compute), 'old')
+        self.assertEqual(other.get_or_set('ns', 'key', compute), 'old')  # L2 hit, copied to its L1
+        self.cache.invalidate_namespace('ns')
+        self.assertEqual(other.get_or_set('ns', 'key', compute), 'new')
+        self.assertEqual(self.cache.get_or_set('ns', 'key', compute), 'new')
+        self.assertEqual(len(calls), 2)
+
+    def test_invalidation_in_a_transaction_waits_for_the_commit(self):
+        other = TwoTierCache()
+        compute, calls = self.counter(['old', 'new'])
+        self.cache.get_or_set('ns', 'key', compute)
+        with transaction.atomic():
+            self.cache.invalidate_namespace('ns')
+            self.cache.invalidate_namespace('ns')
+            # a concurrent request still reads the committed data's entry
+            self.assertEqual(other.get_or_set('ns', 'key', compute), 'old')
+        self.assertEqual(other.get_or_set('ns', 'key', compute), 'new')
+        self.assertEqual(self.cache.l2.get('cache-gen:ns'), 1)
+
+    def test_rolled_back_invalidation_is_dropped(self):
+        compute, calls = self.counter(['old', 'new'])
+        self.cache.get_or_set('ns', 'key', compute)
+        with transaction.atomic():
+            self.cache.invalidate_namespace('ns')
+            transaction.set_rollback(True)
+        self.assertEqual(self.cache.get_or_set('ns', 'key', compute), 'old')
+
+    def test_invalidation_is_per_namespace(self):
+        compute, calls = self.counter(['kept', 'unexpected'])
+        self.cache.get_or_set('kept', 'key', compute)
+        self.cache.invalidate_namespace('ns')
+        self.assertEqual(self.cache.get_or_set('kept', 'key', compute), 'kept')
+        self.assertEqual(len(calls), 1)
+
+    def test_entries_expire_after_their_ttl(self):
+        compute, calls = self.counter(['first', 'second'])
+        self.assertEqual(self.cache.get_or_set('short', 'key', compute), 'first')
+        self.assertEqual(self.cache.get_or_set('short', 'key', compute), 'first')
+        time.sleep(1.1)
+        self.assertEqual(self.cache.get_or_set('short', 'key', compute), 'second')
+
+    def test_early_refresh_recomputes_before_expiry(self):
+        full_key = self.cache.make_key('ns', 'key')
+        compute, calls = self.counter(['fresh'])
+        with override_settings(CACHE_LAYER={'GENERATION_CHECK': 0, 'EARLY_REFRESH_BETA': 1.0}):
+            # 5s left, but the value took 10s to compute: XFetch picks this caller
+            self.cache._store(full_key, 'stale', 5, 0, 10)
+            self.cache.l1.clear()
+            with mock.patch('core_app.cache.random.random', return_value=0.999):
+                self.assertEqual(self.cache.get_or_set('ns', 'key', compute), 'fresh')
+
+    def test_no_early_refresh_far_from_expiry(self):
+        full_key = self.cache.make_key('ns', 'key')
+        compute, calls = self.counter(['fresh'])
+        with override_settings(CACHE_LAYER={'GENERATION_CHECK': 0, 'EARLY_REFRESH_BETA': 1.0}):
+            self.cache._store(full_key, 'cached', 300, 0, 0.01)
+            self.cache.l1.clear()
+            with mock.patch('core_app.cache.random.random', return_value=0.999):
+                self.assertEqual(self.cache.get_or_set('ns', 'key', compute), 'cached')
+        self.assertEqual(calls, [])
+
+
+class InvalidationBusTests(TestCase):
+
+    def setUp(self):
+        self.bus = InvalidationBus()
+        self.received = []
+        self.bus.subscribe('ns', lambda namespace, key: self.received.append(key))
+        self.bus.poll(force=True)  # starts from the current end
+
+    def event(self, key):
+        return InvalidationEvent.objects.create(namespace='ns', key=key, origin='other worker')
+
+    def test_new_events_are_applied_once(self):
+        self.event('a')
+        self.event('b')
+        self.assertEqual(self.bus.poll(force=True), 2)
+        self.assertEqual(self.bus.poll(force=True), 0)
+        self.assertEqual(self.received, ['a', 'b'])
+
+    def test_an_id_committed_below_the_high_water_mark_is_applied(self):
+        late = self.event('late')  # its id is allocated first ...
+        InvalidationEvent.objects.filter(pk=late.pk).delete()
+        self.event('early')
+        self.bus.poll(force=True)
+        InvalidationEvent.objects.create(pk=late.pk, namespace='ns', key='late', origin='other worker')  # ... and commits last
+        self.assertEqual(self.bus.poll(force=True), 1)
+        self.assertEqual(self.received, ['early', 'late'])
+
+    def test_own_events_are_not_applied_again(self):
+        InvalidationEvent.objects.create(namespace='ns', key='mine', origin=self.bus.origin)
+        self.assertEqual(self.bus.poll(force=True), 0)
+
+    @override_settings(INVALIDATION_BUS={'OVERLAP': 10, 'BATCH_SIZE': 2})
+    def test_applied_ids_are_forgotten_once_out_of_the_window(self):
+        for key in 'abcde':
+            self.event(key)
+        self.event('old')
+        InvalidationEvent.objects.filter(key='old').update(created_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.bus.poll(force=True), 6)
+        self.assertEqual(self.received, ['a', 'b', 'c', 'd', 'e', 'old'])
+        self.assertEqual(len(self.bus._applied), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_LAYER={'GENERATION_CHECK': 0, 'DEFAULT_L1_TTL': 0})
+class QueryCacheTests(TransactionTestCase):
+    """Writes run in autocommit or in committed transactions here, as they do in requests"""
+
+    def setUp(self):
+        cache_layer.l1.clear()
+        cache_layer.l2.clear()
+        Category.objects.bulk_create([Category(name='Art'), Category(name='Music')])
+
+    def names(self):
+        return sorted(category.name for category in Category.objects.cached())
+
+    def test_cached_results_skip_the_database(self):
+        self.names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Art', 'Music'])
+
+    def test_update_invalidates(self):
+        self.names()
+        Category.objects.filter(name='Art').update(name='Design')
+        self.assertEqual(self.names(), ['Design', 'Music'])
+
+    def test_bulk_update_invalidates(self):
+        self.names()
+        categories = list(Category.objects.all())
+        for category in categories:
+            category.name = category.name.upper()
+        Category.objects.bulk_update(categories, ['name'])
+        self.assertEqual(self.names(), ['ART', 'MUSIC'])
+
+    def test_delete_invalidates(self):
+        self.names()
+        Category.objects.filter(name='Music').delete()
+        self.assertEqual(self.names(), ['Art'])
+
+    def test_transaction_bumps_each_table_once_on_commit(self):
+        self.names()
+        with mock.patch.object(querycache, 'bump', wraps=querycache.bump) as bump:
+            with transaction.atomic():
+                Category.objects.create(name='Film')
+                Category.objects.filter(name='Art').update(name='Design')
+                Category.objects.filter(name='Music').delete()
+                bump.assert_not_called()
+            # one call for the whole transaction; the delete also set course.category to NULL
+            bump.assert_called_once_with(['courses_app_category', 'courses_app_course'])
+        self.assertEqual(self.names(), ['Design', 'Film'])
+
+    def test_rolled_back_transaction_does_not_bump(self):
+        self.names()
+        with mock.patch.object(querycache, 'bump') as bump:
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                Category.objects.create(name='Film')
+                1 / 0
+        bump.assert_not_called()
+
+    def test_write_after_a_rolled_back_savepoint_still_bumps(self):
+        self.names()
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    Category.objects.create(name='Film')
+                    raise ValueError
+            except ValueError:
+                pass
+            Category.objects.filter(name='Art').update(name='Design')
+        self.assertEqual(self.names(), ['Design', 'Music'])
+
+
+class ColumnPruningTests(SimpleTestCase):
+
+    def columns(self, serializer_class, fields=None):
+        spec = FieldSpec(parse_field_tree(fields) if fields else None, {}, {})
+        return serializer_columns(serializer_class(context={'field_spec': spec}))
+
+    def test_course_list_columns(self):
+        self.assertEqual(self.columns(CourseListSerializer), {
+            'id', 'title', 'subtitle', 'slug', 'image', 'instructor_id', 'price', 'has_discount',
+            'discount_price', 'discount_expiry', 'category_id', 'level', 'duration', 'status',
+            'featured', 'created_at',
+        })
+
+    def test_lesson_columns(self):
+        self.assertEqual(self.columns(LessonSerializer), {
+            'id', 'module_id', 'title', 'order', 'video_url', 'content', 'duration',
+            'is_published', 'is_preview', 'thumbnail', 'video_file',
+        })
+
+    def test_enrollment_columns(self):
+        self.assertEqual(self.columns(EnrollmentSerializer), {
+            'id', 'user_id', 'course_id', 'enrolled_at', 'completed', 'completed_at',
+            'payment_status', 'payment_reference', 'amount_paid',
+        })
+
+    def test_sparse_fields(self):
+        self.assertEqual(self.columns(CourseListSerializer, 'title,current_price'), {
+            'id', 'title', 'price', 'has_discount', 'discount_price', 'discount_expiry',
+        })
+
+    def test_undeclared_method_field_is_not_pruned(self):
+        class Undeclared(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Category
+                fields = ['id', 'label']
+
+            def get_label(self, obj):
+                return obj.name
+
+        self.assertIsNone(serializer_columns(Undeclared()))
+
+    def test_keeps_foreign_keys_the_view_selects(self):
+        serializer = EnrollmentSerializer(context={'field_spec': FieldSpec({'id': {}}, {}, {})})
+        queryset = optimize_queryset(Enrollment.objects.select_related('user', 'course'), serializer, prune=True)
+        self.assertEqual(queryset.query.deferred_loading, ({'id', 'user', 'course'}, False))
+        str(queryset.query)  # compiles: no deferred foreign key is traversed
+
+
+@override_settings(JOB_QUEUE={'RETRY_DELAY': 10, 'MAX_RETRY_DELAY': 30, 'LEASE': 60})
+class JobQueueTests(TestCase):
+
+    def test_only_one_worker_wins_a_claim(self):
+        job = fail.enqueue()
+        first, second = jobs.Worker(name='first'), jobs.Worker(name='second')
+        update = QuerySet.update
+
+        def claim_in_between(queryset, **kwargs):
+            if kwargs.get('worker') == 'first':
+                # second claims the job after first listed it as due, before first's UPDATE
+                with mock.patch.object(QuerySet, 'update', update):
+                    self.assertEqual(second.claim(1), [job])
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', claim_in_between):
+            self.assertEqual(first.claim(1), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.RUNNING, 'second', 1))
+
+    def test_retry_delay_doubles_up_to_the_maximum(self):
+        self.assertEqual([jobs.retry_delay(attempts) for attempts in range(1, 5)], [10, 20, 30, 30])
+
+    def test_failed_attempts_back_off_then_fail(self):
+        job = fail.enqueue()
+        worker = jobs.Worker()
+        for delay in (10, 20):
+            before = timezone.now()
+            [claimed] = worker.claim(1)
+            with self.assertLogs('core_app.jobs', 'ERROR'):
+                worker.execute(claimed)
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.PENDING)
+            self.assertEqual(job.error, "ValueError: boom")
+            self.assertGreaterEqual(job.run_at, before + timedelta(seconds=delay))
+            self.assertLess(job.run_at, timezone.now() + timedelta(seconds=delay))
+            self.assertEqual(worker.claim(1), [])  # not due yet
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        [claimed] = worker.claim(1)
+        with self.assertLogs('core_app.jobs', 'ERROR'):
+            worker.execute(claimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+
+    def test_abandoned_jobs_go_back_to_the_queue_after_the_lease(self):
+        expired = timezone.now() - timedelta(seconds=61)
+        retried = Job.objects.create(name='core_app.tests.fail', status=Job.RUNNING, started_at=expired, attempts=1)
+        exhausted = Job.objects.create(name='core_app.tests.fail', status=Job.RUNNING, started_at=expired, attempts=3)
+        leased = Job.objects.create(name='core_app.tests.fail', status=Job.RUNNING, started_at=timezone.now(), attempts=1)
+        jobs.Worker().requeue_abandoned(jobs.job_queue_settings())
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[retried.pk], Job.PENDING)
+        self.assertEqual(statuses[exhausted.pk], Job.FAILED)
+        self.assertEqual(statuses[leased.pk], Job.RUNNING)
+
+    def test_one_pending_run_per_periodic_task(self):
+        periodic = jobs.Task(lambda: None, name='core_app.tests.periodic', every=300)
+        with mock.patch.dict(jobs.registry, {periodic.name: periodic}, clear=True):
+            jobs.Worker().schedule_periodic()
+            jobs.Worker().schedule_periodic()
+            [first] = Job.objects.filter(name=periodic.name)
+            self.assertEqual(first.status, Job.PENDING)
+            # workers racing past the exists() check: the constraint lets one insert through
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                Job.objects.create(name=periodic.name, periodic=True)
+
+            Job.objects.filter(pk=first.pk).update(status=Job.COMPLETED)
+            jobs.Worker().schedule_periodic()
+            second = Job.objects.get(name=periodic.name, status=Job.PENDING)
+            self.assertEqual(second.run_at, first.run_at + timedelta(seconds=300))
+
+
+class IdentityMapTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.art = Category.objects.create(name='Art')
+
+    def test_repeated_lookup_is_answered_from_the_map(self):
+        with identity_map(['courses_app.Category']) as instances:
+            first = Category.objects.get(name='Art')
+            with self.assertNumQueries(0):
+                again = Category.objects.get(name='Art')
+        self.assertIs(again, first)
+        self.assertEqual(instances.hits, 1)
+
+    def test_same_row_from_another_query_is_the_same_instance(self):
+        with identity_map(['courses_app.Category']):
+            by_name = Category.objects.get(name='Art')
+            [by_pk] = Category.objects.filter(pk=self.art.pk)
+        self.assertIs(by_pk, by_name)
+
+    def test_write_empties_the_map(self):
+        with identity_map(['courses_app.Category']):
+            Category.objects.get(pk=self.art.pk)
+            Category.objects.filter(pk=self.art.pk).update(name='Design')
+            with self.assertNumQueries(1):
+                self.assertEqual(Category.objects.get(pk=self.art.pk).name, 'Design')
+
+    def test_other_models_are_not_mapped(self):
+        with identity_map(['courses_app.Course']):
+            Category.objects.get(pk=self.art.pk)
+            with self.assertNumQueries(1):
+                Category.objects.get(pk=self.art.pk)
+
+
+class BatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        instructor = CustomUser.objects.create(username='instructor', role='instructor', is_instructor=True)
+        cls.course = Course.objects.create(
+            title='Python', description='About', price=0, instructor=instructor, status='published',
+        )
+        cls.student = CustomUser.objects.create(username='student', role='student')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def batch(self, *items, **headers):
+        return self.client.post('/api/batch/', {'requests': list(items)}, format='json', **headers)
+
+    def test_responses_in_order(self):
+        response = self.batch(
+            {'id': 'access', 'path': f'/api/courses/{self.course.id}/check-access/'},
+            {'id': 'missing', 'path': '/api/courses/0/check-access/'},
+        )
+        self.assertEqual(response.status_code, 200)
+        access, missing = response.json()['responses']
+        self.assertEqual((access['id'], access['status'], access['body']['has_access']), ('access', 200, True))
+        self.assertEqual((missing['id'], missing['status']), ('missing', 404))
+
+    def test_repeated_lookups_share_the_identity_map(self):
+        item = {'path': f'/api/courses/{self.course.id}/check-access/'}
+        with CaptureQueriesContext(connection) as once:
+            self.batch(item)
+        with CaptureQueriesContext(connection) as twice:
+            self.batch(item, item)
+        self.assertEqual(len(twice), len(once))
+
+    def test_only_get_and_head(self):
+        path = f'/api/courses/{self.course.id}/check-access/'
+        response = self.batch({'path': path, 'method': 'POST'})
+        self.assertEqual(response.status_code, 400)
+        [head] = self.batch({'path': path, 'method': 'HEAD'}).json()['responses']
+        self.assertEqual((head['status'], head['body']), (200, None))
+
+    def test_if_none_match_per_item(self):
+        path = f'/api/courses/{self.course.id}/detail/'
+        [first] = self.batch({'path': path}).json()['responses']
+        etag = first['headers']['ETag']
+        # the batch's own If-None-Match is not passed on to its sub-requests
+        revalidated, fresh = self.batch(
+            {'path': path, 'headers': {'If-None-Match': etag}}, {'path': path}, HTTP_IF_NONE_MATCH=etag,
+        ).json()['responses']
+        self.assertEqual((revalidated['status'], revalidated['body'], revalidated['headers']['ETag']), (304, None, etag))
+        self.assertEqual(fresh['status'], 200)
+        self.assertEqual(fresh['body']['id'], self.course.id)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    DATABASE_ROUTING={'REPLICAS': ['replica'], 'SELECTOR': 'core_app.db_routing.round_robin_replica'},
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """The test database as primary and a second SQLite file as replica, filled by sync_replicas"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory)
+        # a connection outside of connections.settings: the test runner neither
+        # creates a test database for it nor forbids it
+        connections.settings['replica'] = connections.configure_settings({
+            'default': {},
+            'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'replica.sqlite3')},
+        })['replica']
+        replica = connections['replica']
+        del connections.settings['replica']
+        cls.addClassCleanup(connections.__delitem__, 'replica')
+        cls.addClassCleanup(replica.close)
+
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(name='Synced')
+        call_command('sync_replicas', stdout=io.StringIO())
+        Category.objects.using('replica').create(name='Replica only')
+        self.middleware = ReplicaRoutingMiddleware(self.view)
+
+    def view(self, request):
+        """Lists the categories it can read; a POST creates one first"""
+        if request.method == 'POST':
+            Category.objects.create(name=request.POST['name'])
+        return HttpResponse(','.join(Category.objects.order_by('name').values_list('name', flat=True)))
+
+    def request(self, method='get', user=None, cookies=None, **data):
+        request = getattr(RequestFactory(), method)('/', data)
+        request.COOKIES.update(cookies or {})
+        request.user = user or AnonymousUser()
+        return self.middleware(request)
+
+    def test_sync_replicas_copies_the_primary(self):
+        self.assertEqual(list(Category.objects.using('replica').values_list('name', flat=True)), ['Replica only', 'Synced'])
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertEqual(self.request().content, b'Replica only,Synced')
+        self.assertEqual(self.request('head').status_code, 200)
+        # outside of a request, the primary
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['Synced'])
+
+    def test_writes_go_to_the_primary_and_pin_the_client(self):
+        response = self.request('post', name='New')
+        self.assertEqual(response.content, b'New,Synced')  # read after the write: the primary
+        self.assertFalse(Category.objects.using('replica').filter(name='New').exists())
+        cookie = response.cookies['db_primary_until']
+        self.assertEqual(cookie['max-age'], 10)
+
+        # the next read sees the write ...
+        self.assertEqual(self.request(cookies={'db_primary_until': cookie.value}).content, b'New,Synced')
+        # ... until the pin expires
+        self.assertEqual(self.request(cookies={'db_primary_until': '0'}).content, b'Replica only,Synced')
+
+    def test_authenticated_user_is_pinned_without_the_cookie(self):
+        user = CustomUser.objects.create(username='writer')
+        other = CustomUser.objects.create(username='reader')
+        self.request('post', user=user, name='New')
+        self.assertEqual(self.request(user=user).content, b'New,Synced')
+        self.assertEqual(self.request(user=other).content, b'Replica only,Synced')
+
+    def test_reads_in_a_transaction_use_the_primary(self):
+        def view(request):
+            with transaction.atomic():
+                return HttpResponse(','.join(Category.objects.order_by('name').values_list('name', flat=True)))
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.assertEqual(ReplicaRoutingMiddleware(view)(request).content, b'Synced')
+
+
+@override_settings(WRITE_QUEUE={'ENABLED': True, 'LINGER_MS': 200, 'RETRIES': 2})
+class WriteQueueTests(TransactionTestCase):
+    """A queue of its own per test; the writer thread commits on its own connection"""
+
+    def setUp(self):
+        self.queue = WriteQueue()
+        batches = []
+        run_batch = self.queue._run_batch
+        self.queue._run_batch = lambda batch, config: (batches.append(len(batch)), run_batch(batch, config))
+        self.batches = batches
+
+    def create(self, name, fail=None):
+        def write():
+            category = Category.objects.create(name=name)
+            if fail is not None:
+                raise fail
+            return (category.pk, threading.current_thread().name, connection.in_atomic_block)
+        return write
+
+    def test_jobs_arriving_together_run_as_one_batch(self):
+        futures = [self.queue.submit(self.create(name)) for name in ('Art', 'Music', 'Design')]
+        results = [future.result(timeout=5) for future in futures]
+        self.assertEqual(self.batches, [3])
+        self.assertEqual({thread for _, thread, _ in results}, {'write-queue'})
+        self.assertTrue(all(atomic for _, _, atomic in results))
+        self.assertEqual(sorted(Category.objects.values_list('name', flat=True)), ['Art', 'Design', 'Music'])
+
+    def test_run_waits_for_the_result(self):
+        pk, thread, _ = self.queue.run(self.create('Art'))
+        self.assertEqual(thread, 'write-queue')
+        self.assertTrue(Category.objects.filter(pk=pk, name='Art').exists())
+
+    def test_failing_job_does_not_roll_back_the_others(self):
+        futures = [
+            self.queue.submit(self.create('Art')),
+            self.queue.submit(self.create('Broken', fail=ValueError("boom"))),
+            self.queue.submit(self.create('Music')),
+        ]
+        with self.assertRaisesMessage(ValueError, "boom"):
+            futures[1].result(timeout=5)
+        futures[0].result(timeout=5)
+        futures[2].result(timeout=5)
+        self.assertEqual(self.batches, [3])
+        self.assertEqual(sorted(Category.objects.values_list('name', flat=True)), ['Art', 'Music'])
+
+    def test_locked_database_retries_the_whole_batch(self):
+        attempts = []
+
+        def locked_once():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise OperationalError("database is locked")
+            return 'written'
+
+        art = self.queue.submit(self.create('Art'))
+        locked = self.queue.submit(locked_once)
+        self.assertEqual(locked.result(timeout=5), 'written')
+        art.result(timeout=5)
+        self.assertEqual(len(attempts), 2)
+        # the first attempt was rolled back: Art is there once
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['Art'])
+
+    def test_database_that_stays_locked_fails_every_job(self):
+        def locked():
+            raise OperationalError("database is locked")
+
+        art = self.queue.submit(self.create('Art'))
+        future = self.queue.submit(locked)
+        with self.assertLogs('core_app.write_queue', 'ERROR'):
+            with self.assertRaisesMessage(OperationalError, "database is locked"):
+                future.result(timeout=5)
+            with self.assertRaises(OperationalError):
+                art.result(timeout=5)
+        self.assertEqual(len(self.batches), 1)
+        self.assertFalse(Category.objects.exists())
+
+    def test_runs_inline_inside_a_transaction(self):
+        with transaction.atomic():
+            _, thread, _ = self.queue.run(self.create('Art'))
+        self.assertEqual(thread, threading.current_thread().name)
+        self.assertEqual(self.batches, [])
+
+
+class CategoryPageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
+
+
+class CategoryPageView(generics.ListAPIView):
+    queryset = Category.objects.all()
+    serializer_class = CategoryPageSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    cursor_ordering = ('-created_at', '-pk')
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_LAYER={'GENERATION_CHECK': 0, 'DEFAULT_L1_TTL': 0})
+class CursorPaginationTests(TransactionTestCase):
+    """Committed writes: the query cache (behind ?count=true) is skipped inside transactions"""
+
+    def setUp(self):
+        cache_layer.l1.clear()
+        cache_layer.l2.clear()
+        Category.objects.bulk_create([Category(name=f'Category {n}') for n in range(7)])
+        # four rows share the newest timestamp, three the older one
+        newer, older = timezone.now(), timezone.now() - timedelta(days=1)
+        ids = list(Category.objects.order_by('pk').values_list('pk', flat=True))
+        Category.objects.filter(pk__in=ids[:4]).update(created_at=newer)
+        Category.objects.filter(pk__in=ids[4:]).update(created_at=older)
+        self.expected = ids[3::-1] + ids[:3:-1]  # -created_at, then -pk among ties
+
+    def get(self, url='/categories/', **params):
+        response = CategoryPageView.as_view()(APIRequestFactory().get(url, params))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_follow_the_ordering_across_tied_keys(self):
+        pages, data = [], self.get(page_size=3)
+        while True:
+            pages.append([row['id'] for row in data['results']])
+            if not data['next']:
+                break
+            data = self.get(data['next'])
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        # and back again with the previous cursors
+        back = []
+        while data['previous']:
+            data = self.get(data['previous'])
+            back.append([row['id'] for row in data['results']])
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_rows_inserted_while_paging_do_not_shift_the_next_page(self):
+        first = self.get(page_size=3)
+        Category.objects.create(name='Newest')
+        second = self.get(first['next'])
+        self.assertEqual([row['id'] for row in second['results']], self.expected[3:6])
+
+    @override_settings(PAGINATION={'MAX_PAGE_SIZE': 2})
+    def test_page_size_is_capped(self):
+        self.assertEqual(len(self.get(page_size=50)['results']), 2)
+
+    def test_count_is_opt_in_and_cached(self):
+        self.assertNotIn('count', self.get())
+        self.assertEqual(self.get(count='true')['count'], 7)
+        with self.assertNumQueries(1):  # the page; the count comes from the cache
+            self.assertEqual(self.get(count='true')['count'], 7)
+        Category.objects.create(name='New')
+        self.assertEqual(self.get(count='true')['count'], 8)
+
+    def test_a_malformed_cursor_is_not_found(self):
+        response = CategoryPageView.as_view()(APIRequestFactory().get('/categories/', {'cursor': 'cD0x'}))  # p=1
+        self.assertEqual(response.status_code, 404)
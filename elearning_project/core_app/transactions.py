@@ -0,0 +1,42 @@
+"""
+Work collected over a transaction and done once when it commits.
+
+    batch = commit_batch('course-touch', touch_courses)
+    if batch is None:
+        touch_courses([lookup])     # autocommit: right away
+    else:
+        batch.append(lookup)        # touch_courses(all lookups) on commit
+
+Used where a signal or an execute wrapper fires for every row of a bulk
+edit but the effect only needs to happen once (core_app.querycache bumps,
+Course.touch).
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class _Batch(list):
+    def __init__(self, flush):
+        super().__init__()
+        self._flush = flush
+
+    def flush(self):
+        self._flush(self)
+
+
+def commit_batch(name, flush, using=DEFAULT_DB_ALIAS):
+    """
+    The list collected under ``name`` in the current transaction of ``using``,
+    passed to ``flush(items)`` once the transaction commits; None outside of
+    a transaction. Items of a rolled back savepoint may stay in the list, so
+    ``flush`` must tolerate a few extra ones.
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        return None
+    batches = connection.__dict__.setdefault('_commit_batches', {})
+    batch = batches.get(name)
+    # a rolled back transaction (or savepoint) drops the callback: start over
+    if batch is None or not any(func == batch.flush for _, func, _ in connection.run_on_commit):
+        batch = batches[name] = _Batch(flush)
+        connection.on_commit(batch.flush)
+    return batch
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('batch/', views.BatchView.as_view(), name='batch'),
+    path('jobs/', views.JobListView.as_view(), name='job-list'),
+    path('jobs/<int:pk>/', views.JobDetailView.as_view(), name='job-detail'),
+]
@@ -0,0 +1,50 @@
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .batch import BatchError, batch_settings, parse_batch, run_batch
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobQuerysetMixin:
+    """Users see the jobs they started, staff see every job"""
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(owner=user)
+
+
+class JobListView(JobQuerysetMixin, generics.ListAPIView):
+    """Background jobs, newest first; ?status=pending|running|completed|failed filters them"""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        return queryset
+
+
+class JobDetailView(JobQuerysetMixin, generics.RetrieveAPIView):
+    """Status, progress and result of a background job"""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+
+class BatchView(APIView):
+    """Run several API GETs in one request (core_app.batch)"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        config = batch_settings()
+        try:
+            items = parse_batch(request.data, config)
+        except BatchError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"responses": run_batch(request, items, config)})
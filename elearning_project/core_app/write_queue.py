@@ -0,0 +1,120 @@
+"""
+Coalescing write queue.
+
+SQLite allows one writer at a time, so request threads that each open their
+own write transaction mostly wait on each other (or fail with "database is
+locked"). Instead, write-heavy views hand their write function to the queue
+and wait for the result. A single writer thread per process collects whatever
+arrived within LINGER_MS (up to MAX_BATCH jobs) and runs the whole batch in
+one transaction, every job in its own savepoint so one failing job does not
+roll back the others.
+
+    progress = write_queue.run(record_progress, user, lesson)
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITE_QUEUE = {
+    'ENABLED': False,     # off: run() executes the function inline in its own transaction
+    'MAX_BATCH': 100,
+    'LINGER_MS': 5,       # how long the writer waits for more jobs to join a batch
+    'TIMEOUT': 30,        # seconds a caller waits for its result
+    'RETRIES': 3,         # batch retries when the database stays locked
+}
+
+
+def write_queue_settings():
+    return {**DEFAULT_WRITE_QUEUE, **getattr(settings, 'WRITE_QUEUE', {})}
+
+
+class WriteQueue:
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)``; returns a Future with its result"""
+        future = Future()
+        self._ensure_writer()
+        self._jobs.put((func, args, kwargs, future))
+        return future
+
+    def run(self, func, *args, **kwargs):
+        """Run ``func`` through the queue and return its result (or raise its exception)"""
+        config = write_queue_settings()
+        # Inside a caller's transaction the writer thread would wait on the
+        # caller's lock (and not see its rows): run inline instead.
+        if not config['ENABLED'] or connection.in_atomic_block:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result(timeout=config['TIMEOUT'])
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name='write-queue', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self, config):
+        batch = [self._jobs.get()]
+        deadline = time.monotonic() + config['LINGER_MS'] / 1000
+        while len(batch) < config['MAX_BATCH']:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._jobs.get(timeout=remaining) if remaining > 0 else self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            config = write_queue_settings()
+            batch = self._next_batch(config)
+            close_old_connections()
+            try:
+                self._run_batch(batch, config)
+            except Exception as e:
+                logger.exception("Write batch of %d jobs failed", len(batch))
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run_batch(self, batch, config):
+        for attempt in range(config['RETRIES'] + 1):
+            results = []
+            try:
+                with transaction.atomic():
+                    for func, args, kwargs, future in batch:
+                        try:
+                            with transaction.atomic():
+                                results.append((future, True, func(*args, **kwargs)))
+                        except OperationalError:
+                            raise  # locked: retry the whole batch
+                        except Exception as e:
+                            results.append((future, False, e))
+            except OperationalError:
+                if attempt == config['RETRIES']:
+                    raise
+                time.sleep(0.05 * 2 ** attempt)
+                continue
+            # only resolve the futures once the batch is committed
+            for future, ok, value in results:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            return
+
+
+write_queue = WriteQueue()
@@ -1,12 +1,19 @@
+import os
+
 from django.contrib import admin
-from django.contrib.auth.admin import UserAdmin
-from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
 from import_export.admin import ImportExportModelAdmin
 from import_export import resources
 from .models import (
     Category, Course, CourseModule, 
     Lesson, CourseMaterial, Enrollment
 )
+from core_app.storage import private_storage
+from .exports import EXPORT_DIR, streaming_export_response, start_export_job
 
 # Custom admin site settings
 admin.site.site_header = "Course Platform Administration"
@@ -24,6 +31,55 @@ class EnrollmentResource(resources.ModelResource):
         model = Enrollment
         fields = ('id', 'user__username', 'course__title', 'enrolled_at', 'payment_status', 'completed')
 
+class StreamingExportMixin:
+    """
+    Admin actions that export the selected rows of ``resource_class`` without
+    building the dataset in memory: streamed straight to the browser, or written
+    to a private file in the background for very large selections, which staff
+    download from the admin.
+    """
+    streaming_export_actions = ['stream_export_csv', 'stream_export_jsonl', 'export_to_file']
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        for name in self.streaming_export_actions:
+            actions[name] = self.get_action(name)
+        return actions
+
+    def get_export_fields_list(self):
+        return list(self.resource_class._meta.fields)
+
+    def stream_export_csv(self, request, queryset):
+        return streaming_export_response(queryset, self.get_export_fields_list(), 'csv')
+    stream_export_csv.short_description = "Stream export of selected (CSV)"
+
+    def stream_export_jsonl(self, request, queryset):
+        return streaming_export_response(queryset, self.get_export_fields_list(), 'jsonl')
+    stream_export_jsonl.short_description = "Stream export of selected (JSON Lines)"
+
+    def export_to_file(self, request, queryset):
+        name, job = start_export_job(request, self.model, self.get_export_fields_list(), 'csv')
+        url = reverse(f'admin:{self.opts.app_label}_{self.opts.model_name}_export', args=[os.path.basename(name)])
+        self.message_user(request, format_html('Export queued as job #{}, download it from <a href="{}">{}</a> once it is done', job.id, url, url))
+    export_to_file.short_description = "Export selected to a file (background)"
+
+    def get_urls(self):
+        urls = [
+            path(
+                'export/<str:filename>/', self.admin_site.admin_view(self.export_download_view),
+                name=f'{self.opts.app_label}_{self.opts.model_name}_export',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def export_download_view(self, request, filename):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        name = f"{EXPORT_DIR}/{filename}"
+        if not filename.endswith(('.csv', '.jsonl')) or not private_storage.exists(name):
+            raise Http404("No such export")
+        return FileResponse(private_storage.open(name, 'rb'), as_attachment=True, filename=filename)
+
 # Inline Admins
 class LessonInline(admin.StackedInline):
     model = Lesson
@@ -38,52 +94,34 @@ class CourseMaterialInline(admin.StackedInline):
     readonly_fields = ('uploaded_at',)
     ordering = ('uploaded_at',)
 
-class EnrollmentInline(admin.TabularInline):
-    model = Enrollment
-    extra = 0
-    fields = ('course', 'enrolled_at', 'payment_status', 'completed')
-    readonly_fields = ('enrolled_at',)
-    can_delete = False
-
-# Custom User Admin
-class CustomUserAdmin(UserAdmin):
-    inlines = [EnrollmentInline]
-    list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'enrollment_count')
-    list_filter = ('is_staff', 'is_superuser', 'is_active', 'groups')
-    
-    def enrollment_count(self, obj):
-        return obj.enrollment_set.count()
-    enrollment_count.short_description = 'Enrollments'
-
-# First unregister the User model if it's already registered
-try:
-    admin.site.unregister(User)
-except admin.sites.NotRegistered:
-    pass
-
-# Then register with our custom admin
-admin.site.register(User, CustomUserAdmin)
-
 # Category Admin
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'created_at', 'course_count')
     search_fields = ('name', 'description')
-   
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_course_count=Count('courses'))
+
     def course_count(self, obj):
-        return obj.courses.count()
+        return obj._course_count
     course_count.short_description = 'Courses'
+    course_count.admin_order_field = '_course_count'
 
 # Course Admin
 @admin.register(Course)
-class CourseAdmin(ImportExportModelAdmin):
+class CourseAdmin(StreamingExportMixin, ImportExportModelAdmin):
     resource_class = CourseResource
     list_display = ('title', 'instructor', 'price', 'is_paid', 'student_count', 'created_at')
     list_filter = ('is_paid', 'category', 'created_at')
     search_fields = ('title', 'description', 'instructor__username')
-    filter_horizontal = ('students',)
+    # Autocomplete only renders the selected students instead of every user in the system
+    autocomplete_fields = ('students',)
     prepopulated_fields = {'slug': ('title',)}
     raw_id_fields = ('instructor',)
+    readonly_fields = ('student_roster',)
+    list_select_related = ('instructor',)
+    show_full_result_count = False
     actions = ['make_free', 'make_paid']
     
     fieldsets = (
@@ -97,13 +135,25 @@ class CourseAdmin(ImportExportModelAdmin):
             'fields': ('price', 'is_paid')
         }),
         ('Metadata', {
-            'fields': ('category', 'duration', 'students')
+            'fields': ('category', 'duration', 'students', 'student_roster')
         }),
     )
-    
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_student_count=Count('students', distinct=True))
+
     def student_count(self, obj):
-        return obj.students.count()
+        return obj._student_count
     student_count.short_description = 'Students'
+    student_count.admin_order_field = '_student_count'
+
+    def student_roster(self, obj):
+        """Link to the paginated enrollment changelist for this course"""
+        if not obj.pk:
+            return "-"
+        url = reverse('admin:courses_app_enrollment_changelist') + f"?course__id__exact={obj.pk}"
+        return format_html('<a href="{}">View enrollments ({})</a>', url, obj._student_count)
+    student_roster.short_description = 'Roster'
     
     def make_free(self, request, queryset):
         updated = queryset.update(price=0, is_paid=False)
@@ -123,6 +173,8 @@ class CourseModuleAdmin(admin.ModelAdmin):
     search_fields = ('title', 'course__title')
     ordering = ('course', 'order')
     inlines = [LessonInline]
+    autocomplete_fields = ('course',)
+    list_select_related = ('course',)
     
     fieldsets = (
         (None, {
@@ -130,9 +182,13 @@ class CourseModuleAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_lesson_count=Count('lessons'))
+
     def lesson_count(self, obj):
-        return obj.lessons.count()
+        return obj._lesson_count
     lesson_count.short_description = 'Lessons'
+    lesson_count.admin_order_field = '_lesson_count'
 
 # Lesson Admin
 @admin.register(Lesson)
@@ -143,6 +199,8 @@ class LessonAdmin(admin.ModelAdmin):
     ordering = ('module', 'order')
     inlines = [CourseMaterialInline]
     raw_id_fields = ('module',)
+    list_select_related = ('module__course',)
+    show_full_result_count = False
     
     fieldsets = (
         (None, {
@@ -157,9 +215,13 @@ class LessonAdmin(admin.ModelAdmin):
         return obj.module.course
     course.admin_order_field = 'module__course'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_material_count=Count('materials'))
+
     def material_count(self, obj):
-        return obj.materials.count()
+        return obj._material_count
     material_count.short_description = 'Materials'
+    material_count.admin_order_field = '_material_count'
 
 # Course Material Admin
 @admin.register(CourseMaterial)
@@ -169,6 +231,7 @@ class CourseMaterialAdmin(admin.ModelAdmin):
     search_fields = ('title', 'lesson__title')
     date_hierarchy = 'uploaded_at'
     raw_id_fields = ('lesson',)
+    list_select_related = ('lesson__module__course',)
     
     fieldsets = (
         (None, {
@@ -188,13 +251,15 @@ class CourseMaterialAdmin(admin.ModelAdmin):
 
 # Enrollment Admin
 @admin.register(Enrollment)
-class EnrollmentAdmin(ImportExportModelAdmin):
+class EnrollmentAdmin(StreamingExportMixin, ImportExportModelAdmin):
     resource_class = EnrollmentResource
     list_display = ('user', 'course', 'enrolled_at', 'payment_status', 'completed', 'days_since_enrollment')
     list_filter = ('payment_status', 'completed', 'course')
     search_fields = ('user__username', 'course__title', 'payment_reference')
     date_hierarchy = 'enrolled_at'
     raw_id_fields = ('user', 'course')
+    list_select_related = ('user', 'course')
+    show_full_result_count = False
     actions = ['mark_as_completed', 'mark_as_pending', 'mark_as_paid']
     
     fieldsets = (
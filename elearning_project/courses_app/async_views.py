@@ -0,0 +1,151 @@
+"""
+Async versions of the hottest read endpoints, served instead of the sync ones
+when ASYNC_VIEWS['ENABLED'] (see core_app.async_views). Each one answers
+exactly like the view it extends.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from django.shortcuts import aget_object_or_404
+from rest_framework import status
+from rest_framework.response import Response
+
+from core_app.async_views import AsyncAPIView
+from core_app.cache import cache_response
+from core_app.conditional import aobject_access, conditional_get
+from .etags import acourse_validators, alesson_validators
+from .models import Course, CourseModule, CourseProgress, Enrollment, Lesson
+from .views import (
+    CheckCourseAccessView, CourseContentListView, CourseDetailView, CourseListView, CourseProgressView,
+    LessonVideoInfoView, ACCESS_PAYMENT_STATUSES, course_access,
+)
+
+
+async def _access_enrollment_id(user, **course_lookup):
+    return await (
+        Enrollment.objects.filter(user=user, payment_status__in=ACCESS_PAYMENT_STATUSES, **course_lookup)
+        .values_list('id', flat=True)
+        .afirst()
+    )
+
+
+class AsyncCourseListView(AsyncAPIView, CourseListView):
+    """Catalog: cache hits are answered on the event loop, a miss builds the page in one thread call"""
+
+    @cache_response('catalog')
+    async def get(self, request, *args, **kwargs):
+        return await sync_to_async(self.list)(request, *args, **kwargs)
+
+
+class AsyncCourseDetailView(AsyncAPIView, CourseDetailView):
+
+    @conditional_get(lambda view, request, pk: acourse_validators(pk, request.user), access=aobject_access)
+    async def get(self, request, *args, **kwargs):
+        # the object query and the serializer's queries, in one thread call
+        return await sync_to_async(self.retrieve)(request, *args, **kwargs)
+
+
+class AsyncCourseContentListView(AsyncAPIView, CourseContentListView):
+
+    @conditional_get(
+        lambda view, request, course_id: acourse_validators(course_id, request.user),
+        access=lambda view, request, course_id: view.acheck_access(request, course_id),
+    )
+    async def get(self, request, course_id):
+        return await sync_to_async(self.content_response)(request, self.course)
+
+    async def acheck_access(self, request, course_id):
+        self.course, enrollment_id = await asyncio.gather(
+            aget_object_or_404(Course, id=course_id),
+            _access_enrollment_id(request.user, course_id=course_id),
+        )
+        if not course_access(self.course, enrollment_id)['has_access']:
+            return self.no_access_response()
+        return None
+
+
+class AsyncCheckCourseAccessView(AsyncAPIView, CheckCourseAccessView):
+
+    async def get(self, request, course_id):
+        course, enrollment_id = await asyncio.gather(
+            Course.objects.only('id', 'is_paid', 'price').filter(id=course_id).afirst(),
+            _access_enrollment_id(request.user, course_id=course_id),
+        )
+        if course is None:
+            return Response(
+                {"error": "Course not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(course_access(course, enrollment_id))
+
+
+class AsyncCourseProgressView(AsyncAPIView, CourseProgressView):
+    """Same payload as CourseProgressView from five aggregate queries, whatever the number of modules"""
+
+    async def get(self, request, course_id):
+        completed = CourseProgress.objects.filter(
+            enrollment__user=request.user, enrollment__course_id=course_id, completed=True,
+        )
+        course, enrollment, modules, completed_by_module, completed_lessons = await asyncio.gather(
+            aget_object_or_404(Course.objects.only('id', 'title'), id=course_id),
+            Enrollment.objects.filter(user=request.user, course_id=course_id).values('completed').afirst(),
+            self.modules(course_id),
+            self.completed_by_module(completed),
+            completed.acount(),
+        )
+        if enrollment is None:
+            return Response(
+                {'error': 'You are not enrolled in this course'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        total_lessons = sum(module['lesson_count'] for module in modules)
+        module_progress = []
+        for module in modules:
+            module_lessons = module['lesson_count']
+            completed_module_lessons = completed_by_module.get(module['id'], 0)
+            module_progress.append({
+                'module_id': module['id'],
+                'module_title': module['title'],
+                'completed_lessons': completed_module_lessons,
+                'total_lessons': module_lessons,
+                'progress': (completed_module_lessons / module_lessons * 100) if module_lessons > 0 else 0
+            })
+
+        return Response({
+            'course_id': course.id,
+            'course_title': course.title,
+            'total_lessons': total_lessons,
+            'completed_lessons': completed_lessons,
+            'progress_percentage': (completed_lessons / total_lessons) * 100 if total_lessons > 0 else 0,
+            'is_completed': enrollment['completed'],
+            'module_progress': module_progress
+        })
+
+    async def modules(self, course_id):
+        modules = CourseModule.objects.filter(course_id=course_id).annotate(lesson_count=Count('lessons'))
+        return [module async for module in modules.values('id', 'title', 'lesson_count')]
+
+    async def completed_by_module(self, completed):
+        rows = completed.values('lesson__module').annotate(count=Count('id')).values_list('lesson__module', 'count')
+        return {module_id: count async for module_id, count in rows}
+
+
+class AsyncLessonVideoInfoView(AsyncAPIView, LessonVideoInfoView):
+
+    @conditional_get(
+        lambda view, request, lesson_id: alesson_validators(request.user, pk=lesson_id),
+        access=lambda view, request, lesson_id: view.acheck_access(request, lesson_id),
+    )
+    async def get(self, request, lesson_id):
+        return Response(self.video_info(request, self.lesson))
+
+    async def acheck_access(self, request, lesson_id):
+        self.lesson, enrollment_id = await asyncio.gather(
+            aget_object_or_404(Lesson.objects.select_related('module__course'), id=lesson_id),
+            _access_enrollment_id(request.user, course__modules__lessons=lesson_id),
+        )
+        if not course_access(self.lesson.module.course, enrollment_id)['has_access']:
+            return self.no_access_response()
+        return None
@@ -0,0 +1,154 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, router, transaction
+
+from core_app.jobs import task
+from core_app.models import Job
+from .models import Course, CourseModule, Lesson, CourseMaterial
+
+
+def clone_batch_size():
+    return getattr(settings, 'COURSE_CLONE_BATCH_SIZE', 500)
+
+
+def _bulk_insert(model, objs):
+    """
+    bulk_create the given unsaved objects and make sure every one of them has a pk.
+
+    Backends that can't return rows from a bulk insert (e.g. MySQL) get one
+    INSERT per object instead: reading the ids back afterwards could pick up
+    rows inserted concurrently by someone else.
+    """
+    if not objs:
+        return objs
+    connection = connections[router.db_for_write(model)]
+    if not connection.features.can_return_rows_from_bulk_insert:
+        for obj in objs:
+            obj.save(force_insert=True)
+        return objs
+    return model.objects.bulk_create(objs, batch_size=clone_batch_size())
+
+
+def clone_course(course, instructor=None, title=None, progress=None):
+    """
+    Deep copy a course with its modules, lessons, materials and the
+    lesson <-> material links in a fixed number of queries.
+
+    Files (course image, lesson videos/thumbnails, material files) are shared by
+    reference: the copy points at the same storage names, nothing is re-uploaded.
+    Students, enrollments and progress are not copied.
+
+    ``progress`` is an optional callable ``progress(stage, done, total)``.
+    """
+    def report(stage, done, total):
+        if progress:
+            progress(stage, done, total)
+
+    with transaction.atomic():
+        modules = list(CourseModule.objects.filter(course=course).order_by('id'))
+        lessons = list(Lesson.objects.filter(module__course=course).order_by('id'))
+        materials = list(CourseMaterial.objects.filter(lesson__module__course=course).order_by('id'))
+        links = list(
+            Lesson.materials.through.objects.filter(lesson__module__course=course)
+            .values_list('lesson_id', 'coursematerial_id')
+        )
+        total = 1 + len(modules) + len(lessons) + len(materials) + len(links)
+        done = 0
+
+        # Course row - save() takes care of a unique slug
+        new_course = Course.objects.get(pk=course.pk)
+        new_course.pk = None
+        new_course.id = None
+        new_course._state.adding = True
+        new_course.slug = ''
+        new_course.title = title or f"{course.title} (Copy)"
+        new_course.status = 'draft'
+        new_course.featured = False
+        if instructor is not None:
+            new_course.instructor = instructor
+        new_course.save()
+        done += 1
+        report('course', done, total)
+
+        # Modules
+        old_module_ids = [module.id for module in modules]
+        for module in modules:
+            module.pk = None
+            module.course = new_course
+        module_map = dict(zip(old_module_ids, (m.id for m in _bulk_insert(CourseModule, modules))))
+        done += len(modules)
+        report('modules', done, total)
+
+        # Lessons
+        old_lesson_ids = [lesson.id for lesson in lessons]
+        for lesson in lessons:
+            lesson.pk = None
+            lesson.module_id = module_map[lesson.module_id]
+        lesson_map = dict(zip(old_lesson_ids, (l.id for l in _bulk_insert(Lesson, lessons))))
+        done += len(lessons)
+        report('lessons', done, total)
+
+        # Materials (file names are copied as-is, so storage is shared)
+        old_material_ids = [material.id for material in materials]
+        for material in materials:
+            material.pk = None
+            material.lesson_id = lesson_map[material.lesson_id]
+        material_map = dict(zip(old_material_ids, (m.id for m in _bulk_insert(CourseMaterial, materials))))
+        done += len(materials)
+        report('materials', done, total)
+
+        # Lesson.materials M2M - materials from other courses keep pointing at the original
+        Through = Lesson.materials.through
+        Through.objects.bulk_create(
+            [
+                Through(
+                    lesson_id=lesson_map[lesson_id],
+                    coursematerial_id=material_map.get(material_id, material_id),
+                )
+                for lesson_id, material_id in links
+            ],
+            batch_size=clone_batch_size(),
+        )
+        done += len(links)
+        report('links', done, total)
+
+    return new_course
+
+
+@task(bind=True)
+def clone_course_job(job, course_id, instructor_id, title=None):
+    """clone_course as a background job; progress goes to job.progress"""
+    course = Course.objects.get(pk=course_id)
+    instructor = get_user_model().objects.get(pk=instructor_id)
+
+    def progress(stage, done, total):
+        job.set_progress(stage=stage, done=done, total=total)
+
+    new_course = clone_course(course, instructor=instructor, title=title, progress=progress)
+    return {'new_course_id': new_course.id}
+
+
+def _clone_job_status(job):
+    result = job.result or {}
+    progress = job.live_progress
+    return {
+        'id': job.id,
+        'course_id': job.args[0],
+        'owner_id': job.owner_id,
+        'status': job.status,
+        'stage': progress.get('stage'),
+        'done': progress.get('done', 0),
+        'total': progress.get('total', 0),
+        'new_course_id': result.get('new_course_id'),
+        'error': job.error or None,
+    }
+
+
+def get_clone_job(job_id):
+    job = Job.objects.filter(pk=job_id, name=clone_course_job.name).first()
+    return _clone_job_status(job) if job else None
+
+
+def start_clone_job(course, instructor, title=None):
+    """Queue clone_course as a background job and return its status"""
+    return _clone_job_status(clone_course_job.enqueue(course.id, instructor.id, title, owner=instructor))
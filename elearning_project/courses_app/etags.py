@@ -0,0 +1,104 @@
+"""
+ETag / Last-Modified validators of course resources (see core_app.conditional).
+
+Course content is versioned by Course.version / Course.updated_at, which every
+change to the course, its modules, lessons, materials and students bumps.
+Payloads that include the requesting user's enrollment or progress add a
+marker of that state, so each validator costs one or two small queries
+instead of a full serialization. Those per-user validators have no
+Last-Modified: enrolling, paying or completing a lesson need not move any
+timestamp, so If-Modified-Since alone would answer 304 with stale progress. The a-prefixed functions are their async ORM
+versions, for courses_app.async_views.
+"""
+import asyncio
+
+from django.db.models import Count, Max, Q
+
+from .models import Category, Course, Enrollment
+
+
+def _learner_state(course_id, user):
+    return (
+        Enrollment.objects.filter(user=user, course_id=course_id)
+        .annotate(
+            _progress=Count('progress'),
+            _completed=Count('progress', filter=Q(progress__completed=True)),
+            _last=Max('progress__last_accessed'),
+        )
+        .values_list('id', 'payment_status', 'completed', '_progress', '_completed', '_last')
+    )
+
+
+def learner_marker(course_id, user):
+    """Changes whenever the user's enrollment or progress in the course changes"""
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    return (user.pk, list(_learner_state(course_id, user)))
+
+
+async def alearner_marker(course_id, user):
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    return (user.pk, await _alist(_learner_state(course_id, user)))
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def _course_rows(courses):
+    return courses.values_list('id', 'version', 'updated_at').distinct()[:2]
+
+
+def _result(rows, marker):
+    if len(rows) != 1:
+        return None  # let the view answer 404 (or fail as it would without validators)
+    course_id, version, updated_at = rows[0]
+    parts = ('course', course_id, version, updated_at.isoformat(), marker)
+    return parts, updated_at if marker == 'anonymous' else None
+
+
+def _validators(courses, user):
+    rows = list(_course_rows(courses))
+    return _result(rows, learner_marker(rows[0][0], user) if len(rows) == 1 else None)
+
+
+async def _avalidators(courses, user):
+    rows = await _alist(_course_rows(courses))
+    return _result(rows, await alearner_marker(rows[0][0], user) if len(rows) == 1 else None)
+
+
+def _lesson_courses(lesson_lookups):
+    return Course.objects.filter(**{f'modules__lessons__{field}': value for field, value in lesson_lookups.items()})
+
+
+def course_validators(course_id, user):
+    return _validators(Course.objects.filter(pk=course_id), user)
+
+
+async def acourse_validators(course_id, user):
+    """course_validators() on the async ORM: the course id is known, so both queries run at once"""
+    rows, marker = await asyncio.gather(
+        _alist(_course_rows(Course.objects.filter(pk=course_id))), alearner_marker(course_id, user),
+    )
+    return _result(rows, marker)
+
+
+def lesson_validators(user, **lesson_lookups):
+    """Validators of a lesson payload: the content version of its course"""
+    return _validators(_lesson_courses(lesson_lookups), user)
+
+
+async def alesson_validators(user, **lesson_lookups):
+    return await _avalidators(_lesson_courses(lesson_lookups), user)
+
+
+def module_validators(module_id, user):
+    return _validators(Course.objects.filter(modules=module_id), user)
+
+
+def category_list_validators():
+    categories = Category.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+    courses = Course.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+    stamps = [stamp for stamp in (categories['last'], courses['last']) if stamp]
+    return ('categories', categories['count'], courses['count'], *stamps), max(stamps, default=None)
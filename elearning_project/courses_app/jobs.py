@@ -0,0 +1,24 @@
+"""Background tasks of courses_app, found by the job workers (core_app.jobs)"""
+from django.utils import timezone
+
+from core_app.cache import cache_layer
+from core_app.jobs import periodic_task
+from .cloning import clone_course_job  # noqa: F401
+from .exports import export_file_job  # noqa: F401
+from .models import Course
+
+
+@periodic_task(every=300)
+def expire_discounts():
+    """
+    Switch off discounts past their discount_expiry. current_price already
+    ignores them, but has_discount and the cached catalog would not.
+    """
+    expired = list(
+        Course.objects.filter(has_discount=True, discount_expiry__lte=timezone.now()).values_list('id', flat=True)
+    )
+    if expired:
+        Course.objects.filter(pk__in=expired).update(has_discount=False)
+        Course.touch(pk__in=expired)
+        cache_layer.invalidate_namespace('catalog')
+    return {'expired': len(expired)}
@@ -0,0 +1,281 @@
+import bisect
+import itertools
+import random
+import time
+from array import array
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from courses_app.models import (
+    Category, Course, CourseModule, Lesson, CourseMaterial, Enrollment, CourseProgress
+)
+
+User = get_user_model()
+
+COURSE_IMAGES = [
+    'course_images/python.jpg', 'course_images/django.png', 'course_images/vue11.png',
+    'course_images/mobile.webp', 'course_images/tailwind-thumb.jpg', 'course_images/download_2.jpg',
+]
+MATERIAL_FILE = 'course_materials/deep_learning_module_7_lesson_2.pdf'
+WORDS = (
+    'python django vue react data machine learning web design cloud security mobile '
+    'testing devops sql api async deep advanced practical modern complete intro'
+).split()
+PAID_STATUSES = (['completed'] * 70) + (['pending'] * 20) + (['failed'] * 7) + (['refunded'] * 3)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset (users, courses, content, enrollments, progress) "
+        "with bulk inserts for load and scale testing. Deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--instructors', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--courses', type=int, default=1000)
+        parser.add_argument('--modules', type=int, default=6, help="Modules per course")
+        parser.add_argument('--lessons', type=int, default=8, help="Lessons per module")
+        parser.add_argument('--enrollments', type=int, default=100000)
+        parser.add_argument('--progress-ratio', type=float, default=0.5,
+                            help="Average fraction of a course's lessons each learner has progress rows for")
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help="Zipf exponent of course popularity (0 = uniform)")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='scale', help="Prefix for generated usernames, slugs and names")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.started = time.monotonic()
+
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(f"Data with prefix '{self.prefix}' already exists, use another --prefix.")
+
+        instructor_ids = self.create_users(options['instructors'], role='instructor')
+        student_ids = self.create_users(options['users'], role='student')
+        category_ids = self.create_categories(options['categories'])
+        courses = self.create_courses(options['courses'], instructor_ids, category_ids)
+        lesson_ids = self.create_content(courses, options['modules'], options['lessons'])
+        self.create_enrollments(
+            student_ids, courses, lesson_ids,
+            options['enrollments'], options['progress_ratio'], options['skew'],
+        )
+        self.log(f"Done in {time.monotonic() - self.started:.1f}s")
+
+    def log(self, message):
+        self.stdout.write(f"[{time.monotonic() - self.started:7.1f}s] {message}")
+
+    def bulk_insert(self, model, objs):
+        """bulk_create in batches and return the new primary keys as a compact array"""
+        ids = array('q')
+        for batch in batched(objs, self.batch_size):
+            with transaction.atomic():
+                ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        return ids
+
+    def create_users(self, count, role):
+        password = make_password('password')  # hashed once, not per user
+        objs = (
+            User(
+                username=f"{self.prefix}_{role}_{n}",
+                email=f"{self.prefix}_{role}_{n}@example.com",
+                first_name=self.rng.choice(WORDS).title(),
+                last_name=self.rng.choice(WORDS).title(),
+                password=password,
+                role=role,
+                is_instructor=role == 'instructor',
+            )
+            for n in range(count)
+        )
+        ids = self.bulk_insert(User, objs)
+        self.log(f"{len(ids)} {role}s")
+        return ids
+
+    def create_categories(self, count):
+        ids = self.bulk_insert(Category, (
+            Category(name=f"{self.prefix} category {n}", description=f"Category {n}") for n in range(count)
+        ))
+        self.log(f"{len(ids)} categories")
+        return ids
+
+    def create_courses(self, count, instructor_ids, category_ids):
+        """Returns a list of (course_id, is_paid) in creation order (index = popularity rank)"""
+        rng = self.rng
+
+        def build(n):
+            is_paid = rng.random() < 0.6
+            price = Decimal(rng.choice([19, 29, 49, 99, 149])) if is_paid else Decimal(0)
+            title = ' '.join(rng.choice(WORDS) for _ in range(3)).title()
+            return Course(
+                title=title,
+                subtitle=f"{title} from scratch",
+                slug=f"{self.prefix}-course-{n}",
+                description=' '.join(rng.choice(WORDS) for _ in range(80)),
+                price=price,
+                is_paid=is_paid,
+                instructor_id=rng.choice(instructor_ids),
+                category_id=rng.choice(category_ids) if category_ids else None,
+                duration=rng.randint(2, 60),
+                status='published' if rng.random() < 0.85 else rng.choice(['draft', 'pending', 'archived']),
+                level=rng.choice(['beginner', 'intermediate', 'advanced', 'all']),
+                learning_objectives=[f"Objective {i}" for i in range(4)],
+                prerequisites=["Basic computer skills"],
+                target_audience=["Developers"],
+                welcome_message="Welcome!",
+                completion_message="Congratulations!",
+                featured=rng.random() < 0.05,
+                image=rng.choice(COURSE_IMAGES),
+            )
+
+        courses = []
+        for batch in batched((build(n) for n in range(count)), self.batch_size):
+            with transaction.atomic():
+                courses.extend((c.pk, c.is_paid) for c in Course.objects.bulk_create(batch))
+        self.log(f"{len(courses)} courses")
+        return courses
+
+    def create_content(self, courses, modules_per_course, lessons_per_module):
+        """Create modules, lessons and one material per lesson; returns {course_id: array(lesson ids)}"""
+        rng = self.rng
+        lesson_ids = {}
+        total_lessons = 0
+        Through = Lesson.materials.through
+
+        for course_batch in batched(courses, max(1, self.batch_size // max(1, modules_per_course))):
+            with transaction.atomic():
+                modules = CourseModule.objects.bulk_create([
+                    CourseModule(course_id=course_id, title=f"Module {m + 1}", order=(m + 1) * 1024, is_published=True)
+                    for course_id, _ in course_batch for m in range(modules_per_course)
+                ])
+                lessons = []
+                for module in modules:
+                    lessons.extend(
+                        Lesson(
+                            module_id=module.pk,
+                            title=f"Lesson {l + 1}: {rng.choice(WORDS)}",
+                            order=(l + 1) * 1024,
+                            video_url=f"https://videos.example.com/{module.pk}/{l}.mp4",
+                            content=' '.join(rng.choice(WORDS) for _ in range(60)),
+                            duration=rng.randint(3, 25),
+                            is_published=True,
+                            is_preview=l == 0,
+                        )
+                        for l in range(lessons_per_module)
+                    )
+                lessons = Lesson.objects.bulk_create(lessons, batch_size=self.batch_size)
+                materials = CourseMaterial.objects.bulk_create(
+                    [CourseMaterial(lesson_id=lesson.pk, file=MATERIAL_FILE, title="Slides") for lesson in lessons],
+                    batch_size=self.batch_size,
+                )
+                Through.objects.bulk_create(
+                    [Through(lesson_id=m.lesson_id, coursematerial_id=m.pk) for m in materials],
+                    batch_size=self.batch_size,
+                )
+
+            module_course = {module.pk: module.course_id for module in modules}
+            for lesson in lessons:
+                lesson_ids.setdefault(module_course[lesson.module_id], array('q')).append(lesson.pk)
+            total_lessons += len(lessons)
+
+        self.log(f"{len(courses) * modules_per_course} modules, {total_lessons} lessons and materials")
+        return lesson_ids
+
+    def create_enrollments(self, student_ids, courses, lesson_ids, total, progress_ratio, skew):
+        """
+        Enroll students with Zipf-skewed course popularity and write progress rows
+        batch by batch, so memory stays flat however many rows are generated.
+        """
+        rng = self.rng
+        cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** skew for rank in range(len(courses))))
+        top = cum_weights[-1]
+
+        def pick_course():
+            return bisect.bisect_left(cum_weights, rng.random() * top)
+
+        def enrollment_rows():
+            remaining = total
+            per_user = max(1, -(-total // max(1, len(student_ids))))
+            for user_id in student_ids:
+                if remaining <= 0:
+                    return
+                count = min(remaining, len(courses), rng.randint(1, per_user * 2 - 1))
+                chosen = set()
+                attempts = 0
+                while len(chosen) < count and attempts < count * 20:
+                    chosen.add(pick_course())
+                    attempts += 1
+                for index in chosen:
+                    course_id, is_paid = courses[index]
+                    status = rng.choice(PAID_STATUSES) if is_paid else 'free'
+                    yield user_id, course_id, status
+                remaining -= len(chosen)
+
+        now = timezone.now()
+        Students = Course.students.through
+        enrollment_count = progress_count = 0
+        for batch in batched(enrollment_rows(), self.batch_size):
+            with transaction.atomic():
+                enrollments = Enrollment.objects.bulk_create([
+                    Enrollment(
+                        user_id=user_id, course_id=course_id, payment_status=status,
+                        amount_paid=None if status == 'free' else Decimal('49.00'),
+                        payment_reference=None if status == 'free' else f"{self.prefix}-{user_id}-{course_id}",
+                    )
+                    for user_id, course_id, status in batch
+                ])
+                Students.objects.bulk_create([
+                    Students(course_id=e.course_id, customuser_id=e.user_id)
+                    for e in enrollments if e.payment_status in ('free', 'completed')
+                ], batch_size=self.batch_size)
+
+                progress = []
+                completed_enrollments = []
+                for enrollment in enrollments:
+                    course_lessons = lesson_ids.get(enrollment.course_id, ())
+                    if not course_lessons or enrollment.payment_status in ('failed', 'refunded'):
+                        continue
+                    # skewed towards learners who only started the course
+                    share = min(1.0, rng.random() ** 2 * progress_ratio * 3)
+                    seen = int(len(course_lessons) * share)
+                    all_completed = seen == len(course_lessons)
+                    for lesson_id in course_lessons[:seen]:
+                        completed = rng.random() < 0.9
+                        all_completed = all_completed and completed
+                        progress.append(CourseProgress(
+                            enrollment_id=enrollment.pk,
+                            lesson_id=lesson_id,
+                            completed=completed,
+                            completed_at=now if completed else None,
+                            time_spent=rng.randint(30, 1800),
+                        ))
+                    if all_completed:
+                        completed_enrollments.append(enrollment.pk)
+                    if len(progress) >= self.batch_size:
+                        CourseProgress.objects.bulk_create(progress)
+                        progress_count += len(progress)
+                        progress = []
+                CourseProgress.objects.bulk_create(progress)
+                progress_count += len(progress)
+                if completed_enrollments:
+                    Enrollment.objects.filter(pk__in=completed_enrollments).update(completed=True, completed_at=now)
+
+            enrollment_count += len(enrollments)
+            self.log(f"{enrollment_count} enrollments, {progress_count} progress rows")
@@ -1,14 +1,22 @@
-from django.db import models
+import functools
+import operator
+
+from django.db import models, router
 from django.conf import settings
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 import json
 from django.utils import timezone
+from core_app.querycache import CachingQuerySet
+from core_app.transactions import commit_batch
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CachingQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -72,6 +80,33 @@ class Course(models.Model):
     is_public = models.BooleanField(default=True)
     allow_enrollment = models.BooleanField(default=True)
 
+    # Bumped with every change to the course or its modules, lessons, materials
+    # and students; the ETag of course resources is derived from it.
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = CachingQuerySet.as_manager()
+
+    @classmethod
+    def touch(cls, **lookups):
+        """
+        Bump version and updated_at of the courses matching ``lookups`` after
+        their content changed. Inside a transaction the lookups are collected
+        and every course is bumped once, by one UPDATE when it commits: a bulk
+        edit of lessons does not write the course row per lesson.
+        """
+        batch = commit_batch('course-touch', cls._touch, router.db_for_write(cls))
+        if batch is None:
+            cls._touch([models.Q(**lookups)])
+        else:
+            batch.append(models.Q(**lookups))
+
+    @classmethod
+    def _touch(cls, conditions):
+        cls.objects.filter(functools.reduce(operator.or_, conditions)).update(
+            version=models.F('version') + 1, updated_at=timezone.now(),
+        )
+
     def __str__(self):
         return self.title
 
@@ -160,7 +195,9 @@ class CourseModule(models.Model):
     order = models.PositiveIntegerField(default=0)
     description = models.TextField(blank=True, null=True)
     is_published = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachingQuerySet.as_manager()
 
     class Meta:
         ordering = ['order']
@@ -184,6 +221,9 @@ class Lesson(models.Model):
     is_preview = models.BooleanField(default=False)
     thumbnail = models.ImageField(upload_to='lesson_thumbnails/', null=True, blank=True)
     materials = models.ManyToManyField('CourseMaterial', related_name='lessons', blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CachingQuerySet.as_manager()
 
     @property
     def video_source(self):
@@ -209,6 +249,8 @@ class CourseMaterial(models.Model):
     description = models.TextField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CachingQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -230,6 +272,8 @@ class Enrollment(models.Model):
     payment_reference = models.CharField(max_length=100, blank=True, null=True)
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         unique_together = ['user', 'course']
 
@@ -0,0 +1,98 @@
+from django.db import transaction
+
+# Spacing between consecutive order values, so a single move can usually be
+# written as one row taking a value between its new neighbours.
+ORDER_GAP = 1024
+
+
+def _longest_increasing_run(values):
+    """Indexes of a longest strictly increasing subsequence of values"""
+    tails, tails_idx, parents = [], [], [None] * len(values)
+    for i, value in enumerate(values):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        parents[i] = tails_idx[lo - 1] if lo else None
+        if lo == len(tails):
+            tails.append(value)
+            tails_idx.append(i)
+        else:
+            tails[lo] = value
+            tails_idx[lo] = i
+    keep = set()
+    i = tails_idx[-1] if tails_idx else None
+    while i is not None:
+        keep.add(i)
+        i = parents[i]
+    return keep
+
+
+def gap_orders(current):
+    """
+    Given the current order values of items listed in their *new* sequence,
+    return new order values that sort in that sequence while changing as few
+    items as possible.
+
+    Items that are already in relative order keep their value; the rest take
+    evenly spaced values between their new neighbours. When there is no room
+    left between two neighbours the whole list is renumbered with ORDER_GAP spacing.
+    """
+    keep = _longest_increasing_run(current)
+    new = list(current)
+    i = 0
+    while i < len(current):
+        if i in keep:
+            i += 1
+            continue
+        start = i
+        while i < len(current) and i not in keep:
+            i += 1
+        lo = new[start - 1] if start > 0 else -1
+        count = i - start
+        if i < len(current):
+            step = (current[i] - lo) // (count + 1)
+            if step < 1:
+                return [(n + 1) * ORDER_GAP for n in range(len(current))]
+        else:
+            step = ORDER_GAP
+        for n in range(count):
+            new[start + n] = lo + step * (n + 1)
+    return new
+
+
+def apply_order(model, objects, ordered_ids, unique=False):
+    """
+    Reorder ``objects`` (instances of ``model``) to follow ``ordered_ids`` with
+    bulk_update. Returns the list of objects whose order changed.
+
+    With ``unique=True`` (e.g. CourseModule's unique (course, order)) rows that
+    would collide with another row's old value are first parked on free values.
+    """
+    by_id = {obj.id: obj for obj in objects}
+    sequence = [by_id[pk] for pk in ordered_ids]
+    new_orders = gap_orders([obj.order for obj in sequence])
+
+    changed, old_values = [], set()
+    for obj, order in zip(sequence, new_orders):
+        if obj.order != order:
+            old_values.add(obj.order)
+            obj.order = order
+            changed.append(obj)
+    if not changed:
+        return changed
+
+    with transaction.atomic():
+        if unique and old_values & {obj.order for obj in changed}:
+            final = [obj.order for obj in changed]
+            parking = max(old_values | set(new_orders)) + 1
+            for n, obj in enumerate(changed):
+                obj.order = parking + n
+            model.objects.bulk_update(changed, ['order'])
+            for obj, order in zip(changed, final):
+                obj.order = order
+        model.objects.bulk_update(changed, ['order'])
+    return changed
@@ -1,7 +1,91 @@
 from rest_framework import serializers
 from .models import Course, Category, CourseModule, Lesson, CourseMaterial, Enrollment, CourseProgress
+from django.db.models import Exists, Func, IntegerField, OuterRef, Subquery
 from django.utils import timezone
 from django.contrib.humanize.templatetags.humanize import naturaltime
+from core_app.fieldsets import DynamicFieldsMixin
+
+# Columns read by the Course properties, for Meta.field_columns (see core_app.columns)
+CURRENT_PRICE_COLUMNS = ['price', 'has_discount', 'discount_price', 'discount_expiry']
+IS_AVAILABLE_COLUMNS = ['allow_enrollment', 'max_students', 'status']
+
+
+# Annotations for Meta.field_annotations (see core_app.fieldsets): one subquery
+# per page instead of one query per row. The method fields fall back to their
+# own queries when the instance was not loaded through a SparseFieldsMixin view.
+
+def count_of(queryset):
+    """COUNT(*) of ``queryset``, correlated through its OuterRef filters"""
+    return Subquery(
+        queryset.order_by().annotate(count=Func('pk', function='COUNT')).values('count'),
+        output_field=IntegerField(),
+    )
+
+
+def _authenticated_user(request):
+    if request is not None and request.user.is_authenticated:
+        return request.user
+    return None
+
+
+def student_count_annotations(request):
+    return {'student_total': count_of(Course.students.through.objects.filter(course=OuterRef('pk')))}
+
+
+def enrollment_count_annotations(request):
+    return {'active_enrollments': count_of(Enrollment.objects.filter(
+        course=OuterRef('pk'), payment_status__in=['paid', 'completed', 'free'],
+    ))}
+
+
+def is_enrolled_annotations(request):
+    user = _authenticated_user(request)
+    if user is None:
+        return {}
+    return {'user_enrolled': Exists(Course.objects.filter(pk=OuterRef('pk'), students=user))}
+
+
+def course_progress_annotations(request):
+    user = _authenticated_user(request)
+    if user is None:
+        return {}
+    return {
+        **is_enrolled_annotations(request),
+        'lesson_total': count_of(Lesson.objects.filter(module__course=OuterRef('pk'))),
+        'user_completed_lessons': count_of(CourseProgress.objects.filter(
+            enrollment__user=user, enrollment__course=OuterRef('pk'), completed=True,
+        )),
+    }
+
+
+def module_progress_annotations(request):
+    user = _authenticated_user(request)
+    if user is None:
+        return {}
+    return {
+        'lesson_total': count_of(Lesson.objects.filter(module=OuterRef('pk'))),
+        'user_completed_lessons': count_of(CourseProgress.objects.filter(
+            enrollment__user=user, enrollment__course=OuterRef('course_id'), lesson__module=OuterRef('pk'),
+            completed=True,
+        )),
+    }
+
+
+def lesson_completed_annotations(request):
+    user = _authenticated_user(request)
+    if user is None:
+        return {}
+    return {'user_completed': Exists(CourseProgress.objects.filter(
+        enrollment__user=user, enrollment__course=OuterRef('module__course_id'), lesson=OuterRef('pk'),
+        completed=True,
+    ))}
+
+
+def enrollment_progress_annotations(request):
+    return {
+        'total_lessons': count_of(Lesson.objects.filter(module__course=OuterRef('course_id'))),
+        'completed_lessons': count_of(CourseProgress.objects.filter(enrollment=OuterRef('pk'), completed=True)),
+    }
 
 class CategorySerializer(serializers.ModelSerializer):
     course_count = serializers.SerializerMethodField()
@@ -9,12 +93,13 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'created_at', 'course_count']
+        field_columns = {'course_count': []}
 
     def get_course_count(self, obj):
         return obj.courses.filter(status='published').count()
     
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Main Course Serializer that handles all course operations"""
     
     # Basic fields
@@ -84,6 +169,29 @@ class CourseSerializer(serializers.ModelSerializer):
             'prerequisites': {'write_only': False},
             'target_audience': {'write_only': False},
         }
+        # ?expand=category, see core_app.fieldsets
+        expandable_fields = {'category': (CategorySerializer, {})}
+        related_fields = {'instructor_full_name': ['instructor']}
+        field_columns = {
+            'instructor_full_name': ['instructor_id'],
+            'student_count': [],
+            'enrollment_count': [],
+            'current_price': CURRENT_PRICE_COLUMNS,
+            'is_available': IS_AVAILABLE_COLUMNS,
+            'is_enrolled': [],
+            'progress': [],
+            'rating': [],
+            'image_url': ['image'],
+            'created_at_natural': ['created_at'],
+            'discount_expiry_natural': ['discount_expiry'],
+            'modules': [],
+        }
+        field_annotations = {
+            'student_count': student_count_annotations,
+            'enrollment_count': enrollment_count_annotations,
+            'is_enrolled': is_enrolled_annotations,
+            'progress': course_progress_annotations,
+        }
 
     def get_instructor_full_name(self, obj):
         """Get instructor's full name"""
@@ -93,10 +201,14 @@ class CourseSerializer(serializers.ModelSerializer):
 
     def get_student_count(self, obj):
         """Get count of enrolled students"""
+        if hasattr(obj, 'student_total'):
+            return obj.student_total
         return obj.students.count()
 
     def get_enrollment_count(self, obj):
         """Get count of active enrollments"""
+        if hasattr(obj, 'active_enrollments'):
+            return obj.active_enrollments
         return Enrollment.objects.filter(course=obj, payment_status__in=['paid', 'completed', 'free']).count()
 
     def get_current_price(self, obj):
@@ -107,6 +219,8 @@ class CourseSerializer(serializers.ModelSerializer):
         """Check if current user is enrolled in the course"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'user_enrolled'):
+                return obj.user_enrolled
             return obj.students.filter(id=request.user.id).exists()
         return False
 
@@ -114,16 +228,18 @@ class CourseSerializer(serializers.ModelSerializer):
         """Get user's progress in the course"""
         request = self.context.get('request')
         if request and request.user.is_authenticated and self.get_is_enrolled(obj):
-            total_lessons = Lesson.objects.filter(module__course=obj).count()
+            if hasattr(obj, 'lesson_total'):
+                total_lessons, completed_lessons = obj.lesson_total, obj.user_completed_lessons
+            else:
+                total_lessons = Lesson.objects.filter(module__course=obj).count()
+                completed_lessons = CourseProgress.objects.filter(
+                    enrollment__user=request.user,
+                    enrollment__course=obj,
+                    completed=True
+                ).count()
             if total_lessons == 0:
                 return 0
             
-            completed_lessons = CourseProgress.objects.filter(
-                enrollment__user=request.user,
-                enrollment__course=obj,
-                completed=True
-            ).count()
-            
             return int((completed_lessons / total_lessons) * 100)
         return 0
 
@@ -158,7 +274,7 @@ class CourseSerializer(serializers.ModelSerializer):
             return CourseModuleSerializer(
                 obj.prefetched_modules, 
                 many=True, 
-                context=self.context
+                context=self.nested_context('modules')
             ).data
         return None
 
@@ -259,7 +375,7 @@ class CourseSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class CourseMaterialSerializer(serializers.ModelSerializer):
+class CourseMaterialSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
     file_size = serializers.SerializerMethodField()
 
@@ -267,6 +383,7 @@ class CourseMaterialSerializer(serializers.ModelSerializer):
         model = CourseMaterial
         fields = ['id', 'title', 'file', 'file_url', 'file_size', 'description', 'uploaded_at']
         read_only_fields = ['uploaded_at']
+        field_columns = {'file_url': ['file'], 'file_size': ['file']}
 
     def get_file_url(self, obj):
         if obj.file:
@@ -278,13 +395,16 @@ class CourseMaterialSerializer(serializers.ModelSerializer):
             return obj.file.size
         return None
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     materials = CourseMaterialSerializer(many=True, read_only=True)
     is_completed = serializers.SerializerMethodField()
 
     class Meta:
         model = Lesson
         fields = ['id', 'title', 'order', 'video_url', 'content', 'duration', 'materials', 'is_completed', 'is_published', 'is_preview', 'thumbnail', 'video_file']
+        related_fields = {'is_completed': ['module__course']}
+        field_columns = {'is_completed': ['module_id']}
+        field_annotations = {'is_completed': lesson_completed_annotations}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -296,6 +416,8 @@ class LessonSerializer(serializers.ModelSerializer):
     def get_is_completed(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'user_completed'):
+                return obj.user_completed
             # Check if user has completed this lesson
             progress = CourseProgress.objects.filter(
                 enrollment__user=request.user,
@@ -306,17 +428,25 @@ class LessonSerializer(serializers.ModelSerializer):
             return progress is not None
         return False
 
-class CourseModuleSerializer(serializers.ModelSerializer):
+class CourseModuleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
     progress = serializers.SerializerMethodField()
 
     class Meta:
         model = CourseModule
         fields = ['id', 'title', 'order', 'description', 'lessons', 'progress', 'is_published']
+        related_fields = {'progress': ['course']}
+        field_columns = {'progress': ['course_id']}
+        field_annotations = {'progress': module_progress_annotations}
 
     def get_progress(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'lesson_total'):
+                if obj.lesson_total == 0:
+                    return 0
+                return int((obj.user_completed_lessons / obj.lesson_total) * 100)
+
             # Calculate progress for this module
             total_lessons = obj.lessons.count()
             if total_lessons == 0:
@@ -332,7 +462,7 @@ class CourseModuleSerializer(serializers.ModelSerializer):
             return int((completed_lessons / total_lessons) * 100)
         return 0
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for course listings (minimal data)"""
     instructor_name = serializers.CharField(source='instructor.username')
     category_name = serializers.CharField(source='category.name', allow_null=True)
@@ -348,8 +478,12 @@ class CourseListSerializer(serializers.ModelSerializer):
             'category_name', 'level', 'duration', 'student_count', 'rating',
             'status', 'featured', 'created_at'
         ]
+        field_columns = {'current_price': CURRENT_PRICE_COLUMNS, 'student_count': [], 'rating': []}
+        field_annotations = {'student_count': student_count_annotations}
 
     def get_student_count(self, obj):
+        if hasattr(obj, 'student_total'):
+            return obj.student_total
         return obj.students.count()
 
     def get_rating(self, obj):
@@ -359,7 +493,7 @@ class CourseListSerializer(serializers.ModelSerializer):
     def get_current_price(self, obj):
         return obj.current_price
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for detailed course view"""
     instructor = serializers.ReadOnlyField(source='instructor.username')
     instructor_full_name = serializers.SerializerMethodField()
@@ -383,9 +517,25 @@ class CourseDetailSerializer(serializers.ModelSerializer):
             'learning_objectives', 'prerequisites', 'target_audience',
             'welcome_message', 'completion_message', 'certificate_available',
             'featured', 'max_students', 'currency', 'is_public', 'allow_enrollment',
-            'is_available', 'is_published', 'modules', 'created_at'
+            'is_available'
         ]
         read_only_fields = ['slug', 'created_at', 'instructor']
+        expandable_fields = {'category': (CategorySerializer, {})}
+        related_fields = {'instructor_full_name': ['instructor']}
+        field_columns = {
+            'instructor_full_name': ['instructor_id'],
+            'enrollment_count': [],
+            'image': ['image'],
+            'is_enrolled': [],
+            'progress': [],
+            'current_price': CURRENT_PRICE_COLUMNS,
+            'is_available': IS_AVAILABLE_COLUMNS,
+        }
+        field_annotations = {
+            'enrollment_count': student_count_annotations,
+            'is_enrolled': is_enrolled_annotations,
+            'progress': course_progress_annotations,
+        }
 
     def get_image(self, obj):
         if obj.image:
@@ -395,25 +545,31 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     def get_is_enrolled(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'user_enrolled'):
+                return obj.user_enrolled
             return obj.students.filter(id=request.user.id).exists()
         return False
 
     def get_enrollment_count(self, obj):
+        if hasattr(obj, 'student_total'):
+            return obj.student_total
         return obj.students.count()
 
     def get_progress(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated and self.get_is_enrolled(obj):
-            total_lessons = Lesson.objects.filter(module__course=obj).count()
+            if hasattr(obj, 'lesson_total'):
+                total_lessons, completed_lessons = obj.lesson_total, obj.user_completed_lessons
+            else:
+                total_lessons = Lesson.objects.filter(module__course=obj).count()
+                completed_lessons = CourseProgress.objects.filter(
+                    enrollment__user=request.user,
+                    enrollment__course=obj,
+                    completed=True
+                ).count()
             if total_lessons == 0:
                 return 0
             
-            completed_lessons = CourseProgress.objects.filter(
-                enrollment__user=request.user,
-                enrollment__course=obj,
-                completed=True
-            ).count()
-            
             return int((completed_lessons / total_lessons) * 100)
         return 0
 
@@ -477,7 +633,7 @@ class CourseCreateSerializer(serializers.ModelSerializer):
         validated_data['instructor'] = self.context['request'].user
         return super().create(validated_data)
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     course_title = serializers.CharField(source='course.title', read_only=True)
     user_name = serializers.CharField(source='user.username', read_only=True)
     progress_percentage = serializers.SerializerMethodField()
@@ -490,16 +646,26 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             'amount_paid', 'progress_percentage'
         ]
         read_only_fields = ['user', 'course', 'enrolled_at']
+        expandable_fields = {'course': (CourseListSerializer, {})}
+        related_fields = {'progress_percentage': ['course']}
+        field_columns = {'progress_percentage': ['course_id']}
+        field_annotations = {'progress_percentage': enrollment_progress_annotations}
 
     def get_progress_percentage(self, obj):
-        total_lessons = Lesson.objects.filter(module__course=obj.course).count()
+        if hasattr(obj, 'total_lessons'):
+            total_lessons = obj.total_lessons
+        else:
+            total_lessons = Lesson.objects.filter(module__course=obj.course).count()
         if total_lessons == 0:
             return 0
         
-        completed_lessons = CourseProgress.objects.filter(
-            enrollment=obj,
-            completed=True
-        ).count()
+        if hasattr(obj, 'completed_lessons'):
+            completed_lessons = obj.completed_lessons
+        else:
+            completed_lessons = CourseProgress.objects.filter(
+                enrollment=obj,
+                completed=True
+            ).count()
         
         return int((completed_lessons / total_lessons) * 100)
 
@@ -514,4 +680,71 @@ class CourseProgressSerializer(serializers.ModelSerializer):
             'id', 'lesson', 'lesson_title', 'module_title',
             'completed', 'completed_at', 'time_spent', 'last_accessed', 'course_title'
         ]
-        read_only_fields = ['completed_at', 'time_spent', 'last_accessed']
\ No newline at end of file
+        read_only_fields = ['completed_at', 'time_spent', 'last_accessed']
+
+class LessonBulkUpdateItemSerializer(serializers.Serializer):
+    """One entry of a bulk lesson update: the lesson id plus the fields to change"""
+    id = serializers.IntegerField()
+    is_published = serializers.BooleanField(required=False)
+    is_preview = serializers.BooleanField(required=False)
+    duration = serializers.IntegerField(required=False, min_value=0)
+    order = serializers.IntegerField(required=False, min_value=0)
+
+    UPDATABLE_FIELDS = ['is_published', 'is_preview', 'duration', 'order']
+
+
+class ModuleBulkPublishItemSerializer(serializers.Serializer):
+    """Publish/unpublish a module; the flag cascades to all of its lessons"""
+    id = serializers.IntegerField()
+    is_published = serializers.BooleanField()
+
+
+class LessonBulkUpdateSerializer(serializers.Serializer):
+    lessons = LessonBulkUpdateItemSerializer(many=True, required=False, default=list)
+    modules = ModuleBulkPublishItemSerializer(many=True, required=False, default=list)
+
+    def validate(self, data):
+        if not data['lessons'] and not data['modules']:
+            raise serializers.ValidationError("Provide 'lessons' and/or 'modules' to update.")
+        for key in ('lessons', 'modules'):
+            ids = [item['id'] for item in data[key]]
+            if len(ids) != len(set(ids)):
+                raise serializers.ValidationError({key: "Each id may only appear once."})
+        return data
+
+
+class DashboardCourseSerializer(CourseListSerializer):
+    """Course card of the dashboard: student counts come from one grouped query (context['student_counts'])"""
+
+    def get_student_count(self, obj):
+        return self.context['student_counts'].get(obj.id, 0)
+
+
+class DashboardEnrollmentSerializer(serializers.ModelSerializer):
+    """An enrollment annotated by LearnerDashboardView.get_queryset"""
+    enrollment_id = serializers.IntegerField(source='id')
+    course = DashboardCourseSerializer()
+    total_lessons = serializers.IntegerField()
+    completed_lessons = serializers.IntegerField()
+    progress_percentage = serializers.SerializerMethodField()
+    last_accessed = serializers.DateTimeField(allow_null=True)
+    resume = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Enrollment
+        fields = [
+            'enrollment_id', 'course', 'enrolled_at', 'payment_status', 'completed', 'completed_at',
+            'total_lessons', 'completed_lessons', 'progress_percentage', 'last_accessed', 'resume',
+        ]
+
+    def get_progress_percentage(self, obj):
+        if obj.total_lessons == 0:
+            return 0
+        return int((obj.completed_lessons / obj.total_lessons) * 100)
+
+    def get_resume(self, obj):
+        """The unfinished lesson opened last, else the first unfinished one (as the course player)"""
+        lesson = self.context['lessons'].get(obj.started_lesson_id or obj.next_lesson_id)
+        if lesson is None:
+            return None
+        return {'lesson_id': lesson['id'], 'lesson_title': lesson['title'], 'module_id': lesson['module_id']}
@@ -1,11 +1,12 @@
 import logging
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.conf import settings
 from registration_app.models import CustomUser
-from courses_app.models import Course
+from courses_app.models import Course, Category, CourseModule, Lesson, CourseMaterial
+from core_app.cache import cache_layer
 
 logger = logging.getLogger(__name__)
 
@@ -41,4 +42,67 @@ def setup_instructor_group(sender, **kwargs):
             user.groups.add(instructor_group)
             logger.info(f"User {user.username} added to 'Instructors' group.")
         except CustomUser.DoesNotExist:
-            logger.warning(f"User '{settings.INSTRUCTOR_USERNAME}' does not exist yet.")
\ No newline at end of file
+            logger.warning(f"User '{settings.INSTRUCTOR_USERNAME}' does not exist yet.")
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_catalog(sender, using, **kwargs):
+    """Course changes show up in the cached catalog as soon as they are committed"""
+    cache_layer.invalidate_namespace('catalog', using)
+    cache_layer.invalidate_namespace('categories', using)  # course_count per category
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_categories(sender, using, **kwargs):
+    cache_layer.invalidate_namespace('categories', using)
+    cache_layer.invalidate_namespace('catalog', using)  # category names are listed
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def invalidate_catalog_for_students(sender, action, using, **kwargs):
+    """Enrolling or removing students changes the student_count of the catalog"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        cache_layer.invalidate_namespace('catalog', using)
+
+
+# Course content versioning: any change below a course bumps Course.version,
+# which invalidates the ETags of the course's detail, content and lessons.
+# Course.touch() defers to the commit inside a transaction, so lookups through
+# rows that are about to go (pre_clear) are resolved to course ids first.
+
+@receiver([post_save, post_delete], sender=CourseModule)
+def touch_course_for_module(sender, instance, **kwargs):
+    Course.touch(pk=instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def touch_course_for_lesson(sender, instance, **kwargs):
+    Course.touch(modules=instance.module_id)
+
+
+@receiver([post_save, post_delete], sender=CourseMaterial)
+def touch_course_for_material(sender, instance, **kwargs):
+    Course.touch(modules__lessons=instance.lesson_id)
+
+
+@receiver(m2m_changed, sender=Lesson.materials.through)
+def touch_course_for_lesson_materials(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            Course.touch(modules__lessons=instance.pk)
+    elif action == 'pre_clear':
+        Course.touch(pk__in=list(Course.objects.filter(modules__lessons__materials=instance.pk).values_list('pk', flat=True)))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Course.touch(modules__lessons__in=pk_set)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def touch_course_for_students(sender, instance, action, reverse, pk_set, **kwargs):
+    """The student list and enrollment count are part of the course detail"""
+    if not reverse:
+        if action.startswith('post_'):
+            Course.touch(pk=instance.pk)
+    elif action == 'pre_clear':
+        Course.touch(pk__in=list(Course.objects.filter(students=instance.pk).values_list('pk', flat=True)))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Course.touch(pk__in=pk_set)
@@ -1,3 +1,632 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from core_app.models import Job
+from core_app.storage import private_storage
+from core_app.write_queue import write_queue
+from registration_app.models import CustomUser
+from . import async_views
+from .cloning import clone_course
+from .exports import export_file_job, export_rows
+from .ordering import ORDER_GAP, apply_order, gap_orders
+from .views import LessonListView
+from .models import Category, Course, CourseMaterial, CourseModule, CourseProgress, Enrollment, Lesson
+
+
+class CourseDataMixin:
+    """A published free course of ``modules`` x ``lessons``, each lesson with one material"""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        os.makedirs(os.path.join(media_root, 'course_materials'))
+        with open(os.path.join(media_root, 'course_materials', 'slides.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+    @classmethod
+    def create_course(cls, title='Python', modules=3, lessons=4, instructor=None, **fields):
+        if instructor is None:
+            instructor, _ = CustomUser.objects.get_or_create(
+                username='instructor', defaults={'role': 'instructor', 'is_instructor': True},
+            )
+        category, _ = Category.objects.get_or_create(name='Programming')
+        fields = {'description': 'About', 'price': 0, 'status': 'published', **fields}
+        course = Course.objects.create(title=title, instructor=instructor, category=category, **fields)
+        for m in range(modules):
+            module = CourseModule.objects.create(course=course, title=f'Module {m}', order=m)
+            for l in range(lessons):
+                lesson = Lesson.objects.create(module=module, title=f'Lesson {m}.{l}', order=l)
+                material = CourseMaterial.objects.create(lesson=lesson, title='Slides', file='course_materials/slides.pdf')
+                lesson.materials.add(material)
+        return course
+
+    @classmethod
+    def create_student(cls, username='student'):
+        return CustomUser.objects.create(username=username, role='student')
+
+
+class CloneCourseTests(CourseDataMixin, TestCase):
+
+    def assertCloned(self, course, copy):
+        self.assertNotEqual(copy.pk, course.pk)
+        self.assertEqual(copy.status, 'draft')
+        original = [
+            (lesson.module.title, lesson.title, [m.title for m in lesson.materials.all()])
+            for lesson in Lesson.objects.filter(module__course=course).order_by('module__order', 'order')
+        ]
+        cloned = [
+            (lesson.module.title, lesson.title, [m.title for m in lesson.materials.all()])
+            for lesson in Lesson.objects.filter(module__course=copy).order_by('module__order', 'order')
+        ]
+        self.assertEqual(cloned, original)
+        # the copy's materials hang off the copy's lessons, not the original's
+        self.assertFalse(CourseMaterial.objects.filter(lesson__module__course=copy).exclude(
+            lessons__module__course=copy,
+        ).exists())
+
+    def test_clone_copies_structure(self):
+        course = self.create_course()
+        self.assertCloned(course, clone_course(course))
+
+    def test_clone_without_returned_ids_inserts_rows_one_by_one(self):
+        course = self.create_course(modules=2, lessons=2)
+        other = self.create_course(title='Other', modules=1, lessons=1)
+        features = type(connection.features)
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock, return_value=False):
+            copy = clone_course(course)
+        self.assertCloned(course, copy)
+        self.assertEqual(Lesson.objects.filter(module__course=other).count(), 1)
+
+    @override_settings(COURSE_CLONE_BATCH_SIZE=1)
+    def test_batch_size_is_read_at_call_time(self):
+        course = self.create_course(modules=1, lessons=3)
+        with mock.patch.object(Lesson.objects, 'bulk_create', wraps=Lesson.objects.bulk_create) as bulk_create:
+            clone_course(course)
+        self.assertEqual(bulk_create.call_args.kwargs['batch_size'], 1)
+
+
+class GapOrderTests(SimpleTestCase):
+
+    def test_moved_item_takes_a_value_between_its_neighbours(self):
+        self.assertEqual(gap_orders([1024, 3072, 2048]), [1024, 1536, 2048])
+
+    def test_renumbers_when_neighbours_have_no_gap_left(self):
+        self.assertEqual(gap_orders([1, 3, 2]), [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP])
+
+    def test_item_moved_to_the_end_goes_after_the_last_one(self):
+        self.assertEqual(gap_orders([2, 3, 1]), [2, 3, 3 + ORDER_GAP])
+
+
+class ReorderTests(CourseDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = cls.create_course(modules=3, lessons=3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.course.instructor)
+
+    def test_unique_module_orders_are_parked_before_taking_each_others_values(self):
+        # orders 0, 1, 2 reversed: every new value is another module's old one
+        ids = list(CourseModule.objects.filter(course=self.course).order_by('-order').values_list('id', flat=True))
+        response = self.client.patch(
+            reverse('module-reorder', args=[self.course.id]), {'modules': ids}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(CourseModule.objects.filter(course=self.course).order_by('order').values_list('id', flat=True)), ids,
+        )
+
+    def test_apply_order_parks_colliding_rows(self):
+        modules = list(CourseModule.objects.filter(course=self.course))
+        by_order = {module.order: module.id for module in modules}
+        # 0 <-> 1 swap: without parking the first UPDATE hits unique (course, order)
+        changed = apply_order(CourseModule, modules, [by_order[1], by_order[0], by_order[2]], unique=True)
+        self.assertTrue(changed)
+        self.assertEqual(
+            list(CourseModule.objects.filter(course=self.course).order_by('order').values_list('id', flat=True)),
+            [by_order[1], by_order[0], by_order[2]],
+        )
+
+    def test_lessons_are_renumbered_when_no_gap_is_left(self):
+        module = CourseModule.objects.filter(course=self.course).first()
+        ids = list(module.lessons.order_by('order').values_list('id', flat=True))
+        new = [ids[0], ids[2], ids[1]]
+        response = self.client.patch(
+            reverse('lesson-bulk-reorder', args=[module.id]), {'lessons': new}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(module.lessons.order_by('order').values_list('id', flat=True)), new)
+        self.assertEqual(
+            list(module.lessons.order_by('order').values_list('order', flat=True)),
+            [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP],
+        )
+
+    def test_incomplete_list_is_rejected(self):
+        module = CourseModule.objects.filter(course=self.course).first()
+        response = self.client.patch(
+            reverse('lesson-bulk-reorder', args=[module.id]),
+            {'lessons': list(module.lessons.values_list('id', flat=True))[:2]}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_the_course_instructor_may_reorder(self):
+        other = CustomUser.objects.create(username='other', role='instructor', is_instructor=True)
+        self.client.force_authenticate(other)
+        ids = list(CourseModule.objects.filter(course=self.course).values_list('id', flat=True))
+        response = self.client.patch(reverse('module-reorder', args=[self.course.id]), {'modules': ids}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class LessonBulkUpdateTests(CourseDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = cls.create_course(modules=2, lessons=3)
+        cls.instructor = cls.course.instructor
+        cls.other = CustomUser.objects.create(username='other', role='instructor', is_instructor=True)
+        cls.other_course = cls.create_course(title='Other', modules=1, lessons=1, instructor=cls.other)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def patch(self, **data):
+        return self.client.patch(reverse('lesson-bulk-update'), data, format='json')
+
+    def test_modules_cascade_and_explicit_lesson_values_win(self):
+        first, second = CourseModule.objects.filter(course=self.course).order_by('order')
+        kept = second.lessons.order_by('order').first()
+        response = self.patch(
+            modules=[{'id': first.id, 'is_published': True}, {'id': second.id, 'is_published': True}],
+            lessons=[{'id': kept.id, 'is_published': False, 'duration': 12}],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'lessons_updated': 1, 'modules_updated': 2, 'cascaded_lessons': 6})
+        self.assertEqual(CourseModule.objects.filter(course=self.course, is_published=True).count(), 2)
+        self.assertEqual(list(Lesson.objects.filter(module__course=self.course, is_published=False)), [kept])
+        kept.refresh_from_db()
+        self.assertEqual(kept.duration, 12)
+
+    def test_ids_of_another_instructor_are_rejected(self):
+        own = Lesson.objects.filter(module__course=self.course).first()
+        foreign = Lesson.objects.get(module__course=self.other_course)
+        response = self.patch(lessons=[{'id': own.id, 'is_preview': True}, {'id': foreign.id, 'is_preview': True}])
+        self.assertEqual(response.status_code, 403)
+        self.assertIn(str(foreign.id), response.json()['detail'])
+        self.assertFalse(Lesson.objects.filter(is_preview=True).exists())  # nothing of the request was written
+
+        module = CourseModule.objects.get(course=self.other_course)
+        self.assertEqual(self.patch(modules=[{'id': module.id, 'is_published': True}]).status_code, 403)
+        self.assertFalse(CourseModule.objects.filter(is_published=True).exists())
+
+    def test_staff_may_update_any_course(self):
+        self.client.force_authenticate(
+            CustomUser.objects.create(username='staff', role='instructor', is_instructor=True, is_staff=True),
+        )
+        foreign = Lesson.objects.get(module__course=self.other_course)
+        response = self.patch(lessons=[{'id': foreign.id, 'is_preview': True}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lessons_updated'], 1)
+        foreign.refresh_from_db()
+        self.assertTrue(foreign.is_preview)
+
+    def test_query_count_does_not_depend_on_the_number_of_lessons(self):
+        lessons = list(Lesson.objects.filter(module__course=self.course))
+        modules = list(CourseModule.objects.filter(course=self.course))
+
+        def patch(lessons, modules):
+            self.patch(
+                lessons=[{'id': lesson.id, 'order': lesson.order + 10} for lesson in lessons],
+                modules=[{'id': module.id, 'is_published': True} for module in modules],
+            )
+
+        with CaptureQueriesContext(connection) as few:
+            patch(lessons[:1], modules[:1])
+        with CaptureQueriesContext(connection) as many:
+            patch(lessons, modules)
+        self.assertEqual(len(many), len(few))
+
+
+class ExportJobTests(CourseDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(username='admin', is_staff=True, is_superuser=True)
+        cls.first = cls.create_course(title='First', modules=0)
+        cls.second = cls.create_course(title='Second', modules=0, price=10, is_paid=True)
+        cls.third = cls.create_course(title='Third', modules=0)
+
+    def setUp(self):
+        private_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, private_root)
+        override = override_settings(PRIVATE_ROOT=private_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(self.admin)
+
+    def export_to_file(self, query='', **data):
+        url = reverse('admin:courses_app_course_changelist') + query
+        response = self.client.post(url, {'action': 'export_to_file', **data})
+        self.assertEqual(response.status_code, 302)
+        return Job.objects.get()
+
+    def read_export(self, job):
+        name = export_file_job.run(job)['name']
+        with private_storage.open(name) as f:
+            return f.read().decode().split()
+
+    def test_selected_rows(self):
+        job = self.export_to_file(_selected_action=[self.first.pk, self.third.pk])
+        self.assertEqual(json.loads(json.dumps(job.args)), job.args)
+        Course.objects.filter(pk=self.first.pk).update(price=5)
+        lines = self.read_export(job)
+        self.assertEqual([line.split(',')[:2] for line in lines[1:]], [[str(self.first.pk), 'First'], [str(self.third.pk), 'Third']])
+        self.assertIn('5.00', lines[1])  # the rows as they are when the job runs
+
+    def test_select_all_passes_the_changelist_filters_not_the_rows(self):
+        job = self.export_to_file('?is_paid__exact=0', select_across='1', _selected_action=[self.first.pk])
+        self.assertNotIn(self.first.pk, job.args[3])
+        self.create_course(title='Fourth', modules=0)  # matches the filter by the time the job runs
+        lines = self.read_export(job)
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['First', 'Third', 'Fourth'])
+
+    def test_rows_are_read_in_chunks(self):
+        iterator = QuerySet.iterator
+        with override_settings(EXPORT_CHUNK_SIZE=2), \
+                mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=iterator) as patched, \
+                self.assertNumQueries(1):
+            rows = list(export_rows(Course.objects.all(), ['id']))
+        self.assertEqual(rows, [(self.first.pk,), (self.second.pk,), (self.third.pk,)])
+        patched.assert_called_once_with(mock.ANY, chunk_size=2)
+
+    def test_file_is_private_and_downloaded_by_staff(self):
+        job = self.export_to_file(_selected_action=[self.first.pk])
+        name = export_file_job.run(job)['name']
+        self.assertTrue(private_storage.exists(name))
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, name)))
+        with self.assertRaises(ValueError):
+            private_storage.url(name)
+
+        url = reverse('admin:courses_app_course_export', args=[os.path.basename(name)])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'First', b''.join(response.streaming_content))
+        self.assertEqual(self.client.get(url.replace('.csv', '.txt')).status_code, 404)
+
+        self.client.force_login(self.create_student())
+        self.assertEqual(self.client.get(url).status_code, 302)  # to the admin login
+
+
+class ConditionalAccessTests(CourseDataMixin, TestCase):
+    """Access is decided before the ETag is compared: a client that lost access gets no 304"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = cls.create_course(modules=1, lessons=1)
+        cls.lesson = Lesson.objects.get(module__course=cls.course)
+        cls.student = cls.create_student()
+        Enrollment.objects.create(user=cls.student, course=cls.course, payment_status='completed')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def revalidate(self, path, change):
+        first = self.client.get(path)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        change()  # a queryset update: no signal, so the course version stays the same
+        return self.client.get(path, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    def test_content_of_a_course_that_became_paid(self):
+        path = f'/api/courses/{self.course.id}/content/'
+        Enrollment.objects.filter(user=self.student).update(payment_status='pending')
+        response = self.revalidate(path, lambda: Course.objects.filter(pk=self.course.pk).update(is_paid=True))
+        self.assertEqual(response.status_code, 403)
+
+    def test_video_info_of_a_course_that_became_paid(self):
+        path = f'/api/lessons/{self.lesson.id}/video-info/'
+        Enrollment.objects.filter(user=self.student).update(payment_status='pending')
+        response = self.revalidate(path, lambda: Course.objects.filter(pk=self.course.pk).update(is_paid=True))
+        self.assertEqual(response.status_code, 403)
+
+    def test_detail_of_a_course_that_was_unpublished(self):
+        path = f'/api/courses/{self.course.id}/detail/'
+        response = self.revalidate(path, lambda: Course.objects.filter(pk=self.course.pk).update(status='draft'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_if_modified_since_alone_does_not_hide_new_progress(self):
+        for path in (
+            f'/api/courses/{self.course.id}/content/',
+            f'/api/courses/{self.course.id}/detail/',
+            f'/api/courses/{self.course.id}/player/',
+        ):
+            with self.subTest(path=path):
+                first = self.client.get(path)
+                self.assertEqual(first.status_code, 200)
+                self.assertNotIn('Last-Modified', first)
+                CourseProgress.objects.update_or_create(
+                    enrollment=Enrollment.objects.get(user=self.student), lesson=self.lesson,
+                    defaults={'completed': True},
+                )
+                response = self.client.get(path, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+                self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_detail_revalidates_on_last_modified(self):
+        self.client.force_authenticate(None)
+        path = f'/api/courses/{self.course.id}/detail/'
+        first = self.client.get(path)
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+    async def test_async_content_of_a_course_that_became_paid(self):
+        await Enrollment.objects.filter(user=self.student).aupdate(payment_status='pending')
+        view = async_views.AsyncCourseContentListView.as_view()
+
+        def get(**headers):
+            request = APIRequestFactory().get(f'/api/courses/{self.course.id}/content/', **headers)
+            force_authenticate(request, self.student)
+            return view(request, course_id=self.course.id)
+
+        first = await get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((await get(HTTP_IF_NONE_MATCH=first['ETag'])).status_code, 304)
+        await Course.objects.filter(pk=self.course.pk).aupdate(is_paid=True)
+        self.assertEqual((await get(HTTP_IF_NONE_MATCH=first['ETag'])).status_code, 403)
+
+
+class PlayerAccessTests(CourseDataMixin, TestCase):
+    """The player, check-access, content and video-info make the same access decision"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = cls.create_course(modules=1, lessons=1)
+        cls.lesson = Lesson.objects.get(module__course=cls.course)
+        cls.student = cls.create_student()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def assertSameAccess(self, expected):
+        access = self.client.get(f'/api/courses/{self.course.id}/check-access/').json()
+        player = self.client.get(f'/api/courses/{self.course.id}/player/').json()
+        self.assertEqual(player['access'], access)
+        self.assertEqual(access['has_access'], expected)
+        self.assertEqual(player['modules'][0]['lessons'][0]['video'] is not None, expected)
+        statuses = {
+            path: self.client.get(path).status_code
+            for path in (f'/api/courses/{self.course.id}/content/', f'/api/lessons/{self.lesson.id}/video-info/')
+        }
+        self.assertEqual(set(statuses.values()), {200 if expected else 403}, statuses)
+
+    def test_free_course(self):
+        self.assertSameAccess(True)
+
+    def test_paid_course_without_payment(self):
+        Course.objects.filter(pk=self.course.pk).update(is_paid=True, price=10)
+        Enrollment.objects.create(user=self.student, course=self.course, payment_status='pending')
+        self.assertSameAccess(False)
+
+    def test_paid_course_with_payment(self):
+        Course.objects.filter(pk=self.course.pk).update(is_paid=True, price=10)
+        Enrollment.objects.create(user=self.student, course=self.course, payment_status='completed')
+        self.assertSameAccess(True)
+
+    def test_free_enrollment_in_a_paid_course(self):
+        Course.objects.filter(pk=self.course.pk).update(is_paid=True, price=10)
+        Enrollment.objects.create(user=self.student, course=self.course, payment_status='free')
+        self.assertSameAccess(True)
+
+
+class CourseTouchTests(CourseDataMixin, TransactionTestCase):
+    """Commits for real: Course.touch() defers to them"""
+
+    def test_enrolling_invalidates_the_catalog_everywhere(self):
+        course = self.create_course(modules=0)
+        with mock.patch('core_app.invalidation.bus._store') as store:
+            course.students.add(self.create_student())
+        self.assertEqual([call.args[:2] for call in store.call_args_list], [('catalog', '')])
+
+    def test_a_transaction_bumps_the_course_once_on_commit(self):
+        course = self.create_course(modules=1, lessons=0)
+        module = course.modules.get()
+        version = Course.objects.get(pk=course.pk).version
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                for n in range(5):
+                    Lesson.objects.create(module=module, title=f'Lesson {n}', order=n)
+                Lesson.objects.filter(module=module).first().delete()
+        course_updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "courses_app_course"')]
+        self.assertEqual(len(course_updates), 1)
+        self.assertEqual(Course.objects.get(pk=course.pk).version, version + 1)
+
+    def test_bulk_lesson_update_bumps_the_course_once(self):
+        course = self.create_course(modules=2, lessons=3)
+        version = Course.objects.get(pk=course.pk).version
+        client = APIClient()
+        client.force_authenticate(course.instructor)
+        lessons = Lesson.objects.filter(module__course=course)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch(
+                reverse('lesson-bulk-update'), {'lessons': [{'id': lesson.id, 'is_preview': True} for lesson in lessons]},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        course_updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "courses_app_course"')]
+        self.assertEqual(len(course_updates), 1)
+        self.assertEqual(Course.objects.get(pk=course.pk).version, version + 1)
+
+    def test_autocommit_write_bumps_right_away(self):
+        course = self.create_course(modules=1, lessons=0)
+        version = Course.objects.get(pk=course.pk).version
+        CourseModule.objects.create(course=course, title='Extra', order=5)
+        self.assertEqual(Course.objects.get(pk=course.pk).version, version + 1)
+
+    def test_cleared_lesson_materials_bump_the_courses_that_had_them(self):
+        course = self.create_course(modules=1, lessons=1)
+        material = CourseMaterial.objects.get(lesson__module__course=course)
+        version = Course.objects.get(pk=course.pk).version
+        with transaction.atomic():
+            material.lessons.clear()
+        self.assertEqual(Course.objects.get(pk=course.pk).version, version + 1)
+
+
+@override_settings(WRITE_QUEUE={'ENABLED': True, 'LINGER_MS': 0})
+class MarkLessonCompleteTests(CourseDataMixin, TransactionTestCase):
+    """The completion is written by the write queue's thread and committed before the response"""
+
+    def test_completion_goes_through_the_write_queue(self):
+        course = self.create_course(modules=1, lessons=2)
+        lesson = Lesson.objects.filter(module__course=course).first()
+        student = self.create_student()
+        client = APIClient()
+        client.force_authenticate(student)
+        with mock.patch.object(write_queue, 'submit', wraps=write_queue.submit) as submit:
+            response = client.post(f'/api/lessons/{lesson.id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        submit.assert_called_once()
+        self.assertTrue(CourseProgress.objects.filter(enrollment__user=student, lesson=lesson, completed=True).exists())
+
+
+class LearnerDashboardTests(CourseDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = cls.create_student()
+        cls.started = cls.create_course(title='Started', modules=2, lessons=2)
+        cls.finished = cls.create_course(title='Finished', modules=1, lessons=2)
+        cls.empty = cls.create_course(title='Empty', modules=0)
+
+        started = Enrollment.objects.create(user=cls.student, course=cls.started, payment_status='free')
+        cls.started_lessons = list(Lesson.objects.filter(module__course=cls.started).order_by('module__order', 'order'))
+        CourseProgress.objects.create(enrollment=started, lesson=cls.started_lessons[0], completed=True)
+        CourseProgress.objects.create(enrollment=started, lesson=cls.started_lessons[2], completed=False)
+
+        finished = Enrollment.objects.create(
+            user=cls.student, course=cls.finished, payment_status='free', completed=True, completed_at=timezone.now(),
+        )
+        for lesson in Lesson.objects.filter(module__course=cls.finished):
+            CourseProgress.objects.create(enrollment=finished, lesson=lesson, completed=True)
+        Enrollment.objects.create(user=cls.student, course=cls.empty, payment_status='free')
+
+        other = cls.create_student('other')
+        Enrollment.objects.create(user=other, course=cls.finished, payment_status='free')
+        cls.finished.students.add(cls.student, other)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def dashboard(self):
+        response = self.client.get('/api/my-dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return {item['course']['title']: item for item in response.json()['results']}
+
+    def test_progress_resume_and_completion_per_enrollment(self):
+        items = self.dashboard()
+        self.assertEqual(sorted(items), ['Empty', 'Finished', 'Started'])
+
+        started = items['Started']
+        self.assertEqual((started['total_lessons'], started['completed_lessons'], started['progress_percentage']), (4, 1, 25))
+        # the unfinished lesson opened last, not the first unfinished one
+        self.assertEqual(started['resume']['lesson_id'], self.started_lessons[2].id)
+        self.assertIsNotNone(started['last_accessed'])
+        self.assertFalse(started['completed'])
+
+        finished = items['Finished']
+        self.assertEqual((finished['total_lessons'], finished['completed_lessons'], finished['progress_percentage']), (2, 2, 100))
+        self.assertIsNone(finished['resume'])
+        self.assertTrue(finished['completed'])
+        self.assertEqual(finished['course']['student_count'], 2)
+
+        empty = items['Empty']
+        self.assertEqual((empty['total_lessons'], empty['completed_lessons'], empty['progress_percentage']), (0, 0, 0))
+        self.assertIsNone(empty['resume'])
+        self.assertIsNone(empty['last_accessed'])
+
+    def test_first_unfinished_lesson_when_none_was_started(self):
+        CourseProgress.objects.filter(lesson=self.started_lessons[2]).delete()
+        self.assertEqual(self.dashboard()['Started']['resume']['lesson_id'], self.started_lessons[1].id)
+
+    def test_query_count_does_not_depend_on_the_enrollments(self):
+        with self.assertNumQueries(3):
+            self.dashboard()
+        for n in range(3):
+            course = self.create_course(title=f'More {n}', modules=1, lessons=2)
+            course.students.add(self.student)
+            Enrollment.objects.create(user=self.student, course=course, payment_status='free')
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.dashboard()), 6)
+
+    def test_no_enrollments(self):
+        self.client.force_authenticate(CustomUser.objects.create(username='newcomer'))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.dashboard(), {})
+
+
+class StreamingListTests(CourseDataMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = cls.create_student()
+        for n in range(5):
+            course = cls.create_course(title=f'Course {n}', modules=1, lessons=1)
+            Enrollment.objects.create(user=cls.student, course=course, payment_status='free')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def get(self, path, streamed=True):
+        # an indented response is rendered as usual, not streamed
+        accept = 'application/json' if streamed else 'application/json; indent=2'
+        response = self.client.get(path, HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.streaming, streamed)
+        return json.loads(b''.join(response.streaming_content) if streamed else response.content)
+
+    def test_paginated_page_is_streamed_with_its_envelope(self):
+        path = reverse('enrollment-list') + '?page_size=2&count=true'
+        body = self.get(path)
+        self.assertEqual(body, self.get(path, streamed=False))
+        self.assertEqual(list(body), ['count', 'next', 'previous', 'results'])
+        self.assertEqual((body['count'], len(body['results'])), (5, 2))
+
+        seen = [row['id'] for row in body['results']]
+        while body['next']:
+            body = self.get(body['next'])
+            seen += [row['id'] for row in body['results']]
+        self.assertEqual(sorted(seen), sorted(Enrollment.objects.values_list('id', flat=True)))
+
+    def test_empty_page(self):
+        Enrollment.objects.all().delete()
+        self.assertEqual(self.get(reverse('enrollment-list')), {'next': None, 'previous': None, 'results': []})
+
+    def test_unpaginated_list_is_read_in_chunks(self):
+        with mock.patch.object(LessonListView, 'pagination_class', None), \
+                mock.patch.object(LessonListView, 'stream_chunk_size', 2):
+            body = self.get(reverse('lesson-list-all'))
+            self.assertEqual(body, self.get(reverse('lesson-list-all'), streamed=False))
+        self.assertEqual(len(body), 5)
@@ -1,5 +1,6 @@
 from django.urls import path
-from . import views
+from core_app.async_views import read_view
+from . import async_views, views
 from .views import (
     CategoryListCreateView, CategoryRetrieveUpdateDestroyView,
     CourseListCreateView, CourseRetrieveUpdateDestroyView,
@@ -21,18 +22,23 @@ urlpatterns = [
     path('courses/', CourseListCreateView.as_view(), name='course-list'),
     path('courses/<int:pk>/', CourseRetrieveUpdateDestroyView.as_view(), name='course-detail'),
     path('courses/search/', CourseSearchView.as_view(), name='course-search'),
-    path('courses/list/', views.CourseListView.as_view(), name='course-list'),
-    path('courses/<int:pk>/detail/', views.CourseDetailView.as_view(), name='course-detail'),
+    path('courses/list/', read_view(views.CourseListView, async_views.AsyncCourseListView), name='course-list'),
+    path('courses/<int:pk>/detail/', read_view(views.CourseDetailView, async_views.AsyncCourseDetailView), name='course-detail'),
     path('courses/create/', views.CourseCreateView.as_view(), name='course-create'),
+    path('courses/<int:pk>/clone/', views.CourseCloneView.as_view(), name='course-clone'),
+    path('courses/clone-jobs/<int:job_id>/', views.CourseCloneJobView.as_view(), name='course-clone-job'),
 
     # Course Modules
     path('courses/<int:course_id>/modules/', CourseModuleCreateView.as_view(), name='module-list'),
+    path('courses/<int:course_id>/modules/reorder/', views.CourseModuleReorderView.as_view(), name='module-reorder'),
     path('modules/<int:pk>/', CourseModuleRetrieveUpdateDestroyView.as_view(), name='module-detail'),
     path('courses/<int:course_id>/complete/', MarkCourseCompleteView.as_view(), name='mark-course-complete'),
     
     # Lessons
     path('modules/<int:module_id>/lessons/', LessonCreateView.as_view(), name='lesson-list'),
+    path('modules/<int:module_id>/lessons/reorder/', views.ModuleLessonReorderView.as_view(), name='lesson-bulk-reorder'),
     path('lessons/', views.LessonListView.as_view(), name='lesson-list-all'),
+    path('lessons/bulk/', views.LessonBulkUpdateView.as_view(), name='lesson-bulk-update'),
     path('lessons/<int:pk>/', LessonRetrieveUpdateDestroyView.as_view(), name='lesson-detail'),
     path('lessons/<str:slug>/', views.LessonBySlugView.as_view(), name='lesson-detail-by-slug'),
     path('lessons/<int:lesson_id>/reorder/', views.LessonReorderView.as_view(), name='lesson-reorder'), 
@@ -43,8 +49,9 @@ urlpatterns = [
     # Enrollment
     path('enrollments/', views.EnrollmentListView.as_view(), name='enrollment-list'),
     path('courses/<int:course_id>/enroll/', CourseEnrollmentView.as_view(), name='course-enroll'),
-    path('courses/<int:course_id>/check-access/', CheckCourseAccessView.as_view(), name='check-access'),
-    path('courses/<int:course_id>/content/', CourseContentListView.as_view(), name='course-content'),
+    path('courses/<int:course_id>/check-access/', read_view(CheckCourseAccessView, async_views.AsyncCheckCourseAccessView), name='check-access'),
+    path('courses/<int:course_id>/content/', read_view(CourseContentListView, async_views.AsyncCourseContentListView), name='course-content'),
+    path('courses/<int:course_id>/player/', views.CoursePlayerView.as_view(), name='course-player'),
      path('enrollments/<int:pk>/', views.EnrollmentDetailView.as_view(), name='enrollment-detail'),
     path('enrollments/<int:enrollment_id>/complete/', views.CompleteEnrollmentView.as_view(), name='enrollment-complete'),
 
@@ -56,19 +63,20 @@ urlpatterns = [
     
     # User course management
     path('my-courses/', views.MyCoursesView.as_view(), name='my-courses'),
+    path('my-dashboard/', views.LearnerDashboardView.as_view(), name='learner-dashboard'),
     path('teaching-courses/', views.TeachingCoursesView.as_view(), name='teaching-courses'),
     
     # Course material management
     path('materials/<int:pk>/', views.CourseMaterialRetrieveUpdateDestroyView.as_view(), name='material-detail'),
 
     # Course progress endpoints
-    path('courses/<int:course_id>/progress/', views.CourseProgressView.as_view(), name='course-progress'),
+    path('courses/<int:course_id>/progress/', read_view(views.CourseProgressView, async_views.AsyncCourseProgressView), name='course-progress'),
     path('enrollments/<int:enrollment_id>/progress/', views.EnrollmentProgressView.as_view(), name='enrollment-progress'),
 
 
         # Video streaming URLs
     path('lessons/<int:lesson_id>/stream/', views.VideoStreamView.as_view(), name='lesson-video-stream'),
-    path('lessons/<int:lesson_id>/video-info/', views.LessonVideoInfoView.as_view(), name='lesson-video-info'),
+    path('lessons/<int:lesson_id>/video-info/', read_view(views.LessonVideoInfoView, async_views.AsyncLessonVideoInfoView), name='lesson-video-info'),
     
     # Alternative URL pattern for the React component
     path('lessons/<int:lesson_id>/video/', views.VideoStreamView.as_view(), name='lesson-video'),
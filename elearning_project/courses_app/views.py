@@ -13,7 +13,9 @@ from django.conf import settings
 from django.utils.encoding import smart_str
 from .serializers import (
     CourseSerializer, CategorySerializer, CourseModuleSerializer,
-    LessonSerializer, CourseMaterialSerializer, EnrollmentSerializer, CourseProgressSerializer, CourseDetailSerializer, CourseCreateSerializer, CourseListSerializer
+    LessonSerializer, CourseMaterialSerializer, EnrollmentSerializer, CourseProgressSerializer, CourseDetailSerializer, CourseCreateSerializer, CourseListSerializer,
+    LessonBulkUpdateSerializer, LessonBulkUpdateItemSerializer, DashboardEnrollmentSerializer,
+    enrollment_progress_annotations,
 )
 from registration_app.permissions import IsInstructor, IsAdminUser, IsStudent, CanEnrollInCourse
 from rest_framework import serializers
@@ -21,10 +23,20 @@ from rest_framework.exceptions import PermissionDenied
 from django.http import JsonResponse, Http404
 from django.utils import timezone
 from registration_app.permissions import IsInstructor, IsStudent, IsAdminUser, CanEnrollInCourse
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from .cloning import clone_course, start_clone_job, get_clone_job
+from .ordering import apply_order
+from .etags import category_list_validators, course_validators, lesson_validators, module_validators
+from core_app.cache import cache_response
+from core_app.conditional import ObjectAccessMixin, conditional_get, object_access
+from core_app.fieldsets import ColumnPruningMixin, SparseFieldsMixin, optimize_queryset, sparse_context
+from core_app.pagination import CursorPagination
+from core_app.renderers import StreamingListMixin
+from core_app.write_queue import write_queue
 
 class CategoryListCreateView(generics.ListCreateAPIView):
-    queryset = Category.objects.all()
+    queryset = Category.objects.cached()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
@@ -33,15 +45,21 @@ class CategoryListCreateView(generics.ListCreateAPIView):
             return [IsAdminUser()]
         return super().get_permissions()
 
+    @conditional_get(lambda view, request: category_list_validators(), private=False)
+    @cache_response('categories')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 class CategoryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
 
-class CourseListCreateView(generics.ListCreateAPIView):
+class CourseListCreateView(ColumnPruningMixin, generics.ListCreateAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [AllowAny]
+    cursor_ordering = ('-created_at', '-pk')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -72,7 +90,7 @@ class CourseListCreateView(generics.ListCreateAPIView):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-class CourseRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class CourseRetrieveUpdateDestroyView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
@@ -82,9 +100,10 @@ class CourseRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
             return [IsInstructor()]
         return super().get_permissions()
 
-class CourseModuleCreateView(generics.ListCreateAPIView):
+class CourseModuleCreateView(ColumnPruningMixin, generics.ListCreateAPIView):
     serializer_class = CourseModuleSerializer
     permission_classes = [IsAuthenticated] # base permission for all authenticated users
+    cursor_ordering = 'order'  # unique within the course
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -96,7 +115,7 @@ class CourseModuleCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         course_id = self.kwargs['course_id']
-        return CourseModule.objects.filter(course_id=course_id)
+        return CourseModule.objects.filter(course_id=course_id).cached()
 
     def perform_create(self, serializer):
         course = get_object_or_404(Course, id=self.kwargs['course_id'])
@@ -104,9 +123,10 @@ class CourseModuleCreateView(generics.ListCreateAPIView):
             raise PermissionDenied("You are not the instructor of this course.")
         serializer.save(course=course)
 
-class LessonCreateView(generics.ListCreateAPIView):
+class LessonCreateView(ColumnPruningMixin, generics.ListCreateAPIView):
     serializer_class = LessonSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('order', 'pk')
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -117,7 +137,11 @@ class LessonCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         module_id = self.kwargs['module_id']
-        return Lesson.objects.filter(module_id=module_id)
+        return Lesson.objects.filter(module_id=module_id).cached()
+
+    @conditional_get(lambda view, request, module_id: module_validators(module_id, request.user))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         module = get_object_or_404(CourseModule, id=self.kwargs['module_id'])
@@ -125,7 +149,7 @@ class LessonCreateView(generics.ListCreateAPIView):
             raise PermissionDenied("You are not the instructor of this course.")
         serializer.save(module=module)
 
-class CourseMaterialCreateView(generics.ListCreateAPIView):
+class CourseMaterialCreateView(ColumnPruningMixin, generics.ListCreateAPIView):
     serializer_class = CourseMaterialSerializer
     permission_classes = [IsAuthenticated]
 
@@ -189,6 +213,37 @@ class CourseEnrollmentView(APIView):
             status=status.HTTP_200_OK
         )
 
+# payment states of an enrollment that open a paid course
+ACCESS_PAYMENT_STATUSES = ('completed', 'free')
+
+
+def course_access(course, enrollment_id):
+    """
+    The check-access payload: ``enrollment_id`` is the user's enrollment in
+    ``course`` with one of the ACCESS_PAYMENT_STATUSES, or None. Shared by
+    every view that decides access to a course's content.
+    """
+    if not course.is_paid:
+        return {
+            "has_access": True,
+            "message": "This is a free course. You have full access.",
+            "is_free": True
+        }
+
+    if enrollment_id is not None:
+        return {
+            "has_access": True,
+            "message": "You have access to this paid course.",
+            "enrollment_id": enrollment_id
+        }
+
+    return {
+        "has_access": False,
+        "message": "You need to enroll and pay to access this course.",
+        "price": str(course.price),
+        "course_id": course.id
+    }
+
 class CheckCourseAccessView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -203,87 +258,85 @@ class CheckCourseAccessView(APIView):
 
         # For free courses, all authenticated users have access
         if not course.is_paid:
-            return Response({
-                "has_access": True,
-                "message": "This is a free course. You have full access.",
-                "is_free": True
-            })
+            return Response(course_access(course, None))
             
         # For paid courses, check enrollment
         enrollment = Enrollment.objects.filter(
             user=request.user, 
             course=course,
-            payment_status='completed'
+            payment_status__in=ACCESS_PAYMENT_STATUSES
         ).first()
-        
-        if enrollment:
-            return Response({
-                "has_access": True,
-                "message": "You have access to this paid course.",
-                "enrollment_id": enrollment.id
-            })
-            
-        return Response({
-            "has_access": False,
-            "message": "You need to enroll and pay to access this course.",
-            "price": str(course.price),
-            "course_id": course.id
-        })
+        return Response(course_access(course, enrollment.id if enrollment else None))
 
 class CourseContentListView(APIView):
     permission_classes = [IsAuthenticated]  # Only authenticated users can access content
 
+    @conditional_get(
+        lambda view, request, course_id: course_validators(course_id, request.user),
+        access=lambda view, request, course_id: view.check_access(request, course_id),
+    )
     def get(self, request, course_id):
-        course = get_object_or_404(Course, id=course_id)
+        return self.content_response(request, self.course)
+
+    def check_access(self, request, course_id):
+        """None if the user may read the content (the course is kept in self.course), else the error response"""
+        self.course = get_object_or_404(Course, id=course_id)
 
-        print(f"=== COURSE CONTENT DEBUG ===")
-        print(f"User: {request.user.username}")
-        print(f"Course: {course.title}")
-        print(f"Course is_paid: {course.is_paid}")
-        print(f"User in students: {request.user in course.students.all()}")
-        print(f"============================")
-        
         # For free courses, all authenticated users can view content
-        if not course.is_paid:
-            modules = CourseModule.objects.filter(course=course).prefetch_related(
-                'lessons', 'lessons__materials'
-            )
-            serializer = CourseModuleSerializer(modules, many=True, context={'request': request})
-            return Response(serializer.data)
-        
+        if not self.course.is_paid:
+            return None
+
         # For paid courses, check enrollment
         enrollment = Enrollment.objects.filter(
-            user=request.user, 
-            course=course,
-            payment_status='completed'
+            user=request.user,
+            course=self.course,
+            payment_status__in=ACCESS_PAYMENT_STATUSES
         ).first()
-        
-        if enrollment:
-            modules = CourseModule.objects.filter(course=course).prefetch_related(
-                'lessons', 'lessons__materials'
-            )
-            serializer = CourseModuleSerializer(modules, many=True, context={'request': request})
-            return Response(serializer.data)
-        
+
+        if course_access(self.course, enrollment.id if enrollment else None)['has_access']:
+            return None
+        return self.no_access_response()
+
+    def no_access_response(self):
         return Response(
             {"error": "You don't have access to this course content. Please enroll and complete payment."},
             status=status.HTTP_403_FORBIDDEN
         )
 
+    def content_response(self, request, course):
+        context = sparse_context(request)
+        modules = optimize_queryset(
+            CourseModule.objects.filter(course=course), CourseModuleSerializer(context=context), prune=True,
+        )
+        serializer = CourseModuleSerializer(modules, many=True, context=context)
+        return Response(serializer.data)
+
 class CourseSearchView(APIView):
     permission_classes = [AllowAny]
+    cursor_ordering = ('-created_at', '-pk')
 
     def get(self, request):
         query = request.query_params.get('query', '')
+        context = sparse_context(request)
+        paginator = CursorPagination()
         courses = Course.objects.filter(title__icontains=query)
-        serializer = CourseSerializer(courses, many=True, context={'request': request})
-        return Response(serializer.data)
+        courses = optimize_queryset(
+            courses, CourseSerializer(context=context), prune=True,
+            keep=paginator.ordering_columns(request, courses, self),
+        )
+        page = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
 
-class LessonRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class LessonRetrieveUpdateDestroyView(ObjectAccessMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
     permission_classes = [IsAuthenticated]
 
+    @conditional_get(lambda view, request, pk: lesson_validators(request.user, pk=pk), access=object_access)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_permissions(self):
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
             return [IsAuthenticated(), IsInstructor()]
@@ -325,7 +378,76 @@ class LessonRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         
         return Response(serializer.data)
 
-class CourseModuleRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class LessonBulkUpdateView(APIView):
+    """
+    Update many lessons (is_published, is_preview, duration, order) and
+    publish/unpublish whole modules in a single request.
+
+    Body: {"lessons": [{"id": 1, "is_published": true}, ...],
+           "modules": [{"id": 4, "is_published": true}, ...]}
+    """
+    permission_classes = [IsAuthenticated, IsInstructor]
+
+    def patch(self, request):
+        serializer = LessonBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lesson_items = {item['id']: item for item in serializer.validated_data['lessons']}
+        module_items = {item['id']: item for item in serializer.validated_data['modules']}
+
+        # Ownership is checked once per kind: anything not owned by the user is
+        # simply not returned. Staff may edit every course.
+        modules = CourseModule.objects.select_for_update().filter(id__in=module_items)
+        lessons = Lesson.objects.select_for_update().filter(id__in=lesson_items)
+        if not request.user.is_staff:
+            modules = modules.filter(course__instructor=request.user)
+            lessons = lessons.filter(module__course__instructor=request.user)
+
+        with transaction.atomic():
+            modules = list(modules)
+            if len(modules) != len(module_items):
+                missing = sorted(set(module_items) - {module.id for module in modules})
+                raise PermissionDenied(f"You are not the instructor of modules {missing}.")
+
+            cascaded = 0
+            if modules:
+                for module in modules:
+                    module.is_published = module_items[module.id]['is_published']
+                CourseModule.objects.bulk_update(modules, ['is_published'])
+                for value in (True, False):
+                    module_ids = [module.id for module in modules if module.is_published is value]
+                    if module_ids:
+                        cascaded += Lesson.objects.filter(module_id__in=module_ids).update(is_published=value)
+
+            # Lessons are loaded after the cascade so explicit lesson values win
+            lessons = list(lessons)
+            if len(lessons) != len(lesson_items):
+                missing = sorted(set(lesson_items) - {lesson.id for lesson in lessons})
+                raise PermissionDenied(f"You are not the instructor of lessons {missing}.")
+
+            fields = set()
+            for lesson in lessons:
+                for field in LessonBulkUpdateItemSerializer.UPDATABLE_FIELDS:
+                    if field in lesson_items[lesson.id]:
+                        setattr(lesson, field, lesson_items[lesson.id][field])
+                        fields.add(field)
+            if lessons and fields:
+                Lesson.objects.bulk_update(lessons, sorted(fields))
+
+            # bulk_update and update() send no signals
+            course_ids = {module.course_id for module in modules}
+            course_ids.update(
+                CourseModule.objects.filter(lessons__in=[lesson.id for lesson in lessons]).values_list('course_id', flat=True)
+            )
+            if course_ids:
+                Course.touch(pk__in=course_ids)
+
+        return Response({
+            "lessons_updated": len(lessons),
+            "modules_updated": len(modules),
+            "cascaded_lessons": cascaded,
+        })
+
+class CourseModuleRetrieveUpdateDestroyView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = CourseModule.objects.all()
     serializer_class = CourseModuleSerializer
     permission_classes = [IsAuthenticated]
@@ -342,19 +464,24 @@ class CourseModuleRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIVie
         return CourseModule.objects.all()
     
 
-class CourseListView(generics.ListAPIView):
+class CourseListView(ColumnPruningMixin, generics.ListAPIView):
     """List view for courses with minimal data"""
     queryset = Course.objects.filter(status='published', is_public=True)
     serializer_class = CourseListSerializer
     permission_classes = [AllowAny]
     filter_backends = []  # Add DjangoFilterBackend, SearchFilter if needed
+    cursor_ordering = ('-created_at', '-pk')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
-class CourseDetailView(generics.RetrieveAPIView):
+    @cache_response('catalog')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+class CourseDetailView(ObjectAccessMixin, SparseFieldsMixin, generics.RetrieveAPIView):
     """Detail view for courses with full data"""
     queryset = Course.objects.all()
     serializer_class = CourseDetailSerializer
@@ -370,6 +497,10 @@ class CourseDetailView(generics.RetrieveAPIView):
             return CourseDetailSerializer
         return super().get_serializer_class()
 
+    @conditional_get(lambda view, request, pk: course_validators(pk, request.user), access=object_access)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         # For non-authenticated users, only show published courses
         if not self.request.user.is_authenticated:
@@ -398,25 +529,62 @@ class CourseCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         serializer.save(instructor=self.request.user)
 
-class EnrollmentListView(generics.ListAPIView):
+class CourseCloneView(APIView):
+    """Duplicate a course with all of its modules, lessons and materials"""
+    permission_classes = [IsAuthenticated, IsInstructor]
+
+    def post(self, request, pk):
+        course = get_object_or_404(Course, id=pk)
+        if course.instructor != request.user and not request.user.is_staff:
+            raise PermissionDenied("You are not the instructor of this course.")
+
+        title = request.data.get('title')
+        threshold = getattr(settings, 'COURSE_CLONE_ASYNC_THRESHOLD', 500)
+
+        # Very large courses are copied in the background
+        if Lesson.objects.filter(module__course=course).count() > threshold:
+            job = start_clone_job(course, request.user, title=title)
+            return Response(
+                {
+                    "message": "Course clone started",
+                    "job": job,
+                    "status_url": request.build_absolute_uri(f"/api/courses/clone-jobs/{job['id']}/"),
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        new_course = clone_course(course, instructor=request.user, title=title)
+        serializer = CourseListSerializer(new_course, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class CourseCloneJobView(APIView):
+    """Progress of a background course clone"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_clone_job(job_id)
+        if not job or (job['owner_id'] != request.user.id and not request.user.is_staff):
+            return Response({"error": "Clone job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+class EnrollmentListView(ColumnPruningMixin, StreamingListMixin, generics.ListAPIView):
     """List enrollments for the current user"""
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
+        queryset = Enrollment.objects.select_related('user', 'course')
         
         if user.is_staff:
-            return Enrollment.objects.all().select_related('user', 'course')
+            return queryset
         
         # Instructors can see enrollments in their courses
         if hasattr(user, 'is_instructor') and user.is_instructor:
-            return Enrollment.objects.filter(
-                course__instructor=user
-            ).select_related('user', 'course')
+            return queryset.filter(course__instructor=user)
         
         # Regular users can only see their own enrollments
-        return Enrollment.objects.filter(user=user).select_related('user', 'course')
+        return queryset.filter(user=user)
 
 class EnrollmentCreateView(generics.CreateAPIView):
     """Create enrollment for a course"""
@@ -454,7 +622,7 @@ class EnrollmentCreateView(generics.CreateAPIView):
             amount_paid=amount_paid
         )
 
-class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class EnrollmentDetailView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update, or delete an enrollment"""
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
@@ -636,10 +804,11 @@ class UserCourseProgressView(APIView):
         
         return Response(progress_data)
 
-class MyCoursesView(generics.ListAPIView):
+class MyCoursesView(ColumnPruningMixin, generics.ListAPIView):
     """Get courses where user is enrolled"""
     serializer_class = CourseListSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-created_at', '-pk')
 
     def get_queryset(self):
         enrollments = Enrollment.objects.filter(user=self.request.user)
@@ -651,10 +820,69 @@ class MyCoursesView(generics.ListAPIView):
         context['request'] = self.request
         return context
 
-class TeachingCoursesView(generics.ListAPIView):
+class LearnerDashboardView(generics.ListAPIView):
+    """
+    The user's enrolled courses with progress, last access, completion and the
+    lesson to resume: one query for the page of enrollments (the per-course
+    numbers are correlated subqueries), one for the resume lessons and one for
+    the student counts, however many enrollments there are.
+    """
+    serializer_class = DashboardEnrollmentSerializer
+    permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-enrolled_at', '-pk')
+    course_fields = [
+        'id', 'title', 'subtitle', 'slug', 'image', 'price', 'has_discount', 'discount_price',
+        'discount_expiry', 'level', 'duration', 'status', 'featured', 'created_at',
+    ]
+
+    def get_queryset(self):
+        progress = CourseProgress.objects.filter(enrollment=OuterRef('pk')).order_by()
+        lessons = Lesson.objects.filter(module__course=OuterRef('course_id')).order_by()
+        completed_lessons = CourseProgress.objects.filter(enrollment=OuterRef(OuterRef('pk')), completed=True)
+        return (
+            Enrollment.objects.filter(user=self.request.user)
+            .select_related('course__instructor', 'course__category')
+            .only(
+                'id', 'course_id', 'enrolled_at', 'payment_status', 'completed', 'completed_at',
+                *[f'course__{field}' for field in self.course_fields],
+                'course__instructor__username', 'course__category__name',
+            )
+            .annotate(
+                **enrollment_progress_annotations(self.request),
+                last_accessed=Subquery(progress.order_by('-last_accessed').values('last_accessed')[:1]),
+                started_lesson_id=Subquery(
+                    progress.filter(completed=False).order_by('-last_accessed').values('lesson_id')[:1]
+                ),
+                next_lesson_id=Subquery(
+                    lessons.exclude(pk__in=completed_lessons.values('lesson_id'))
+                    .order_by('module__order', 'order', 'pk').values('pk')[:1]
+                ),
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        course_ids = [enrollment.course_id for enrollment in page]
+        resume_ids = {enrollment.started_lesson_id or enrollment.next_lesson_id for enrollment in page} - {None}
+        context = {
+            **self.get_serializer_context(),
+            'lessons': {
+                lesson['id']: lesson
+                for lesson in Lesson.objects.filter(pk__in=resume_ids).values('id', 'title', 'module_id')
+            } if resume_ids else {},
+            'student_counts': dict(
+                Course.students.through.objects.filter(course_id__in=course_ids)
+                .values('course_id').annotate(count=Count('pk')).values_list('course_id', 'count')
+            ) if course_ids else {},
+        }
+        serializer = self.get_serializer_class()(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
+
+class TeachingCoursesView(ColumnPruningMixin, generics.ListAPIView):
     """Get courses taught by the current user (for instructors)"""
     serializer_class = CourseListSerializer
     permission_classes = [IsAuthenticated, IsInstructor]
+    cursor_ordering = ('-created_at', '-pk')
 
     def get_queryset(self):
         return Course.objects.filter(instructor=self.request.user)
@@ -664,7 +892,7 @@ class TeachingCoursesView(generics.ListAPIView):
         context['request'] = self.request
         return context
 
-class CourseMaterialRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class CourseMaterialRetrieveUpdateDestroyView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update, or delete course material"""
     queryset = CourseMaterial.objects.all()
     serializer_class = CourseMaterialSerializer
@@ -707,36 +935,11 @@ class MarkLessonComplete(APIView):
     
     def post(self, request, lesson_id):
         try:
-            lesson = get_object_or_404(Lesson, id=lesson_id)
-            user = request.user
-            
-            # Get or create enrollment for this course
-            enrollment, created = Enrollment.objects.get_or_create(
-                user=user,
-                course=lesson.module.course,
-                defaults={
-                    'payment_status': 'free' if not lesson.module.course.is_paid else 'pending'
-                }
-            )
-            
-            # Get or create course progress
-            progress, created = CourseProgress.objects.get_or_create(
-                enrollment=enrollment,
-                lesson=lesson,
-                defaults={
-                    'completed': True,
-                    'completed_at': timezone.now()
-                }
-            )
-            
-            if not progress.completed:
-                progress.completed = True
-                progress.completed_at = timezone.now()
-                progress.save()
-            
-            # Check if course is completed
-            self.check_course_completion(enrollment)
-            
+            lesson = get_object_or_404(Lesson.objects.select_related('module__course'), id=lesson_id)
+
+            # Concurrent completions are batched into one transaction by the write queue
+            progress = write_queue.run(self.record_completion, request.user, lesson)
+
             return Response({
                 'message': 'Lesson marked as completed',
                 'progress': CourseProgressSerializer(progress).data
@@ -748,6 +951,35 @@ class MarkLessonComplete(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def record_completion(self, user, lesson):
+        # Get or create enrollment for this course
+        enrollment, created = Enrollment.objects.get_or_create(
+            user=user,
+            course=lesson.module.course,
+            defaults={
+                'payment_status': 'free' if not lesson.module.course.is_paid else 'pending'
+            }
+        )
+
+        # Get or create course progress
+        progress, created = CourseProgress.objects.get_or_create(
+            enrollment=enrollment,
+            lesson=lesson,
+            defaults={
+                'completed': True,
+                'completed_at': timezone.now()
+            }
+        )
+
+        if not progress.completed:
+            progress.completed = True
+            progress.completed_at = timezone.now()
+            progress.save()
+
+        # Check if course is completed
+        self.check_course_completion(enrollment)
+        return progress
+
     def check_course_completion(self, enrollment):
         """Check if all lessons in the course are completed"""
         course = enrollment.course
@@ -781,12 +1013,16 @@ class CourseProgressView(APIView):
     
     def get_course_progress(self, enrollment):
         course = enrollment.course
-        modules = course.modules.prefetch_related('lessons').all()
+        modules = course.modules.annotate(lesson_count=Count('lessons'))
         total_lessons = Lesson.objects.filter(module__course=course).count()
-        completed_lessons = CourseProgress.objects.filter(
+        completed = CourseProgress.objects.filter(
             enrollment=enrollment,
             completed=True
-        ).count()
+        )
+        completed_lessons = completed.count()
+        completed_by_module = dict(
+            completed.values('lesson__module').annotate(count=Count('id')).values_list('lesson__module', 'count')
+        )
         
         progress_percentage = 0
         if total_lessons > 0:
@@ -794,12 +1030,8 @@ class CourseProgressView(APIView):
         
         module_progress = []
         for module in modules:
-            module_lessons = module.lessons.count()
-            completed_module_lessons = CourseProgress.objects.filter(
-                enrollment=enrollment,
-                lesson__module=module,
-                completed=True
-            ).count()
+            module_lessons = module.lesson_count
+            completed_module_lessons = completed_by_module.get(module.id, 0)
             
             module_progress.append({
                 'module_id': module.id,
@@ -828,12 +1060,12 @@ class EnrollmentProgressView(APIView):
         return Response(progress_data)
 
 
-class LessonListView(generics.ListAPIView):
+class LessonListView(ColumnPruningMixin, StreamingListMixin, generics.ListAPIView):
     """Get all lessons"""
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
 
-class LessonBySlugView(generics.RetrieveUpdateDestroyAPIView):
+class LessonBySlugView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     """Get lesson by slug/title"""
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
@@ -843,6 +1075,10 @@ class LessonBySlugView(generics.RetrieveUpdateDestroyAPIView):
         title = self.kwargs.get('slug')
         return get_object_or_404(Lesson, title=title)
 
+    @conditional_get(lambda view, request, slug: lesson_validators(request.user, title=slug))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 class LessonReorderView(generics.UpdateAPIView):
     """Reorder lessons within a module"""
     queryset = Lesson.objects.all()
@@ -863,6 +1099,89 @@ class LessonReorderView(generics.UpdateAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+class BulkReorderMixin:
+    """
+    Shared PATCH handler for reordering every child of a container in one call.
+    Expects {"<items_key>": [id, id, ...]} with the complete new order.
+
+    Views declare the container (``container_model`` looked up by the
+    ``container_kwarg`` URL kwarg), the reverse relation holding its children
+    (``children_relation``) and the path from the container to its course
+    (``course_field``, None when the container is the course).
+    """
+    items_key = None
+    container_model = None
+    container_kwarg = None
+    children_relation = None
+    course_field = None
+    unique_order = False
+
+    def get_container(self):
+        queryset = self.container_model.objects.all()
+        if self.course_field:
+            queryset = queryset.select_related(self.course_field)
+        return get_object_or_404(queryset, id=self.kwargs[self.container_kwarg])
+
+    def get_course(self, container):
+        return getattr(container, self.course_field) if self.course_field else container
+
+    def get_children(self, container):
+        return getattr(container, self.children_relation).all()
+
+    def patch(self, request, *args, **kwargs):
+        container = self.get_container()
+        if self.get_course(container).instructor_id != request.user.id:
+            raise PermissionDenied("You are not the instructor of this course.")
+
+        ordered_ids = request.data.get(self.items_key)
+        if not isinstance(ordered_ids, list):
+            return Response(
+                {'error': f"'{self.items_key}' must be a list of ids in the new order"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            children = self.get_children(container)
+            child_model = children.model
+            children = list(children.select_for_update().only('id', 'order'))
+            try:
+                ordered_ids = [int(pk) for pk in ordered_ids]
+            except (TypeError, ValueError):
+                ordered_ids = None
+            if ordered_ids is None or len(ordered_ids) != len(children) or \
+                    set(ordered_ids) != {child.id for child in children}:
+                return Response(
+                    {'error': f"'{self.items_key}' must list every item exactly once"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            changed = apply_order(child_model, children, ordered_ids, unique=self.unique_order)
+            if changed:
+                Course.touch(pk=self.get_course(container).pk)  # bulk_update sends no signals
+
+        by_id = {child.id: child for child in children}
+        return Response({
+            'updated': len(changed),
+            self.items_key: [{'id': pk, 'order': by_id[pk].order} for pk in ordered_ids],
+        })
+
+class ModuleLessonReorderView(BulkReorderMixin, APIView):
+    """Reorder all lessons of a module in one request"""
+    permission_classes = [IsAuthenticated, IsInstructor]
+    items_key = 'lessons'
+    container_model = CourseModule
+    container_kwarg = 'module_id'
+    children_relation = 'lessons'
+    course_field = 'course'
+
+class CourseModuleReorderView(BulkReorderMixin, APIView):
+    """Reorder all modules of a course in one request"""
+    permission_classes = [IsAuthenticated, IsInstructor]
+    items_key = 'modules'
+    container_model = Course
+    container_kwarg = 'course_id'
+    children_relation = 'modules'
+    unique_order = True
+
 class VideoStreamView(APIView):
     """Stream video files securely with authentication"""
     permission_classes = [IsAuthenticated]
@@ -907,10 +1226,10 @@ class VideoStreamView(APIView):
         enrollment = Enrollment.objects.filter(
             user=user,
             course=lesson.module.course,
-            payment_status__in=['completed', 'free']
+            payment_status__in=ACCESS_PAYMENT_STATUSES
         ).first()
         
-        return enrollment is not None
+        return course_access(lesson.module.course, enrollment.id if enrollment else None)['has_access']
 
     def _stream_video(self, request, file_path, filename):
         """Stream video file with proper headers"""
@@ -956,16 +1275,29 @@ class LessonVideoInfoView(APIView):
     """Get video information including streaming URL"""
     permission_classes = [IsAuthenticated]
 
+    @conditional_get(
+        lambda view, request, lesson_id: lesson_validators(request.user, pk=lesson_id),
+        access=lambda view, request, lesson_id: view.check_access(request, lesson_id),
+    )
     def get(self, request, lesson_id):
-        lesson = get_object_or_404(Lesson, id=lesson_id)
-        
-        # Check access
-        if not self._has_access(request.user, lesson):
-            return Response(
-                {"error": "You don't have access to this lesson"},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        return Response(self.video_info(request, self.lesson))
+
+    def check_access(self, request, lesson_id):
+        """None if the user may watch the lesson (kept in self.lesson), else the error response"""
+        self.lesson = get_object_or_404(Lesson, id=lesson_id)
+        if not self._has_access(request.user, self.lesson):
+            return self.no_access_response()
+        return None
+
+    def no_access_response(self):
+        return Response(
+            {"error": "You don't have access to this lesson"},
+            status=status.HTTP_403_FORBIDDEN
+        )
 
+    @staticmethod
+    def video_info(request, lesson):
+        """Reads only the lesson's own columns, so CoursePlayerView builds it for every lesson from one query"""
         video_info = {
             'lesson_id': lesson.id,
             'lesson_title': lesson.title,
@@ -983,7 +1315,7 @@ class LessonVideoInfoView(APIView):
         elif lesson.video_url:
             video_info['video_url'] = lesson.video_url
 
-        return Response(video_info)
+        return video_info
 
     def _has_access(self, user, lesson):
         """Same access check as above"""
@@ -993,11 +1325,115 @@ class LessonVideoInfoView(APIView):
         enrollment = Enrollment.objects.filter(
             user=user,
             course=lesson.module.course,
-            payment_status__in=['completed', 'free']
+            payment_status__in=ACCESS_PAYMENT_STATUSES
         ).first()
         
-        return enrollment is not None
-    
+        return course_access(lesson.module.course, enrollment.id if enrollment else None)['has_access']
+
+
+class CoursePlayerView(APIView):
+    """
+    Everything the lesson player needs in one response: the outline with
+    each lesson's video info and completion, the access decision (as
+    check-access), progress and the lesson to resume. Five queries whatever
+    the size of the course.
+    """
+    permission_classes = [IsAuthenticated]
+    lesson_fields = (
+        'id', 'module_id', 'title', 'order', 'duration', 'is_published', 'is_preview',
+        'video_file', 'video_url', 'thumbnail',
+    )
+
+    @conditional_get(lambda view, request, course_id: course_validators(course_id, request.user))
+    def get(self, request, course_id):
+        course = get_object_or_404(Course.objects.only('id', 'title', 'slug', 'is_paid', 'price'), id=course_id)
+        enrollment = (
+            Enrollment.objects.filter(user=request.user, course=course)
+            .values('id', 'payment_status', 'completed')
+            .first()
+        )
+        access_enrollment_id = enrollment['id'] if enrollment and enrollment['payment_status'] in ACCESS_PAYMENT_STATUSES else None
+        access = course_access(course, access_enrollment_id)
+        has_access = access['has_access']
+
+        progress = {}
+        if enrollment:
+            progress = {
+                lesson_id: (completed, time_spent, last_accessed)
+                for lesson_id, completed, time_spent, last_accessed in CourseProgress.objects.filter(
+                    enrollment_id=enrollment['id'],
+                ).values_list('lesson_id', 'completed', 'time_spent', 'last_accessed')
+            }
+        completed = {lesson_id for lesson_id, (done, _, _) in progress.items() if done}
+
+        lessons_by_module = {}
+        for lesson in Lesson.objects.filter(module__course=course).only(*self.lesson_fields).order_by('order', 'id'):
+            lessons_by_module.setdefault(lesson.module_id, []).append(lesson)
+
+        modules = []
+        outline = []
+        for module in CourseModule.objects.filter(course=course).values('id', 'title', 'order', 'description', 'is_published'):
+            lessons = lessons_by_module.get(module['id'], [])
+            module_completed = sum(1 for lesson in lessons if lesson.id in completed)
+            modules.append({
+                **module,
+                'completed_lessons': module_completed,
+                'total_lessons': len(lessons),
+                'progress': (module_completed / len(lessons) * 100) if lessons else 0,
+                'lessons': [
+                    {
+                        'id': lesson.id,
+                        'title': lesson.title,
+                        'order': lesson.order,
+                        'duration': lesson.duration,
+                        'is_published': lesson.is_published,
+                        'is_preview': lesson.is_preview,
+                        'is_completed': lesson.id in completed,
+                        'video': LessonVideoInfoView.video_info(request, lesson) if has_access else None,
+                    }
+                    for lesson in lessons
+                ],
+            })
+            outline.extend((module['id'], lesson.id) for lesson in lessons)
+
+        total_lessons = len(outline)
+        completed_lessons = sum(1 for _, lesson_id in outline if lesson_id in completed)
+        return Response({
+            'course': {'id': course.id, 'title': course.title, 'slug': course.slug},
+            'access': access,
+            'progress': {
+                'enrolled': enrollment is not None,
+                'total_lessons': total_lessons,
+                'completed_lessons': completed_lessons,
+                'progress_percentage': (completed_lessons / total_lessons) * 100 if total_lessons > 0 else 0,
+                'is_completed': bool(enrollment and enrollment['completed']),
+            },
+            'completed_lessons': [lesson_id for _, lesson_id in outline if lesson_id in completed],
+            'resume': self.resume_position(outline, progress, completed),
+            'modules': modules,
+        })
+
+    def resume_position(self, outline, progress, completed):
+        """The unfinished lesson opened last, else the first unfinished one; None once all are done"""
+        module_of = {lesson_id: module_id for module_id, lesson_id in outline}
+        started = [
+            (last_accessed, lesson_id) for lesson_id, (done, _, last_accessed) in progress.items()
+            if not done and lesson_id in module_of
+        ]
+        if started:
+            lesson_id = max(started)[1]
+        else:
+            lesson_id = next((lesson_id for _, lesson_id in outline if lesson_id not in completed), None)
+            if lesson_id is None:
+                return None
+        time_spent, last_accessed = progress[lesson_id][1:] if lesson_id in progress else (0, None)
+        return {
+            'module_id': module_of[lesson_id],
+            'lesson_id': lesson_id,
+            'time_spent': time_spent,
+            'last_accessed': last_accessed,
+        }
+
 
 class MarkCourseCompleteView(APIView):
     """Mark a course as completed for the current user"""
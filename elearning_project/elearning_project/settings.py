@@ -50,6 +50,8 @@ INSTALLED_APPS = [
     # 'user_app',
     'registration_app',
     'courses_app',
+    'monitoring_app',
+    'core_app',
     # 'payment_app',
 ]
 
@@ -62,6 +64,26 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON (core_app.renderers), same output as DRF's JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'core_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core_app.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Cursor pagination on every list endpoint (core_app.pagination)
+    'DEFAULT_PAGINATION_CLASS': 'core_app.pagination.CursorPagination',
+    'PAGE_SIZE': 50,
+}
+
+PAGINATION = {
+    'MAX_PAGE_SIZE': 200,           # upper bound of ?page_size=
+    'PAGE_SIZE_QUERY_PARAM': 'page_size',
+    'COUNT_QUERY_PARAM': 'count',   # ?count=true adds the total, from cached counters
+    'COUNT_TTL': 30,                # seconds, for counts over tables QUERY_CACHE does not track
 }
 
 SWAGGER_SETTINGS = {
@@ -77,19 +99,134 @@ SWAGGER_SETTINGS = {
 
 
 MIDDLEWARE = [
+    'core_app.invalidation.InvalidationMiddleware',
+    'monitoring_app.middleware.MetricsMiddleware',
+    'monitoring_app.middleware.QueryProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core_app.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring_app.middleware.ProfilingMiddleware',
     
 
 
 ]
 
+# Per-request SQL profiling (X-DB-Queries / X-DB-Time headers + N+1 warnings).
+# Can be switched on in production with a sampling rate through the environment.
+SQL_PROFILING = {
+    'ENABLED': DEBUG or os.environ.get('SQL_PROFILING') == '1',
+    'SAMPLE_RATE': float(os.environ.get('SQL_PROFILING_SAMPLE_RATE', '1.0')),
+    'REPEAT_THRESHOLD': 5,
+    'RESPONSE_HEADERS': True,
+    'LOG_ALL': False,
+}
+
+# Prometheus-style /metrics. Set METRICS_MULTIPROC_DIR when running several
+# worker processes so every worker's numbers are merged on scrape. Scrapers send
+# "Authorization: Bearer $METRICS_TOKEN"; otherwise only staff users and
+# METRICS_ALLOWED_IPS (comma-separated, default none) can read it. Do not list
+# loopback behind a local reverse proxy: every client's REMOTE_ADDR is loopback there.
+METRICS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': os.environ.get('METRICS_MULTIPROC_DIR'),
+    'FLUSH_INTERVAL': 5,
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+    'ALLOWED_IPS': [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip],
+}
+
+# On-demand cProfile of single requests: staff send "X-Profile: 1" (or ?profile=1),
+# PROFILING_SAMPLE_RATE profiles a fraction of all traffic. Results are listed in the admin.
+PROFILING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', '0')),
+    'HEADER': 'X-Profile',
+    'QUERY_PARAM': 'profile',
+    'TOP_FUNCTIONS': 40,
+}
+
+# Shared (L2) cache. The file backend is shared by all workers of one node;
+# set CACHE_BACKEND/CACHE_LOCATION to e.g. django.core.cache.backends.redis.RedisCache
+# and redis://... when running several nodes.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+    }
+}
+
+# Two-tier cache (core_app.cache): in-process LRU in front of CACHES['default'],
+# with single-flight recomputation and early refresh. TTLs per namespace in seconds.
+CACHE_LAYER = {
+    'L2_ALIAS': 'default',
+    'L1_MAX_ENTRIES': 2000,
+    'DEFAULT_TTL': 300,
+    'DEFAULT_L1_TTL': 10,
+    'NAMESPACES': {
+        'catalog': {'ttl': 60, 'l1_ttl': 5},    # invalidated on course/category changes, student counts may lag
+        'categories': {'ttl': 3600, 'l1_ttl': 30},
+    },
+}
+
+# Generational ORM result cache (core_app.querycache): querysets of these models
+# ending in .cached() are served from CACHE_LAYER until any write to a table they read.
+# Enrollment and CourseProgress are written on every lesson completion, so they are
+# not tracked; their pagination counts are kept PAGINATION['COUNT_TTL'] seconds.
+QUERY_CACHE = {
+    'ENABLED': True,
+    'MODELS': [
+        'courses_app.Category',
+        'courses_app.Course',
+        'courses_app.CourseModule',
+        'courses_app.Lesson',
+        'courses_app.CourseMaterial',
+    ],
+    'TTL': 600,
+}
+
+# Cross-worker invalidation of in-process caches (core_app.invalidation): events
+# are rows in core_app_invalidationevent, each worker polls for new ones at most
+# every POLL_INTERVAL seconds.
+INVALIDATION_BUS = {
+    'ENABLED': True,
+    'DATABASE': 'default',
+    'POLL_INTERVAL': float(os.environ.get('INVALIDATION_POLL_INTERVAL', '1.0')),
+    'BATCH_SIZE': 1000,
+    'OVERLAP': 10,
+    'RETENTION': 3600,
+}
+
+# POST /api/batch/ (core_app.batch): up to MAX_REQUESTS API GETs per request, run
+# under one authentication and one identity map of IDENTITY_MAP_MODELS.
+BATCH = {
+    'MAX_REQUESTS': 20,
+    'IDENTITY_MAP_MODELS': ['courses_app.Course', 'courses_app.Enrollment'],
+}
+
+# Background jobs (core_app.jobs): rows in core_app_job, run by "manage.py run_jobs"
+# ("invoke worker"). JOB_QUEUE_IN_PROCESS=1 also runs them in a thread of every web
+# process, so a development server needs no separate worker; it is off by default so
+# that production web processes, tests and management commands do not poll the queue.
+JOB_QUEUE = {
+    'IN_PROCESS': os.environ.get('JOB_QUEUE_IN_PROCESS', '0') == '1',
+    'THREADS': int(os.environ.get('JOB_QUEUE_THREADS', '2')),
+    'POLL_INTERVAL': 1.0,
+    'RETRY_DELAY': 10,
+    'MAX_RETRY_DELAY': 3600,
+    'LEASE': 3600,
+}
+
+# Async-native versions of the hottest read endpoints (courses_app.async_views).
+# asgi.py turns them on; WSGI workers keep the sync views.
+ASYNC_VIEWS = {
+    'ENABLED': os.environ.get('ASYNC_VIEWS', '0') == '1',
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -128,6 +265,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-profile',
 ]
 
 ROOT_URLCONF = 'elearning_project.urls'
@@ -161,6 +299,55 @@ DATABASES = {
     }
 }
 
+# Production SQLite profile for small deployments (SQLITE_PRODUCTION=1): WAL and
+# tuned PRAGMAs on every connection (core_app.signals), persistent connections,
+# BEGIN IMMEDIATE so writers queue on busy_timeout instead of failing on lock
+# upgrade, and the coalescing write queue (core_app.write_queue) for hot writes.
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION') == '1'
+SQLITE_PRAGMAS = {}
+if SQLITE_PRODUCTION:
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',    # durable with WAL except on power loss
+        'busy_timeout': 5000,       # ms
+        'cache_size': -32000,       # KiB (negative) = 32 MB page cache
+        'mmap_size': 268435456,     # 256 MB memory-mapped I/O
+        'temp_store': 'MEMORY',
+    }
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 5},
+    })
+
+WRITE_QUEUE = {
+    'ENABLED': SQLITE_PRODUCTION,
+    'MAX_BATCH': 100,
+    'LINGER_MS': 5,
+    'TIMEOUT': 30,
+    'RETRIES': 3,
+}
+
+# Read replicas. Safe-method requests read from a replica, writes and the reads
+# of a client for STICKY_SECONDS after its last write go to 'default'.
+# Locally, SQLITE_REPLICA=/path/to/replica.sqlite3 adds a second SQLite file as
+# replica; "manage.py sync_replicas" copies the primary into it.
+if os.environ.get('SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['SQLITE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core_app.db_routing.PrimaryReplicaRouter']
+DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    # random_replica, round_robin_replica, client_hash_replica or any callable(replicas, request)
+    'SELECTOR': os.environ.get('DB_REPLICA_SELECTOR', 'core_app.db_routing.random_replica'),
+    'STICKY_SECONDS': int(os.environ.get('DB_STICKY_SECONDS', '10')),
+    'COOKIE_NAME': 'db_primary_until',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -210,6 +397,13 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Files that must not be served from MEDIA_URL (admin exports, profiler dumps);
+# staff download them through the admin (core_app.storage.private_storage).
+PRIVATE_ROOT = os.environ.get('PRIVATE_ROOT', os.path.join(BASE_DIR, 'private'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'registration_app.CustomUser'
 INSTRUCTOR_USERNAME = "instructor_user"
+
+# Courses with more lessons than this are cloned in a background job
+COURSE_CLONE_ASYNC_THRESHOLD = 500
@@ -5,6 +5,7 @@ from rest_framework.authtoken.views import obtain_auth_token
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
+from monitoring_app.views import metrics_view
 
 # Swagger schema view
 schema_view = get_schema_view(
@@ -24,10 +25,14 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('registration_app.urls')),  # Include registration_app URLs
     path('api/', include('courses_app.urls')),      # Include courses_app URLs
+    path('api/', include('core_app.urls')),         # Batch requests, background job status
 
     # api documentation urls
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+
+    # Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # to handle images
@@ -0,0 +1,44 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'trigger', 'user', 'download')
+    list_filter = ('trigger', 'method', 'status_code')
+    search_fields = ('path', 'view_name')
+    date_hierarchy = 'created_at'
+    list_select_related = ('user',)
+    readonly_fields = (
+        'created_at', 'user', 'method', 'path', 'view_name', 'status_code',
+        'duration_ms', 'trigger', 'download', 'summary', 'breakdown',
+    )
+    exclude = ('stats_file',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download_view), name='monitoring_app_requestprofile_download'),
+        ]
+        return urls + super().get_urls()
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not profile.stats_file:
+            raise Http404("Profile has no stats file")
+        return FileResponse(profile.stats_file.open('rb'), as_attachment=True, filename=f"request-{profile.pk}.prof")
+
+    def download(self, obj):
+        url = reverse('admin:monitoring_app_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">.prof</a>', url)
+    download.short_description = 'Stats'
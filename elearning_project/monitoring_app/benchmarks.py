@@ -0,0 +1,317 @@
+"""
+In-process endpoint benchmarks.
+
+Each endpoint is called through the DRF test client (full middleware and
+view stack, no network) against whatever database is configured, typically
+one filled with ``manage.py seed_scale``. For every endpoint the report keeps
+p50/p95 latency and the number of queries of one request; query counts are
+deterministic for a given dataset, so they are compared against hard budgets,
+while latencies are compared against a stored baseline with a tolerance.
+The body of every endpoint is also encoded with DRF's stdlib JSONRenderer and
+with core_app.renderers.FastJSONRenderer to show the time the latter saves.
+
+run_throughput() measures requests per second of the endpoints that have an
+async version (courses_app.async_views) under concurrent clients: through the
+WSGI handler from a pool of threads, or through the ASGI handler from one
+event loop. A process serves either the sync or the async views
+(ASYNC_VIEWS), so ``benchmark_endpoints --compare-servers`` runs each server
+in a subprocess configured like the deployment.
+"""
+import asyncio
+import datetime
+import platform
+import statistics
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q
+from django.test import AsyncClient, Client, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core_app.async_views import async_views_settings
+from core_app.cache import cache_layer
+from core_app.renderers import FastJSONRenderer
+from courses_app.models import Course, Enrollment, Lesson
+from .sql import QueryRecorder
+
+# ``uncached`` names a core_app.cache namespace emptied before every request,
+# to measure the cache misses of an endpoint using cache_response
+Endpoint = namedtuple('Endpoint', 'name path authenticated budget uncached', defaults=(None,))
+
+# Query budgets are the query counts of the default seed_scale dataset, which
+# do not grow with the size of a page, a course or the number of enrollments:
+# a budget above the measured count hides the next N+1, so lower them whenever
+# an endpoint gets cheaper. detail, content and stream_info include the two
+# ETag validator queries; catalog and search are one page (PAGE_SIZE) of results.
+ENDPOINTS = [
+    Endpoint('catalog', '/api/courses/list/', False, 0),
+    Endpoint('catalog_miss', '/api/courses/list/', False, 1, uncached='catalog'),
+    Endpoint('detail', '/api/courses/{course}/detail/', True, 7),
+    Endpoint('detail_sparse', '/api/courses/{course}/detail/?fields=id,title,modules.title,modules.lessons.title', True, 5),
+    Endpoint('content', '/api/courses/{course}/content/', True, 7),
+    Endpoint('progress', '/api/courses/{course}/progress/', True, 7),
+    Endpoint('check_access', '/api/courses/{course}/check-access/', True, 2),
+    Endpoint('enrollments', '/api/enrollments/', True, 1),
+    Endpoint('stream_info', '/api/lessons/{lesson}/video-info/', True, 6),
+    Endpoint('player', '/api/courses/{course}/player/', True, 7),
+    Endpoint('dashboard', '/api/my-dashboard/', True, 3),
+    Endpoint('search', '/api/courses/search/?query={query}', False, 2),
+]
+
+# endpoints with an async version, for run_throughput()
+ASYNC_ENDPOINTS = ['catalog', 'detail', 'content', 'check_access', 'progress', 'stream_info']
+SERVERS = ('wsgi', 'asgi')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def pick_fixtures():
+    """
+    The most popular published course, a learner with access to it and one
+    of its lessons, so every endpoint exercises its heaviest realistic path.
+    """
+    course = (
+        Course.objects.filter(status='published', is_public=True)
+        .annotate(_enrollments=Count('enrollment', filter=Q(enrollment__payment_status__in=['completed', 'free'])))
+        .order_by('-_enrollments', 'pk')
+        .first()
+    )
+    if course is None:
+        raise ValueError("No published course found, seed the database first (manage.py seed_scale).")
+    enrollment = (
+        Enrollment.objects.filter(course=course, payment_status__in=['completed', 'free'])
+        .annotate(_progress=Count('progress'))
+        .select_related('user')
+        .order_by('-_progress', 'pk')
+        .first()
+    )
+    if enrollment is None:
+        raise ValueError(f"Course {course.pk} has no enrolled learner.")
+    lesson = Lesson.objects.filter(module__course=course).order_by('module__order', 'order').first()
+    return {
+        'user': enrollment.user,
+        'course': course.pk,
+        'lesson': lesson.pk if lesson else 0,
+        'query': course.title.split()[0].lower(),
+    }
+
+
+def measure(client, path, iterations, warmup, uncached=None):
+    for _ in range(warmup):
+        client.get(path)
+
+    timings = []
+    queries = 0
+    status_code = None
+    for _ in range(iterations):
+        if uncached:
+            cache_layer.invalidate_namespace(uncached)
+        with QueryRecorder() as recorder:
+            start = time.perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, recorder.count)
+        status_code = response.status_code
+
+    return {
+        'path': path,
+        'status': status_code,
+        'queries': queries,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'mean_ms': round(statistics.fmean(timings), 2),
+        'iterations': iterations,
+        'encode': measure_encoding(getattr(response, 'data', None), iterations),
+    }
+
+
+def measure_encoding(data, iterations):
+    """p50 time to render ``data`` with the stdlib and the fast JSON renderer"""
+    if data is None:
+        return None  # streamed or not a DRF response
+    result = {}
+    for name, renderer in (('stdlib', JSONRenderer()), ('fast', FastJSONRenderer())):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            body = renderer.render(data, 'application/json')
+            timings.append((time.perf_counter() - start) * 1000)
+        result[f'{name}_ms'] = round(percentile(timings, 50), 3)
+    result['bytes'] = len(body)
+    return result
+
+
+def run_benchmarks(iterations=20, warmup=2, only=None, progress=None):
+    """Run every endpoint (or those named in ``only``) and return the report dict"""
+    fixtures = pick_fixtures()
+    anonymous = APIClient(HTTP_HOST='localhost')
+    authenticated = APIClient(HTTP_HOST='localhost')
+    authenticated.force_authenticate(fixtures['user'])
+
+    results = {}
+    # keep the profiling middlewares and the (time-based) invalidation polling out of the measurement
+    with override_settings(
+        SQL_PROFILING={'ENABLED': False}, PROFILING={'ENABLED': False}, INVALIDATION_BUS={'ENABLED': False},
+    ):
+        for endpoint in ENDPOINTS:
+            if only and endpoint.name not in only:
+                continue
+            path = endpoint.path.format(**fixtures)
+            client = authenticated if endpoint.authenticated else anonymous
+            results[endpoint.name] = measure(client, path, iterations, warmup, endpoint.uncached)
+            results[endpoint.name]['budget'] = endpoint.budget
+            if progress:
+                progress(endpoint.name, results[endpoint.name])
+
+    return {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'dataset': {
+            'courses': Course.objects.count(),
+            'enrollments': Enrollment.objects.count(),
+            'course': fixtures['course'],
+            'user': fixtures['user'].pk,
+        },
+        'endpoints': results,
+    }
+
+
+def run_throughput(server, concurrency=8, requests=200, only=None, progress=None):
+    """
+    Requests per second and latency of each endpoint of ASYNC_ENDPOINTS (or
+    those named in ``only``) with ``concurrency`` clients sending ``requests``
+    requests in total, through the ``server`` handler ('wsgi' or 'asgi').
+    Clients authenticate with a token, as the async test client cannot force
+    authentication.
+    """
+    if server not in SERVERS:
+        raise ValueError(f"Unknown server {server!r}, expected one of {', '.join(SERVERS)}.")
+    if async_views_settings()['ENABLED'] != (server == 'asgi'):
+        raise ValueError(f"The {server} benchmark needs ASYNC_VIEWS['ENABLED'] = {server == 'asgi'}.")
+    fixtures = pick_fixtures()
+    token, _ = Token.objects.get_or_create(user=fixtures['user'])
+    headers = {'Authorization': f'Token {token.key}'}
+    measure_server = measure_wsgi_throughput if server == 'wsgi' else measure_asgi_throughput
+
+    results = {}
+    # the async test client always sends Host: testserver
+    with override_settings(
+        SQL_PROFILING={'ENABLED': False}, PROFILING={'ENABLED': False}, INVALIDATION_BUS={'ENABLED': False},
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+    ):
+        for endpoint in ENDPOINTS:
+            if endpoint.name not in ASYNC_ENDPOINTS or (only and endpoint.name not in only):
+                continue
+            path = endpoint.path.format(**fixtures)
+            results[endpoint.name] = measure_server(
+                path, headers if endpoint.authenticated else {}, concurrency, requests,
+            )
+            if progress:
+                progress(endpoint.name, results[endpoint.name])
+    return {'server': server, 'concurrency': concurrency, 'requests': requests, 'endpoints': results}
+
+
+def throughput_result(path, samples):
+    """``samples`` are (start, end, status) of every request, warm-up requests excluded"""
+    elapsed = max(end for _, end, _ in samples) - min(start for start, _, _ in samples)
+    timings = [(end - start) * 1000 for start, end, _ in samples]
+    return {
+        'path': path,
+        'status': sorted({status for _, _, status in samples}),
+        'requests_per_s': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+    }
+
+
+def measure_wsgi_throughput(path, headers, concurrency, requests):
+    """A thread per client, each with its own database connection, as in a threaded WSGI server"""
+    samples = []
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        client = Client(headers=headers)
+        client.get(path)  # warm-up: connection and caches
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                start = time.perf_counter()
+                response = client.get(path)
+                with lock:
+                    samples.append((start, time.perf_counter(), response.status_code))
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return throughput_result(path, samples)
+
+
+def measure_asgi_throughput(path, headers, concurrency, requests):
+    """``concurrency`` tasks on one event loop; each request gets its own sync thread, as under an ASGI server"""
+    samples = []
+    remaining = iter(range(requests))
+
+    async def get(client):
+        async with ThreadSensitiveContext():
+            # default headers of the async client are given WSGI names, which it sends as they are
+            return await client.get(path, headers=headers)
+
+    async def worker():
+        client = AsyncClient()
+        await get(client)  # warm-up
+        while next(remaining, None) is not None:
+            start = time.perf_counter()
+            response = await get(client)
+            samples.append((start, time.perf_counter(), response.status_code))
+
+    async def run():
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    asyncio.run(run())
+    return throughput_result(path, samples)
+
+
+def over_budget(report):
+    return [
+        (name, result['queries'], result['budget'])
+        for name, result in report['endpoints'].items()
+        if result['queries'] > result['budget']
+    ]
+
+
+def compare(report, baseline, tolerance=0.25):
+    """
+    Regressions against a previous report: more queries than before, or a
+    p95 more than ``tolerance`` (a fraction) above the baseline p95.
+    """
+    regressions = []
+    for name, result in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries']:
+            regressions.append((name, 'queries', previous['queries'], result['queries']))
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append((name, 'p95_ms', previous['p95_ms'], result['p95_ms']))
+    return regressions
@@ -0,0 +1,147 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring_app.benchmarks import ENDPOINTS, SERVERS, compare, over_budget, run_benchmarks, run_throughput
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the key API endpoints in-process against the configured (seeded) database. "
+        "Writes p50/p95 latency and query counts to a JSON report and fails when an endpoint "
+        "exceeds its query budget or regresses against --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            choices=[endpoint.name for endpoint in ENDPOINTS],
+                            help="Only run this endpoint (repeatable)")
+        parser.add_argument('--report', default='benchmark-report.json', help="Where to write the JSON report")
+        parser.add_argument('--baseline', help="Previous report to compare against")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed p95 slowdown against the baseline, as a fraction")
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help="Also fail on latency/query regressions against the baseline, not only on budgets")
+        parser.add_argument('--save-baseline', action='store_true',
+                            help="Write this run to --baseline instead of comparing")
+        parser.add_argument('--compare-servers', action='store_true',
+                            help="Compare the throughput of the sync views under WSGI with the async views under ASGI")
+        parser.add_argument('--server', choices=SERVERS,
+                            help="Throughput of this server only (the process must serve the matching views)")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients of the throughput runs")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint of the throughput runs")
+
+    def handle(self, *args, **options):
+        if options['server']:
+            return self.throughput(options)
+        if options['compare_servers']:
+            return self.compare_servers(options)
+
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError("--save-baseline needs --baseline PATH.")
+
+        baseline = None
+        if options['baseline'] and not options['save_baseline']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError(f"Baseline {options['baseline']} does not exist, create it with --save-baseline.")
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        try:
+            report = run_benchmarks(
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                only=options['endpoints'],
+                progress=self.print_result,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        with open(options['report'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Report written to {options['report']}")
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+
+        failures = []
+        for name, queries, budget in over_budget(report):
+            failures.append(f"{name}: {queries} queries, budget is {budget}")
+
+        if baseline is not None:
+            for name, metric, before, after in compare(report, baseline, options['tolerance']):
+                message = f"{name}: {metric} went from {before} to {after}"
+                if options['fail_on_regression']:
+                    failures.append(message)
+                else:
+                    self.stdout.write(self.style.WARNING(f"Regression: {message}"))
+
+        if failures:
+            raise CommandError("Benchmark failed:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All endpoints within budget."))
+
+    def throughput(self, options):
+        try:
+            report = run_throughput(
+                options['server'],
+                concurrency=options['concurrency'],
+                requests=options['requests'],
+                only=options['endpoints'],
+                progress=self.print_throughput,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        with open(options['report'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def compare_servers(self, options):
+        """One subprocess per server, with ASYNC_VIEWS set as asgi.py / a WSGI deployment would"""
+        reports = {}
+        for server in SERVERS:
+            with tempfile.NamedTemporaryFile(suffix='.json') as report:
+                command = [
+                    sys.executable, sys.argv[0], 'benchmark_endpoints', '--server', server,
+                    '--concurrency', str(options['concurrency']), '--requests', str(options['requests']),
+                    '--report', report.name,
+                ]
+                for name in options['endpoints'] or ():
+                    command += ['--endpoint', name]
+                self.stdout.write(f"{server}:")
+                env = {**os.environ, 'ASYNC_VIEWS': '1' if server == 'asgi' else '0'}
+                if subprocess.run(command, env=env).returncode:
+                    raise CommandError(f"The {server} run failed.")
+                with open(report.name) as f:
+                    reports[server] = json.load(f)
+
+        wsgi, asgi = reports['wsgi']['endpoints'], reports['asgi']['endpoints']
+        self.stdout.write(f"\n{'endpoint':<12} {'wsgi req/s':>11} {'asgi req/s':>11}  ratio")
+        for name in wsgi:
+            before, after = wsgi[name]['requests_per_s'], asgi[name]['requests_per_s']
+            self.stdout.write(f"{name:<12} {before:>11.1f} {after:>11.1f}  {after / before:.2f}x")
+
+        with open(options['report'], 'w') as f:
+            json.dump(reports, f, indent=2)
+        self.stdout.write(f"Report written to {options['report']}")
+
+    def print_throughput(self, name, result):
+        self.stdout.write(
+            f"  {name:<12} {result['status']}  {result['requests_per_s']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms"
+        )
+
+    def print_result(self, name, result):
+        style = self.style.ERROR if result['queries'] > result['budget'] else self.style.SUCCESS
+        encode = result['encode']
+        self.stdout.write(
+            f"{name:<12} {result['status']}  p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+            + style(f"{result['queries']:>5} queries (budget {result['budget']})")
+            + (f"  encode {encode['stdlib_ms']:.3f} -> {encode['fast_ms']:.3f}ms ({encode['bytes']} B)" if encode else "")
+        )
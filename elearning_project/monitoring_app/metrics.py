@@ -0,0 +1,174 @@
+"""
+Minimal Prometheus-compatible metrics registry.
+
+Every worker process aggregates in memory (a dict update under a lock per
+observation). With METRICS['MULTIPROCESS_DIR'] set, each process periodically
+dumps its totals to ``<dir>/metrics-<pid>.json`` and the /metrics view merges
+all files, so a scrape sees the sum over every Gunicorn/Uvicorn worker.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+DEFAULT_METRICS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 5,   # seconds between per-process file dumps
+    'TOKEN': None,         # bearer token accepted by /metrics
+    # without the token /metrics only answers staff users and these client
+    # addresses (REMOTE_ADDR). Behind a reverse proxy on the same host every
+    # client is loopback, so leave this empty there and use the token.
+    'ALLOWED_IPS': [],
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by route, method and status', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency by route', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size by route', SIZE_BUCKETS),
+    'db_queries_per_request': ('histogram', 'Database queries per request by route', QUERY_BUCKETS),
+    'cache_requests_total': ('counter', 'Cache lookups by namespace and result (hit/miss)', None),
+}
+
+
+def metrics_settings():
+    return {**DEFAULT_METRICS, **getattr(settings, 'METRICS', {})}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                # one slot per bucket, then +Inf, sum
+                series = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(series)] for (name, labels), series in self._histograms.items()],
+            }
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        config = metrics_settings()
+        directory = config['MULTIPROCESS_DIR']
+        if directory and time.monotonic() - self._last_flush >= config['FLUSH_INTERVAL']:
+            self.flush(directory)
+
+
+registry = MetricsRegistry()
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, labels, value)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, labels, value)
+
+
+def record_cache(namespace, hit):
+    registry.inc('cache_requests_total', {'namespace': namespace, 'result': 'hit' if hit else 'miss'})
+
+
+def _merge(snapshots):
+    counters, histograms = defaultdict(float), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, series in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], series)]
+            else:
+                histograms[key] = list(series)
+    return counters, histograms
+
+
+def collect():
+    """Snapshot of this process, or of all processes in multiprocess mode"""
+    directory = metrics_settings()['MULTIPROCESS_DIR']
+    if not directory:
+        return _merge([registry.snapshot()])
+    registry.flush(directory)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return _merge(snapshots)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render_text():
+    """Prometheus text exposition format (version 0.0.4)"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+        else:
+            for (metric, labels), series in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ['+Inf'], series[:-1]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {series[-1]:g}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
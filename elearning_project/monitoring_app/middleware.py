@@ -0,0 +1,223 @@
+import cProfile
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+
+from core_app.middleware import HybridMiddleware
+from . import metrics
+from .profiling import profiling_settings, run_profiled, save_profile
+from .sql import QueryCounter, QueryRecorder
+
+logger = logging.getLogger('monitoring_app.sql')
+
+DEFAULT_SQL_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,         # fraction of requests profiled
+    'REPEAT_THRESHOLD': 5,      # flag a fingerprint run more than this many times
+    'RESPONSE_HEADERS': True,   # add X-DB-Queries / X-DB-Time
+    'LOG_ALL': False,           # log every sampled request, not just flagged ones
+}
+
+
+def sql_profiling_settings():
+    return {**DEFAULT_SQL_PROFILING, **getattr(settings, 'SQL_PROFILING', {})}
+
+
+def route_label(request):
+    """URL route name such as 'course-list', used as the metrics label"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.url_name or match.route or '<unnamed>'
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path
+    return match.view_name or match._func_path
+
+
+class QueryProfilingMiddleware(HybridMiddleware):
+    """
+    Records the query count, total SQL time and repeated query fingerprints of
+    each sampled request. Results go to the X-DB-Queries / X-DB-Time response
+    headers and to the 'monitoring_app.sql' logger as one JSON line. Requests
+    running the same fingerprint more than REPEAT_THRESHOLD times (an N+1) are
+    logged as warnings.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = sql_profiling_settings()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder, config)
+
+    async def __acall__(self, request):
+        config = sql_profiling_settings()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return await self.get_response(request)
+
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self.report(request, response, recorder, config)
+
+    def report(self, request, response, recorder, config):
+        request.sql_recorder = recorder
+        if config['RESPONSE_HEADERS']:
+            response['X-DB-Queries'] = str(recorder.count)
+            response['X-DB-Time'] = f"{recorder.duration * 1000:.2f}"
+
+        repeated = recorder.repeated(config['REPEAT_THRESHOLD'])
+        if repeated or config['LOG_ALL']:
+            payload = {
+                'event': 'sql_profile',
+                'method': request.method,
+                'path': request.path,
+                'view': view_label(request),
+                'status': response.status_code,
+                'queries': recorder.count,
+                'sql_time_ms': round(recorder.duration * 1000, 2),
+                'repeated': [
+                    {'count': n, 'sql': recorder.samples[key][:500]} for key, n in repeated
+                ],
+            }
+            level = logging.WARNING if repeated else logging.INFO
+            logger.log(level, json.dumps(payload))
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Records latency, response size and query count per URL route name into the
+    in-process metrics registry exported on /metrics.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = metrics.metrics_settings()['ENABLED']
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        with QueryCounter() as counter:
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    def record(self, request, response, elapsed, counter):
+        route = route_label(request)
+        metrics.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+        metrics.observe('http_request_duration_seconds', elapsed, route=route, method=request.method)
+        metrics.observe('db_queries_per_request', counter.count, route=route)
+        if not response.streaming:
+            metrics.observe('http_response_size_bytes', len(response.content), route=route)
+        metrics.registry.maybe_flush()
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Runs cProfile around the request when a staff user asks for it (X-Profile
+    header or ?profile=1) or when the request is picked by PROFILING['SAMPLE_RATE'].
+    The result is stored as a RequestProfile, downloadable from the admin.
+    Requests that are not profiled only pay for a header/query lookup.
+    Under ASGI only the event loop thread is profiled, not the threads that
+    run the async ORM queries and sync code.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = profiling_settings()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        user = self._staff_user(request) if self._flagged(request, config) else None
+        trigger = self._trigger(user, config)
+        if trigger is None:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response, profiler = run_profiled(self.get_response, request)
+        self._save(profiler, request, response, time.perf_counter() - start, trigger, user)
+        return response
+
+    async def __acall__(self, request):
+        config = profiling_settings()
+        if not config['ENABLED']:
+            return await self.get_response(request)
+
+        user = await sync_to_async(self._staff_user)(request) if self._flagged(request, config) else None
+        trigger = self._trigger(user, config)
+        if trigger is None:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        await sync_to_async(self._save)(profiler, request, response, time.perf_counter() - start, trigger, user)
+        return response
+
+    def _flagged(self, request, config):
+        return bool(request.headers.get(config['HEADER']) or request.GET.get(config['QUERY_PARAM']))
+
+    def _trigger(self, user, config):
+        if user is not None:
+            return 'flag'
+        if config['SAMPLE_RATE'] and random.random() < config['SAMPLE_RATE']:
+            return 'sample'
+        return None
+
+    def _save(self, profiler, request, response, duration, trigger, user):
+        try:
+            profile = save_profile(
+                profiler, request, response, duration, trigger,
+                view_name=view_label(request), user=user or getattr(request, 'user', None),
+            )
+            response['X-Profile-Id'] = str(profile.id)
+        except Exception:
+            logging.getLogger('monitoring_app.profiling').exception("Could not store request profile")
+
+    def _staff_user(self, request):
+        """Session user, or the DRF token user since token auth only happens inside the view"""
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                result = TokenAuthentication().authenticate(Request(request))
+            except AuthenticationFailed:
+                result = None
+            user = result[0] if result else None
+        if user is not None and user.is_staff:
+            return user
+        return None
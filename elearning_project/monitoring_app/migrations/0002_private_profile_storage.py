@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:48
+
+import core_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='requestprofile',
+            name='stats_file',
+            field=models.FileField(help_text='Raw pstats dump (open with pstats, snakeviz, ...)', storage=core_app.storage.PrivateStorage(), upload_to='profiles/'),
+        ),
+    ]
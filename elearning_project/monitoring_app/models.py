@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db import models
+
+from core_app.storage import private_storage
+
+
+class RequestProfile(models.Model):
+    """cProfile capture of a single request, recorded by ProfilingMiddleware"""
+    TRIGGER_CHOICES = [
+        ('flag', 'Requested'),
+        ('sample', 'Sampled'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveIntegerField()
+    duration_ms = models.FloatField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES, default='flag')
+    # private: the dumps expose code paths and timings, staff download them from the admin
+    stats_file = models.FileField(
+        upload_to='profiles/', storage=private_storage,
+        help_text="Raw pstats dump (open with pstats, snakeviz, ...)",
+    )
+    summary = models.TextField(blank=True)
+    breakdown = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['view_name']),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
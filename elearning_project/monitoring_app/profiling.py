@@ -0,0 +1,92 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+DEFAULT_PROFILING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.0,          # fraction of all requests profiled automatically
+    'HEADER': 'X-Profile',       # staff can force a profile with this header ...
+    'QUERY_PARAM': 'profile',    # ... or with ?profile=1
+    'TOP_FUNCTIONS': 40,
+}
+
+PERMISSION_METHODS = ('has_permission', 'has_object_permission')
+
+
+def profiling_settings():
+    return {**DEFAULT_PROFILING, **getattr(settings, 'PROFILING', {})}
+
+
+def _label(func):
+    filename, lineno, name = func
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        filename = os.path.relpath(filename, base_dir)
+    return f"{name} ({filename}:{lineno})"
+
+
+def breakdown(stats):
+    """
+    Time spent in serializer ``get_*`` methods (SerializerMethodField) and in
+    permission checks, taken from the raw profile entries.
+    """
+    base_dir = str(settings.BASE_DIR)
+    method_fields, permissions = [], []
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        filename, lineno, name = func
+        entry = {'function': _label(func), 'calls': nc, 'cumulative_ms': round(ct * 1000, 3)}
+        # only our own serializers: DRF's internal get_fields() etc. are not method fields
+        if name.startswith('get_') and filename.startswith(base_dir) and filename.endswith('serializers.py'):
+            method_fields.append(entry)
+        elif name in PERMISSION_METHODS:
+            permissions.append(entry)
+    key = lambda entry: entry['cumulative_ms']
+    return {
+        'serializer_method_fields': sorted(method_fields, key=key, reverse=True),
+        'permissions': sorted(permissions, key=key, reverse=True),
+    }
+
+
+def build_report(profiler, top=40):
+    """Return (pstats dump bytes, text summary, breakdown dict) for a finished profiler"""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(top)
+    stats.print_callees(top // 4)
+    parts = breakdown(stats)
+    return marshal.dumps(stats.stats), stream.getvalue(), parts
+
+
+def run_profiled(func, *args, **kwargs):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    return result, profiler
+
+
+def save_profile(profiler, request, response, duration, trigger, view_name='', user=None):
+    from .models import RequestProfile
+
+    data, summary, parts = build_report(profiler, profiling_settings()['TOP_FUNCTIONS'])
+    profile = RequestProfile(
+        user=user if user is not None and user.is_authenticated else None,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=view_name[:200],
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        trigger=trigger,
+        summary=summary,
+        breakdown=parts,
+    )
+    profile.stats_file.save('request.prof', ContentFile(data), save=False)
+    profile.save()
+    return profile
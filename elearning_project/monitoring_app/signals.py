@@ -0,0 +1,12 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def install_query_watching(sender, connection, **kwargs):
+    """Report queries to QueryCounter / QueryRecorder (monitoring_app.sql)"""
+    if getattr(connection, '_query_watching', False):
+        return
+    from .sql import watch_queries
+    connection.execute_wrappers.insert(0, watch_queries)
+    connection._query_watching = True
@@ -0,0 +1,92 @@
+import contextvars
+import re
+import time
+from collections import Counter
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """
+    Normalise a query so that the same statement with different parameters
+    (the typical N+1) maps to the same string.
+    """
+    sql = _STRINGS.sub('%s', sql)
+    sql = _NUMBERS.sub('%s', sql)
+    sql = _IN_LISTS.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+_watchers = contextvars.ContextVar('sql_watchers', default=())
+
+
+def watch_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection (monitoring_app.signals):
+    reports each query to the QueryCounter / QueryRecorder blocks active in
+    the current context. Context variables follow sync_to_async, so queries an
+    async view runs through the async ORM are seen as well.
+    """
+    watchers = _watchers.get()
+    if not watchers:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for watcher in watchers:
+            watcher.record(sql, duration)
+
+
+class _Watcher:
+    _token = None
+
+    def __enter__(self):
+        self._token = _watchers.set(_watchers.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _watchers.reset(self._token)
+        self._token = None
+
+
+class QueryCounter(_Watcher):
+    """Cheapest possible watcher: only counts queries on all connections"""
+
+    def __init__(self):
+        self.count = 0
+
+    def record(self, sql, duration):
+        self.count += 1
+
+
+class QueryRecorder(_Watcher):
+    """
+    Records the number, duration and fingerprint of every query run on every
+    configured connection while it is active.
+
+        with QueryRecorder() as recorder:
+            ...
+        recorder.count, recorder.duration, recorder.repeated(5)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}
+
+    def record(self, sql, duration):
+        self.duration += duration
+        self.count += 1
+        key = fingerprint(sql)
+        self.fingerprints[key] += 1
+        self.samples.setdefault(key, sql)
+
+    def repeated(self, threshold):
+        """Fingerprints executed more than ``threshold`` times, most frequent first"""
+        return [(key, n) for key, n in self.fingerprints.most_common() if n > threshold]
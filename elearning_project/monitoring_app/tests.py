@@ -0,0 +1,141 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core_app.cache import cache_layer
+from registration_app.models import CustomUser
+from .benchmarks import ENDPOINTS, over_budget, run_benchmarks
+from .profiling import run_profiled, save_profile
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'monitoring-tests'}}
+
+
+@override_settings(METRICS={'TOKEN': 'secret', 'ALLOWED_IPS': ['10.0.0.5']})
+class MetricsAccessTests(TestCase):
+
+    def get(self, remote_addr='203.0.113.7', **headers):
+        return self.client.get(reverse('metrics'), REMOTE_ADDR=remote_addr, headers=headers)
+
+    def test_anonymous_client_is_refused(self):
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_wrong_token_is_refused(self):
+        self.assertEqual(self.get(authorization='Bearer nope').status_code, 403)
+
+    def test_token(self):
+        response = self.get(authorization='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('text/plain', response['Content-Type'])
+
+    def test_allowed_ip(self):
+        self.assertEqual(self.get(remote_addr='10.0.0.5').status_code, 200)
+
+    def test_staff_user(self):
+        self.client.force_login(CustomUser.objects.create(username='admin', is_staff=True))
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_non_staff_user_is_refused(self):
+        self.client.force_login(CustomUser.objects.create(username='student'))
+        self.assertEqual(self.get().status_code, 403)
+
+    @override_settings(METRICS={'TOKEN': 'secret'})
+    def test_loopback_is_not_allowed_by_default(self):
+        # behind a local reverse proxy every client comes from loopback
+        self.assertEqual(self.get(remote_addr='127.0.0.1').status_code, 403)
+
+    @override_settings(METRICS={'TOKEN': None, 'ALLOWED_IPS': []})
+    def test_no_token_configured_is_not_open(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(authorization='Bearer None').status_code, 403)
+
+
+def seed(prefix, **sizes):
+    options = {'users': 40, 'instructors': 4, 'categories': 3, 'courses': 8, 'modules': 2, 'lessons': 4, 'enrollments': 80}
+    call_command('seed_scale', prefix=prefix, stdout=io.StringIO(), **{**options, **sizes})
+
+
+class ProfileStorageTests(TestCase):
+
+    def setUp(self):
+        self.private_root, self.media_root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.private_root)
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(PRIVATE_ROOT=self.private_root, MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        _, profiler = run_profiled(sum, range(10))
+        self.profile = save_profile(profiler, RequestFactory().get('/api/courses/'), HttpResponse(), 0.01, 'flag')
+        self.url = reverse('admin:monitoring_app_requestprofile_download', args=[self.profile.pk])
+
+    def test_stats_are_stored_privately(self):
+        path = self.profile.stats_file.path
+        self.assertTrue(path.startswith(os.path.abspath(self.private_root)))
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.listdir(self.media_root), [])
+        with self.assertRaises(ValueError):
+            self.profile.stats_file.url
+
+    def test_staff_download_from_the_admin(self):
+        self.client.force_login(CustomUser.objects.create(username='admin', is_staff=True, is_superuser=True))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        with self.profile.stats_file.open('rb') as f:
+            self.assertEqual(b''.join(response.streaming_content), f.read())
+
+    def test_staff_without_view_permission_is_refused(self):
+        self.client.force_login(CustomUser.objects.create(username='staff', is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_non_staff_is_sent_to_the_login(self):
+        self.client.force_login(CustomUser.objects.create(username='student'))
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BenchmarkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed('small')
+
+    def setUp(self):
+        cache_layer.l1.clear()
+        cache_layer.l2.clear()
+
+    def run_benchmarks(self):
+        return run_benchmarks(iterations=2, warmup=1)['endpoints']
+
+    def test_every_endpoint_answers_within_its_budget(self):
+        results = self.run_benchmarks()
+        self.assertEqual(sorted(results), sorted(endpoint.name for endpoint in ENDPOINTS))
+        self.assertEqual({name: result['status'] for name, result in results.items() if result['status'] != 200}, {})
+        self.assertEqual(over_budget({'endpoints': results}), [])
+
+    def test_query_counts_do_not_grow_with_the_data(self):
+        before = {name: result['queries'] for name, result in self.run_benchmarks().items()}
+        # more courses, bigger courses and more enrollments per learner
+        seed('large', users=60, courses=30, modules=4, lessons=5, enrollments=400)
+        cache_layer.l1.clear()
+        cache_layer.l2.clear()
+        after = {name: result['queries'] for name, result in self.run_benchmarks().items()}
+        self.assertEqual(after, before)
+
+    def test_command_fails_over_budget(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        report = os.path.join(directory, 'report.json')
+        options = {'iterations': 1, 'warmup': 0, 'endpoints': ['check_access'], 'report': report, 'stdout': io.StringIO()}
+        call_command('benchmark_endpoints', **options)
+        self.assertTrue(os.path.exists(report))
+
+        tight = [endpoint._replace(budget=0) for endpoint in ENDPOINTS]
+        with mock.patch('monitoring_app.benchmarks.ENDPOINTS', tight):
+            with self.assertRaisesMessage(CommandError, "check_access: 2 queries, budget is 0"):
+                call_command('benchmark_endpoints', **options)
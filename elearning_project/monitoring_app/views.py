@@ -0,0 +1,22 @@
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
+
+
+def can_scrape(request, config):
+    """A request with the bearer token, from a staff user or from one of ALLOWED_IPS"""
+    token = config['TOKEN']
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return True
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    return request.META.get('REMOTE_ADDR') in config['ALLOWED_IPS']
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    if not can_scrape(request, metrics.metrics_settings()):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,5 +1,6 @@
 # registration_app/admin.py
 from django.contrib import admin
+from django.db.models import Count
 from django.contrib.auth.admin import UserAdmin
 from .models import CustomUser
 
@@ -30,4 +31,18 @@ from .models import CustomUser
 #     is_student_filter.short_description = 'Is Student'
 
 # Register the CustomUser model
-admin.site.register(CustomUser)
\ No newline at end of file
+@admin.register(CustomUser)
+class CustomUserAdmin(admin.ModelAdmin):
+    # search_fields are required for the course students autocomplete
+    search_fields = ('username', 'email', 'first_name', 'last_name')
+    ordering = ('username',)
+    list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'enrollment_count')
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_enrollment_count=Count('enrollment'))
+
+    def enrollment_count(self, obj):
+        return obj._enrollment_count
+    enrollment_count.short_description = 'Enrollments'
+    enrollment_count.admin_order_field = '_enrollment_count'
@@ -1,3 +1,45 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from courses_app.models import Course, Enrollment
+from .models import CustomUser
+
+
+class CustomUserAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(username='admin', is_staff=True, is_superuser=True)
+        cls.instructor = CustomUser.objects.create(username='instructor', role='instructor', is_instructor=True)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def enroll(self, user, courses):
+        for n in range(courses):
+            course = Course.objects.create(title=f'{user.username} {n}', description='-', instructor=self.instructor, price=0, duration=1)
+            Enrollment.objects.create(user=user, course=course, payment_status='free')
+
+    def changelist(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:registration_app_customuser_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_shows_enrollment_counts(self):
+        student = CustomUser.objects.create(username='student')
+        self.enroll(student, 2)
+        response, _ = self.changelist()
+        counts = {row.username: row._enrollment_count for row in response.context['cl'].result_list}
+        self.assertEqual(counts, {'admin': 0, 'instructor': 0, 'student': 2})
+        self.assertContains(response, 'Enrollments')
+
+    def test_enrollment_counts_cost_no_query_per_row(self):
+        self.enroll(CustomUser.objects.create(username='first'), 1)
+        _, few = self.changelist()
+        for n in range(5):
+            self.enroll(CustomUser.objects.create(username=f'student {n}'), 2)
+        _, many = self.changelist()
+        self.assertEqual(many, few)
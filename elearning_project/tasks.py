@@ -16,6 +16,10 @@ def makemigrations(c):
 def createsuperuser(c):
     c.run("python manage.py createsuperuser")
 
+@task
+def worker(c):
+    c.run("python manage.py run_jobs")
+
 @task
 def test(c):
     c.run("python manage.py test")